@@ -858,39 +858,253 @@
 import os
 import json
 import argparse
+import functools
 from typing import Dict, Any, List, Optional
-from flask import Flask, request, jsonify, Response
+from flask import Flask, Blueprint, request, jsonify, make_response, Response
 from flask_cors import CORS
 import threading
 import uuid
 import time
 from datetime import datetime
 import queue
+import signal
 import traceback
 
 # Import our pipeline components
 from db.db_setup import DatabaseManager, create_schema_file
 from modules.core_modules import PipelineManager
+from modules.job_queue import JobQueue, SharedJobQueue, PRIORITY_INTERACTIVE, PRIORITY_BULK, PRIORITY_BACKGROUND
+from modules.scheduler import ChannelRefreshScheduler
+from modules.task_store import TaskStore, SharedTaskStore
+from modules.task_events import TaskEventBus, SharedTaskEventBus
+from modules.checkpoints import JobCheckpointer
+from modules.browser_pool import BrowserPool
+from modules.page_cache import PageCache
+from modules.fetcher import ConcurrentFetcher
+from modules.download import AudioDownloader
+from modules.s2t import TranscriptionEngine
+from modules.vad import EnergyVAD
+from modules.fingerprint import FingerprintIndex
+from modules.audio_storage import AudioStore
+from modules.response_cache import ResponseCache
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+# API routes; registered on the Flask app by create_app
+api = Blueprint("api", __name__)
 
 # Global variables
 pipeline_manager = None
 db_path = None
 output_folder = None
-active_tasks = {}
-task_results = {}
-task_queue = queue.Queue()
-worker_thread = None
+task_store = None
+checkpointer = None
+browser_pool = None
+page_cache = None
+fetcher = None
+audio_downloader = None
+transcriber = None
+fingerprint_index = None
+audio_store = None
+response_cache = None
+task_events = TaskEventBus()
+task_queue = JobQueue()
+worker_threads = []
+refresh_scheduler = None
+refresh_max_videos = 5
 running = True
+draining = threading.Event()
+
+def publish_task_change(task_id: str, record: Dict[str, Any]) -> None:
+    """Push a task state change to stream subscribers (TaskStore on_change callback)."""
+    task_events.publish("task", {"task_id": task_id, "task": record})
+
+
+def report_progress(task_id: str, stage: str, count: int) -> None:
+    """
+    Add to a task's per-stage progress counters and push a progress event.
+    
+    Args:
+        task_id: Task ID
+        stage: Pipeline stage ('videos_discovered', 'comments_scraped', 'texts_analysed',
+               'audio_downloaded', 'audio_transcribed', 'segments_flagged')
+        count: Number of items completed in this step
+    """
+    def increment(record: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+        progress = record.setdefault("progress", {})
+        progress[stage] = progress.get(stage, 0) + count
+        return dict(progress)
+    
+    try:
+        progress = task_store.apply(task_id, increment, notify=False)
+    except KeyError:
+        return
+    
+    task_events.publish("progress", {"task_id": task_id, "stage": stage, "progress": progress})
+
+
+def enqueue_task(task_id: str, job: Dict[str, Any], record: Dict[str, Any],
+                 priority: int, fair_key: str) -> None:
+    """
+    Register a task, checkpoint it and add it to the queue.
+    
+    Args:
+        task_id: Task ID
+        job: Job dictionary ({"id", "type", "fair_key", "params"})
+        record: Task record shown by the API
+        priority: Job queue priority class
+        fair_key: Key used to share queue capacity fairly
+    """
+    task_store.create(task_id, record)
+    checkpointer.save_job(task_id, job, priority, fair_key, record)
+    task_queue.put(job, priority=priority, fair_key=fair_key)
+
+
+def complete_task(task_id: str, status: str, results: Dict[str, Any], error: Optional[str] = None) -> None:
+    """Record the final state of a task and drop its checkpoints."""
+    task_store.finish(task_id, status, results, error)
+    checkpointer.remove_job(task_id)
+
+
+def resume_pending_tasks() -> int:
+    """
+    Re-queue tasks that were queued or running when the server last stopped.
+    
+    Channel tasks whose discovery finished continue from their per-video
+    checkpoints (see _run_channel_task).
+    
+    Returns:
+        Number of resumed tasks
+    """
+    if task_queue.durable:
+        # Jobs and task records outlive the processes; serve.py releases the claims of stopped workers
+        return 0
+    
+    pending = checkpointer.pending_jobs()
+    
+    for item in pending:
+        record = item["record"]
+        record["status"] = "queued"
+        record["resumed"] = True
+        task_store.create(item["task_id"], record)
+        task_queue.put(item["job"], priority=item["priority"], fair_key=item["fair_key"])
+    
+    if pending:
+        print(f"Resumed {len(pending)} unfinished tasks")
+    return len(pending)
+
+
+def _run_channel_task(task: Dict[str, Any], task_pipeline: PipelineManager) -> None:
+    """
+    Discover a channel's videos and fan them out as per-video sub-jobs.
+    
+    Sub-jobs share the channel task's fair key so a large crawl only ever
+    holds one slot of the fair queue at a time. A resumed task skips
+    discovery and only re-queues videos without a completed checkpoint.
+    """
+    task_id = task["id"]
+    params = task["params"]
+    
+    checkpoint = checkpointer.load_discovery(task_id)
+    
+    if checkpoint:
+        results, video_ids, completed = checkpoint
+        for video_results in completed:
+            PipelineManager.merge_video_results(results, video_results)
+        results["videos_processed"] = len(completed)
+        videos_total = len(video_ids) + len(completed)
+    else:
+        results = task_pipeline.discover_channel_videos(params["channel_input"], params["max_videos"])
+        video_ids = results.pop("video_ids")
+        videos_total = len(video_ids)
+        checkpointer.save_discovery(task_id, results, video_ids)
+    
+    task_store.set_results(task_id, results)
+    task_store.update(task_id, videos_total=videos_total, videos_remaining=len(video_ids))
+    
+    if not video_ids:
+        complete_task(task_id, "completed", results)
+        return
+    
+    # Download audio a window ahead of the sub-jobs; each sub-job waits for and reuses its
+    # video's download and, when it finishes, prefetches the video one window further on
+    window = audio_downloader.prefetch_window if audio_downloader is not None else 0
+    if window:
+        audio_downloader.prefetch(video_ids[:window])
+    
+    for index, video_id in enumerate(video_ids):
+        ahead = index + window
+        task_queue.put(
+            {
+                "id": task_id,
+                "type": "channel_video",
+                "params": {
+                    "video_id": video_id,
+                    "scrape_comments": params["scrape_comments"],
+                    "min_severity": params["min_severity"],
+                    "prefetch_video_id": video_ids[ahead] if window and ahead < len(video_ids) else None
+                }
+            },
+            priority=PRIORITY_BULK,
+            fair_key=task["fair_key"]
+        )
+
+
+def _run_channel_video_task(task: Dict[str, Any], task_pipeline: Optional[PipelineManager]) -> None:
+    """
+    Process one video of a channel task and complete the parent when it is the last one.
+    
+    A failing video never fails the parent: it is counted as processed with
+    its error, so the sibling sub-jobs still finish the task.
+    """
+    task_id = task["id"]
+    params = task["params"]
+    
+    try:
+        if task_pipeline is None:
+            raise RuntimeError("Pipeline could not be started")
+        video_results = task_pipeline.process_channel_video(
+            params["video_id"], params["scrape_comments"], params["min_severity"]
+        )
+    except Exception as e:
+        video_results = {"video_id": params["video_id"], "is_dangerous": False, "errors": [str(e)]}
+    
+    # Keep the channel's prefetch window full
+    if audio_downloader is not None and params.get("prefetch_video_id") is not None:
+        audio_downloader.prefetch([params["prefetch_video_id"]])
+    
+    try:
+        checkpointer.complete_video(task_id, params["video_id"], video_results)
+    except Exception as e:
+        # Without the checkpoint the video is only processed again if the server restarts
+        print(f"Error checkpointing video {params['video_id']} of task {task_id}: {e}")
+    
+    def merge(record: Dict[str, Any], results: Dict[str, Any]) -> bool:
+        PipelineManager.merge_video_results(results, video_results)
+        results["videos_processed"] += 1
+        record["videos_remaining"] -= 1
+        return record["videos_remaining"] == 0
+    
+    try:
+        finished = task_store.apply(task_id, merge)
+    except KeyError:
+        # The parent task was already finished or evicted
+        return
+    
+    if finished:
+        complete_task(task_id, "completed", task_store.get_results(task_id))
+
 
 def worker_function():
     """Worker thread that processes tasks from the queue."""
     global running, pipeline_manager, db_path, output_folder
     
-    while running:
+    # Each worker owns one pipeline manager for its lifetime. This keeps database
+    # connections thread-confined without paying the browser startup cost for
+    # every per-video sub-job
+    task_pipeline = None
+    
+    # While draining, in-flight jobs finish but no new ones are taken; jobs
+    # left in the queue resume from their checkpoints on the next start
+    while running and not draining.is_set():
         try:
             # Get task from queue with timeout
             try:
@@ -901,30 +1115,25 @@ def worker_function():
             task_id = task["id"]
             task_type = task["type"]
             
-            # Create a new pipeline manager for this task
-            # This ensures each task has its own database connection
-            task_pipeline = PipelineManager(db_path, output_folder)
-            
             try:
+                if task_pipeline is None:
+                    task_pipeline = PipelineManager(db_path, output_folder, browser_pool, page_cache,
+                                                    audio_downloader, transcriber, fingerprint_index,
+                                                    audio_store, fetcher)
+                
+                task_pipeline.set_progress_callback(
+                    lambda stage, count: report_progress(task_id, stage, count)
+                )
+                
                 if task_type == "channel":
-                    active_tasks[task_id]["status"] = "in_progress"
-                    
-                    # Process channel
-                    channel_input = task["params"]["channel_input"]
-                    max_videos = task["params"]["max_videos"]
-                    scrape_comments = task["params"]["scrape_comments"]
-                    min_severity = task["params"]["min_severity"]
-                    
-                    results = task_pipeline.process_channel(
-                        channel_input, max_videos, scrape_comments, min_severity
-                    )
-                    
-                    active_tasks[task_id]["status"] = "completed"
-                    active_tasks[task_id]["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    task_results[task_id] = results
+                    task_store.update(task_id, status="in_progress")
+                    _run_channel_task(task, task_pipeline)
+                
+                elif task_type == "channel_video":
+                    _run_channel_video_task(task, task_pipeline)
                 
                 elif task_type == "video":
-                    active_tasks[task_id]["status"] = "in_progress"
+                    task_store.update(task_id, status="in_progress")
                     
                     # Process video
                     video_url = task["params"]["video_url"]
@@ -935,22 +1144,20 @@ def worker_function():
                         video_url, scrape_comments, min_severity
                     )
                     
-                    active_tasks[task_id]["status"] = "completed"
-                    active_tasks[task_id]["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    task_results[task_id] = results
+                    complete_task(task_id, "completed", results)
             
             except Exception as e:
                 error_msg = f"Error processing task: {e}\n{traceback.format_exc()}"
                 print(error_msg)
-                active_tasks[task_id]["status"] = "failed"
-                active_tasks[task_id]["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                active_tasks[task_id]["error"] = str(e)
-                task_results[task_id] = {"errors": [str(e)]}
+                if task_type != "channel_video":
+                    complete_task(task_id, "failed", {"errors": [str(e)]}, str(e))
+                elif task_pipeline is None:
+                    # The video never ran; count it as failed so the sibling sub-jobs still finish the task
+                    _run_channel_video_task(task, None)
             
             finally:
-                # Clean up resources
                 if task_pipeline:
-                    task_pipeline.close()
+                    task_pipeline.set_progress_callback(None)
                 
                 # Mark task as done
                 task_queue.task_done()
@@ -958,8 +1165,145 @@ def worker_function():
         except Exception as e:
             print(f"Error in worker thread: {e}")
             time.sleep(1)  # Prevent tight loop in case of repeated errors
+    
+    # Clean up resources
+    if task_pipeline:
+        task_pipeline.close()
 
-def initialize_server(db_file_path: str, output_dir: str, schema_path: str) -> None:
+def submit_channel_task(channel_input: str, max_videos: int, scrape_comments: bool,
+                        min_severity: int, priority: int, fair_key: str,
+                        trigger: str = "api") -> str:
+    """
+    Create a channel task record and add it to the queue.
+    
+    Args:
+        channel_input: Channel name, URL, or @username
+        max_videos: Maximum number of videos to process
+        scrape_comments: Whether to scrape video comments
+        min_severity: Minimum severity level for content analysis
+        priority: Job queue priority class
+        fair_key: Key used to share queue capacity fairly
+        trigger: What created the task ('api' or 'scheduler')
+        
+    Returns:
+        ID of the queued task
+    """
+    task_id = str(uuid.uuid4())
+    params = {
+        "channel_input": channel_input,
+        "max_videos": max_videos,
+        "scrape_comments": scrape_comments,
+        "min_severity": min_severity
+    }
+    
+    record = {
+        "status": "queued",
+        "type": "channel",
+        "trigger": trigger,
+        "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "params": dict(params)
+    }
+    
+    job = {
+        "id": task_id,
+        "type": "channel",
+        "fair_key": fair_key,
+        "params": params
+    }
+    
+    enqueue_task(task_id, job, record, priority, fair_key)
+    
+    return task_id
+
+
+def enqueue_channel_refresh(channel: Dict[str, Any]) -> None:
+    """Queue an automatic re-crawl of a known channel (refresh scheduler callback)."""
+    submit_channel_task(
+        channel["url"], refresh_max_videos, True, 1,
+        PRIORITY_BACKGROUND, f"refresh:{channel['id']}", trigger="scheduler"
+    )
+
+
+def use_shared_state(db_file_path: str, output_dir: str, max_tasks: int = 500,
+                     task_ttl_hours: float = 6.0, response_ttl: float = 5.0) -> None:
+    """
+    Keep task state, the job queue and task events in the database.
+    
+    Used by every process of a multi-process server (serve.py), so API
+    workers and pipeline workers see the same tasks.
+    
+    Args:
+        db_file_path: Path to the SQLite database file
+        output_dir: Folder to store downloaded files
+        max_tasks: Maximum number of live and recently finished tasks kept
+        task_ttl_hours: Hours a finished task stays listed before it is archived-only
+        response_ttl: Seconds read responses are cached (0 disables the cache)
+    """
+    global db_path, output_folder, task_store, task_queue, task_events, checkpointer
+    
+    db_path = db_file_path
+    output_folder = output_dir
+    use_response_cache(response_ttl)
+    task_events = SharedTaskEventBus(db_path)
+    task_queue = SharedJobQueue(db_path)
+    task_store = SharedTaskStore(db_path, max_tasks=max_tasks, finished_ttl=task_ttl_hours * 3600,
+                                 on_change=publish_task_change)
+    checkpointer = JobCheckpointer(db_path)
+
+
+def use_response_cache(ttl: float) -> None:
+    """
+    Cache the responses of the read endpoints marked with cached_response.
+    
+    Args:
+        ttl: Seconds a response is served before its data is checked for changes
+             (0 disables the cache)
+    """
+    global response_cache
+    response_cache = ResponseCache(db_path, ttl=ttl) if ttl > 0 else None
+
+
+def create_app(db_file_path: Optional[str] = None, output_dir: str = "downloads",
+               max_tasks: int = 500, task_ttl_hours: float = 6.0, response_ttl: float = 5.0) -> Flask:
+    """
+    Create the Flask application.
+    
+    Without a database path the app relies on initialize_server being run in
+    the same process (python app.py). With one it is a stateless API worker:
+    task state is read from and written to the shared database and jobs are
+    run by separate pipeline worker processes (see serve.py).
+    
+    Args:
+        db_file_path: Path to the SQLite database file of a multi-process server
+        output_dir: Folder to store downloaded files
+        max_tasks: Maximum number of live and recently finished tasks kept
+        task_ttl_hours: Hours a finished task stays listed before it is archived-only
+        response_ttl: Seconds read responses are cached (0 disables the cache)
+        
+    Returns:
+        Flask application
+    """
+    flask_app = Flask(__name__)
+    CORS(flask_app)  # Enable CORS for all routes
+    flask_app.register_blueprint(api)
+    
+    if db_file_path is not None:
+        use_shared_state(db_file_path, output_dir, max_tasks, task_ttl_hours, response_ttl)
+    
+    return flask_app
+
+
+def initialize_server(db_file_path: str, output_dir: str, schema_path: str, num_workers: int = 1,
+                      refresh_budget: float = 0, refresh_videos: int = 5,
+                      max_tasks: int = 500, task_ttl_hours: float = 6.0,
+                      num_browsers: int = 2, lightweight_browsers: bool = True,
+                      page_cache_dir: Optional[str] = None, replay: bool = False,
+                      download_audio: bool = False, download_workers: int = 3,
+                      audio_quota_gb: float = 0, transcribe: bool = False,
+                      asr_model: str = "vinai/PhoWhisper-medium", asr_batch_size: int = 8,
+                      asr_quantize: bool = False, vad: bool = True, fingerprint: bool = True,
+                      store_audio: bool = False, store_hot_gb: float = 2.0, store_max_gb: float = 0,
+                      response_ttl: float = 5.0, shared_state: bool = False) -> None:
     """
     Initialize the server components.
     
@@ -967,12 +1311,38 @@ def initialize_server(db_file_path: str, output_dir: str, schema_path: str) -> N
         db_file_path: Path to the SQLite database file
         output_dir: Folder to store downloaded files
         schema_path: Path to the database schema file
+        num_workers: Number of worker threads pulling from the task queue
+        refresh_budget: Maximum automatic channel refreshes per hour (0 disables the scheduler)
+        refresh_videos: Maximum videos scraped per automatic refresh
+        max_tasks: Maximum number of tasks kept in memory
+        task_ttl_hours: Hours a finished task stays in memory before eviction
+        num_browsers: Size of the headless browser pool shared by the workers
+        lightweight_browsers: Whether pooled browsers block media, images, fonts and ads
+        page_cache_dir: Directory of the on-disk page cache (None disables it)
+        replay: Serve pages only from the page cache, without network or browsers
+        download_audio: Whether the pipeline downloads video audio
+        download_workers: Number of parallel audio downloads
+        audio_quota_gb: Disk quota for downloaded audio in GB (0 for no limit)
+        transcribe: Whether the pipeline transcribes downloaded audio (implies download_audio)
+        asr_model: PhoWhisper model used for transcription
+        asr_batch_size: Number of 30-second chunks transcribed per model call
+        asr_quantize: Quantize the transcription model to int8 on CPU
+        vad: Transcribe only detected speech, skipping silence and quiet passages
+        fingerprint: Reuse the transcription of earlier uploads of the same audio
+        store_audio: Move transcribed audio into per-channel PCM/Opus containers
+        store_hot_gb: Budget of the PCM tier of the audio store in GB
+        store_max_gb: Budget of the whole audio store in GB (0 for no limit)
+        response_ttl: Seconds read responses are cached (0 disables the cache)
+        shared_state: Keep task state in the database for other server processes
+                      (pipeline worker processes of serve.py)
     """
-    global pipeline_manager, db_path, output_folder, worker_thread
+    global pipeline_manager, db_path, output_folder, refresh_scheduler, refresh_max_videos, task_store, checkpointer
+    global browser_pool, page_cache, fetcher, audio_downloader, transcriber, fingerprint_index, audio_store
     
     # Save paths for worker threads
     db_path = db_file_path
     output_folder = output_dir
+    refresh_max_videos = refresh_videos
     
     # Ensure output folder exists
     os.makedirs(output_folder, exist_ok=True)
@@ -983,31 +1353,138 @@ def initialize_server(db_file_path: str, output_dir: str, schema_path: str) -> N
             schema_content = f.read()
         create_schema_file(schema_content, schema_path)
     
+    # Bounded task state; finished tasks are archived to the database
+    if shared_state:
+        use_shared_state(db_path, output_folder, max_tasks, task_ttl_hours, response_ttl)
+    else:
+        task_store = TaskStore(db_path, max_tasks=max_tasks, finished_ttl=task_ttl_hours * 3600,
+                               on_change=publish_task_change)
+        checkpointer = JobCheckpointer(db_path)
+        use_response_cache(response_ttl)
+    
+    # Pick up tasks interrupted by the last shutdown or crash
+    resume_pending_tasks()
+    
+    # Optional snapshot cache of fetched pages; expired snapshots are pruned in the background
+    if page_cache_dir:
+        page_cache = PageCache(page_cache_dir, replay=replay)
+        if not replay:
+            threading.Thread(target=page_cache.evict, daemon=True).start()
+    
+    # Shared pool of warm browsers; started in the background so startup isn't delayed.
+    # Replays never render pages, so they don't need one.
+    if not (page_cache and page_cache.replay):
+        browser_pool = BrowserPool(size=max(1, num_browsers), lightweight=lightweight_browsers)
+        threading.Thread(target=browser_pool.warm, daemon=True).start()
+    
+    # One fetcher shared by all workers, so its per-host caps and rate limit are global
+    fetcher = ConcurrentFetcher()
+    
+    # One downloader shared by all workers, so the download limit, dedup and quota are global
+    if download_audio or transcribe:
+        audio_downloader = AudioDownloader(
+            db_path, output_folder, workers=max(1, download_workers),
+            max_bytes=int(audio_quota_gb * 1024 ** 3) if audio_quota_gb > 0 else None
+        )
+    
+    # The speech model is loaded once and shared by all workers
+    if transcribe:
+        transcriber = TranscriptionEngine(asr_model, batch_size=asr_batch_size, quantize=asr_quantize,
+                                          vad=EnergyVAD() if vad else None)
+        # Re-uploads are recognised by their audio and reuse the earlier transcription
+        if fingerprint:
+            fingerprint_index = FingerprintIndex(db_path)
+        # Transcribed audio leaves the download folder for compact per-channel containers
+        if store_audio:
+            audio_store = AudioStore(
+                db_path, os.path.join(output_folder, "store"),
+                hot_bytes=int(store_hot_gb * 1024 ** 3),
+                max_bytes=int(store_max_gb * 1024 ** 3) if store_max_gb > 0 else None
+            )
+    
     # Initialize pipeline manager for API requests that don't require a worker thread
-    pipeline_manager = PipelineManager(db_path, output_folder)
+    pipeline_manager = PipelineManager(db_path, output_folder, browser_pool, page_cache,
+                                       audio_downloader, transcriber, fingerprint_index, audio_store,
+                                       fetcher)
     
-    # Start worker thread
-    worker_thread = threading.Thread(target=worker_function)
-    worker_thread.daemon = True
-    worker_thread.start()
+    # Start worker threads
+    for _ in range(max(1, num_workers)):
+        worker_thread = threading.Thread(target=worker_function)
+        worker_thread.daemon = True
+        worker_thread.start()
+        worker_threads.append(worker_thread)
+    
+    # Start the periodic channel refresh scheduler
+    if refresh_budget > 0:
+        refresh_scheduler = ChannelRefreshScheduler(
+            db_path, enqueue_channel_refresh, budget_per_hour=refresh_budget
+        )
+        refresh_scheduler.start()
     
     print(f"Server initialized with database at {db_path} and output folder at {output_folder}")
 
 
+def cached_response(entities):
+    """
+    Serve a read endpoint from the response cache.
+    
+    Responses carry a strong ETag and a short max-age, and a request whose
+    If-None-Match matches the cached response gets an empty 304. Only
+    successful responses are cached.
+    
+    Args:
+        entities: Function of the view arguments returning the data_versions
+                  entities the response is built from
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            cache = response_cache
+            if cache is None:
+                return view(**kwargs)
+            
+            uncached = []
+            
+            def build() -> Optional[bytes]:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    uncached.append(response)
+                    return None
+                return response.get_data()
+            
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            entry = cache.get(key, entities(**kwargs), build)
+            if entry is None:
+                return uncached[0]
+            
+            if request.if_none_match.contains_weak(entry.etag):
+                response = Response(status=304)
+            else:
+                response = Response(entry.body, mimetype="application/json")
+            response.set_etag(entry.etag)
+            response.headers["Cache-Control"] = f"max-age={int(cache.ttl)}"
+            return response
+        return wrapper
+    return decorator
+
+
 # API Routes
 
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def health_check() -> Response:
     """Health check endpoint."""
     return jsonify({
         "status": "ok",
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "active_tasks": len(active_tasks),
-        "queued_tasks": task_queue.qsize()
+        "active_tasks": len(task_store),
+        "queued_tasks": task_queue.qsize(),
+        "browsers": browser_pool.stats() if browser_pool else None,
+        "page_cache": page_cache.stats() if page_cache else None
     })
 
 
-@app.route('/api/channels', methods=['GET'])
+@api.route('/api/channels', methods=['GET'])
+@cached_response(lambda: ["channels"])
 def get_channels() -> Response:
     """Get list of channels."""
     try:
@@ -1040,7 +1517,8 @@ def get_channels() -> Response:
             db.close()
 
 
-@app.route('/api/channels/<int:channel_id>', methods=['GET'])
+@api.route('/api/channels/<int:channel_id>', methods=['GET'])
+@cached_response(lambda channel_id: [f"channel:{channel_id}"])
 def get_channel(channel_id: int) -> Response:
     """Get channel details."""
     try:
@@ -1097,7 +1575,8 @@ def get_channel(channel_id: int) -> Response:
             db.close()
 
 
-@app.route('/api/videos/<int:video_id>', methods=['GET'])
+@api.route('/api/videos/<int:video_id>', methods=['GET'])
+@cached_response(lambda video_id: [f"video:{video_id}", "channels"])
 def get_video(video_id: int) -> Response:
     """Get video details including title and comment analysis."""
     try:
@@ -1261,7 +1740,65 @@ def get_video(video_id: int) -> Response:
             db.close()
 
 
-@app.route('/api/process/channel', methods=['POST'])
+@api.route('/api/transcriptions/<int:transcription_id>/segments', methods=['GET'])
+def get_transcript_segments(transcription_id: int) -> Response:
+    """Get the timestamped segments of a transcription with their analysis."""
+    db = None
+    try:
+        dangerous_only = request.args.get('dangerous', '0') in ('1', 'true')
+        
+        db = DatabaseManager(db_path)
+        
+        transcription = db.fetchone(
+            """
+            SELECT t.id, a.video_id FROM transcriptions t
+            JOIN audio_files a ON a.id = t.audio_id
+            WHERE t.id = ?
+            """,
+            (transcription_id,)
+        )
+        
+        if not transcription:
+            return jsonify({"status": "error", "message": "Transcription not found"}), 404
+        
+        query = """
+            SELECT segment_index, start_time, end_time, text, is_dangerous, highest_severity,
+                   hate_spans, analysis_model
+            FROM transcript_segments
+            WHERE transcription_id = ?
+        """
+        if dangerous_only:
+            query += " AND is_dangerous = 1"
+        query += " ORDER BY segment_index"
+        
+        segments = db.fetchall(query, (transcription_id,))
+        
+        return jsonify({
+            "status": "success",
+            "transcription_id": transcription_id,
+            "video_id": transcription[1],
+            "segments": [
+                {
+                    "index": s[0],
+                    "start_time": s[1],
+                    "end_time": s[2],
+                    "text": s[3],
+                    "is_dangerous": None if s[4] is None else bool(s[4]),
+                    "highest_severity": s[5],
+                    "hate_spans": json.loads(s[6]) if s[6] else [],
+                    "analysis_model": s[7]
+                }
+                for s in segments
+            ]
+        })
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        if db:
+            db.close()
+
+
+@api.route('/api/process/channel', methods=['POST'])
 def process_channel() -> Response:
     """Start processing a YouTube channel."""
     try:
@@ -1274,33 +1811,13 @@ def process_channel() -> Response:
         max_videos = int(data.get('max_videos', 5))
         scrape_comments = bool(data.get('scrape_comments', True))
         min_severity = int(data.get('min_severity', 1))
+        # Bulk crawls share capacity fairly per submitter, falling back to the channel itself
+        fair_key = data.get('submitter') or channel_input
         
-        task_id = str(uuid.uuid4())
-        
-        # Create task record
-        active_tasks[task_id] = {
-            "status": "queued",
-            "type": "channel",
-            "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "params": {
-                "channel_input": channel_input,
-                "max_videos": max_videos,
-                "scrape_comments": scrape_comments,
-                "min_severity": min_severity
-            }
-        }
-        
-        # Add task to queue
-        task_queue.put({
-            "id": task_id,
-            "type": "channel",
-            "params": {
-                "channel_input": channel_input,
-                "max_videos": max_videos,
-                "scrape_comments": scrape_comments,
-                "min_severity": min_severity
-            }
-        })
+        task_id = submit_channel_task(
+            channel_input, max_videos, scrape_comments, min_severity,
+            PRIORITY_BULK, fair_key
+        )
         
         return jsonify({
             "status": "success",
@@ -1311,7 +1828,7 @@ def process_channel() -> Response:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
-@app.route('/api/process/video', methods=['POST'])
+@api.route('/api/process/video', methods=['POST'])
 def process_video() -> Response:
     """Start processing a YouTube video."""
     try:
@@ -1323,31 +1840,31 @@ def process_video() -> Response:
         video_url = data['video_url']
         scrape_comments = bool(data.get('scrape_comments', True))
         min_severity = int(data.get('min_severity', 1))
+        fair_key = data.get('submitter') or video_url
         
         task_id = str(uuid.uuid4())
         
-        # Create task record
-        active_tasks[task_id] = {
+        params = {
+            "video_url": video_url,
+            "scrape_comments": scrape_comments,
+            "min_severity": min_severity
+        }
+        
+        record = {
             "status": "queued",
             "type": "video",
             "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "params": {
-                "video_url": video_url,
-                "scrape_comments": scrape_comments,
-                "min_severity": min_severity
-            }
+            "params": dict(params)
         }
         
-        # Add task to queue
-        task_queue.put({
+        job = {
             "id": task_id,
             "type": "video",
-            "params": {
-                "video_url": video_url,
-                "scrape_comments": scrape_comments,
-                "min_severity": min_severity
-            }
-        })
+            "fair_key": fair_key,
+            "params": params
+        }
+        
+        enqueue_task(task_id, job, record, PRIORITY_INTERACTIVE, fair_key)
         
         return jsonify({
             "status": "success",
@@ -1358,34 +1875,96 @@ def process_video() -> Response:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
-@app.route('/api/tasks', methods=['GET'])
+@api.route('/api/tasks', methods=['GET'])
 def get_tasks() -> Response:
-    """Get list of active and recent tasks."""
-    return jsonify({
-        "status": "success",
-        "tasks": active_tasks
+    """Get a page of active and recent tasks (newest first), optionally filtered by status and type."""
+    try:
+        status = request.args.get('status', None)
+        task_type = request.args.get('type', None)
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        offset = max(int(request.args.get('offset', 0)), 0)
+        include_archived = request.args.get('archived', '0') in ('1', 'true')
+        
+        page, total = task_store.list_tasks(status, task_type, limit, offset, include_archived)
+        
+        return jsonify({
+            "status": "success",
+            # A list, because jsonify sorts object keys and would lose the newest-first order
+            "tasks": [dict(record, task_id=task_id) for task_id, record in page],
+            "total": total,
+            "limit": limit,
+            "offset": offset
+        })
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+
+@api.route('/api/tasks/stream', methods=['GET'])
+def stream_tasks() -> Response:
+    """
+    Stream task state changes and progress as Server-Sent Events.
+    
+    Clients resume from the standard Last-Event-ID header (or a last_event_id
+    query parameter). A 'reset' event means events were missed and the client
+    should refetch /api/tasks before continuing.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    
+    try:
+        cursor = int(last_event_id) if last_event_id else task_events.latest_id()
+    except ValueError:
+        cursor = task_events.latest_id()
+    
+    def generate():
+        nonlocal cursor
+        yield "retry: 3000\n\n"
+        
+        while running:
+            events, reset = task_events.wait_for_events(cursor, timeout=15.0)
+            
+            if reset:
+                cursor = events[-1][0] if events else task_events.latest_id()
+                yield TaskEventBus.format_sse(cursor, "reset", "{}")
+                continue
+            
+            if not events:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            
+            for event_id, event_type, payload in events:
+                yield TaskEventBus.format_sse(event_id, event_type, payload)
+                cursor = event_id
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
     })
 
 
-@app.route('/api/tasks/<task_id>', methods=['GET'])
+@api.route('/api/tasks/<task_id>', methods=['GET'])
 def get_task(task_id: str) -> Response:
     """Get task status and results."""
-    if task_id not in active_tasks:
+    task = task_store.get(task_id)
+    
+    if task is None:
         return jsonify({"status": "error", "message": "Task not found"}), 404
     
     response = {
         "status": "success",
-        "task": active_tasks[task_id]
+        "task": task
     }
     
     # Include results if task is completed
-    if active_tasks[task_id]["status"] == "completed" and task_id in task_results:
-        response["results"] = task_results[task_id]
+    if task["status"] == "completed":
+        results = task_store.get_results(task_id)
+        if results is not None:
+            response["results"] = results
     
     return jsonify(response)
 
 
-@app.route('/api/search', methods=['GET'])
+@api.route('/api/search', methods=['GET'])
 def search() -> Response:
     """Search for channels and videos."""
     query = request.args.get('q', '')
@@ -1478,13 +2057,15 @@ def search() -> Response:
             db.close()
 
 
-@app.route('/api/stats', methods=['GET'])
+@api.route('/api/stats', methods=['GET'])
 def get_stats() -> Response:
     """Get server statistics."""
     try:
         # Create a new database manager for this request
         db = DatabaseManager(db_path)
         
+        task_counts = task_store.status_counts()
+        
         stats = {
             "channels_count": db.fetchone("SELECT COUNT(*) FROM channels")[0],
             "videos_count": db.fetchone("SELECT COUNT(*) FROM videos")[0],
@@ -1492,10 +2073,10 @@ def get_stats() -> Response:
             "dangerous_content_count": db.fetchone("SELECT COUNT(*) FROM content_analysis WHERE is_dangerous = 1")[0],
             "dangerous_titles_count": db.fetchone("SELECT COUNT(*) FROM content_analysis WHERE is_dangerous = 1 AND content_type = 'title'")[0],
             "dangerous_comments_count": db.fetchone("SELECT COUNT(*) FROM content_analysis WHERE is_dangerous = 1 AND content_type = 'comments'")[0],
-            "active_tasks": len([t for t in active_tasks.values() if t["status"] == "in_progress"]),
+            "active_tasks": task_counts.get("in_progress", 0),
             "queued_tasks": task_queue.qsize(),
-            "completed_tasks": len([t for t in active_tasks.values() if t["status"] == "completed"]),
-            "failed_tasks": len([t for t in active_tasks.values() if t["status"] == "failed"]),
+            "completed_tasks": task_counts.get("completed", 0),
+            "failed_tasks": task_counts.get("failed", 0),
             "server_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
@@ -1510,7 +2091,8 @@ def get_stats() -> Response:
             db.close()
             
 
-@app.route('/api/analysis/dangerous-videos', methods=['GET'])
+@api.route('/api/analysis/dangerous-videos', methods=['GET'])
+@cached_response(lambda: ["content_analysis", "videos", "channels"])
 def get_dangerous_videos() -> Response:
     """Get videos with dangerous content, filtered by content type."""
     try:
@@ -1561,37 +2143,175 @@ def get_dangerous_videos() -> Response:
         if db:
             db.close()
 
-def main():
-    """Main function to run the server."""
-    parser = argparse.ArgumentParser(description='YouTube Analysis Server')
+def _handle_sigterm(signum, frame) -> None:
+    """Stop the Flask server loop so main() can drain the workers."""
+    raise KeyboardInterrupt
+
+
+def shutdown_server(drain_timeout: float = 300.0) -> None:
+    """
+    Drain the workers and release resources.
+    
+    Workers stop taking new jobs and finish the one they are running (a
+    channel discovery, one video of a channel, or a single-video task).
+    Unstarted work stays checkpointed in the database and resumes on the
+    next start.
+    
+    Args:
+        drain_timeout: Maximum seconds to wait for in-flight jobs
+    """
+    global running
+    
+    print(f"Draining workers (up to {drain_timeout:.0f}s)...")
+    draining.set()
+    
+    if refresh_scheduler:
+        refresh_scheduler.stop()
+    
+    deadline = time.monotonic() + drain_timeout
+    for worker_thread in worker_threads:
+        worker_thread.join(timeout=max(0.0, deadline - time.monotonic()))
+    
+    unfinished = len([t for t in worker_threads if t.is_alive()])
+    if unfinished:
+        print(f"{unfinished} workers still busy after drain timeout; their jobs will resume on restart")
+    
+    running = False
+    
+    if pipeline_manager:
+        pipeline_manager.close()
+    
+    if fetcher:
+        fetcher.close()
+    
+    if audio_downloader:
+        audio_downloader.close()
+    
+    if browser_pool:
+        browser_pool.close()
+        
+    print("Server stopped")
+
+
+def build_arg_parser(description: str = 'YouTube Analysis Server') -> argparse.ArgumentParser:
+    """
+    Create the command line parser shared by app.py and serve.py.
+    
+    Args:
+        description: Description shown by --help
+        
+    Returns:
+        Argument parser with the server and pipeline options
+    """
+    parser = argparse.ArgumentParser(description=description)
     parser.add_argument('--host', type=str, default='0.0.0.0', help='Server host')
     parser.add_argument('--port', type=int, default=5001, help='Server port')
     parser.add_argument('--db', type=str, default='db/youtube_analysis.db', help='Path to SQLite database file')
     parser.add_argument('--output', type=str, default='downloads', help='Output folder for downloaded files')
     parser.add_argument('--schema', type=str, default='db/schema.sql', help='Path to database schema file')
     parser.add_argument('--debug', action='store_true', help='Run in debug mode')
+    parser.add_argument('--workers', type=int, default=2, help='Number of pipeline worker threads')
+    parser.add_argument('--refresh-budget', type=float, default=0,
+                        help='Maximum automatic channel re-crawls per hour (default: 0, scheduler disabled)')
+    parser.add_argument('--refresh-videos', type=int, default=5,
+                        help='Maximum videos scraped per automatic re-crawl')
+    parser.add_argument('--max-tasks', type=int, default=500, help='Maximum number of tasks kept in memory')
+    parser.add_argument('--task-ttl', type=float, default=6.0,
+                        help='Hours a finished task stays in memory before it is archived-only')
+    parser.add_argument('--drain-timeout', type=float, default=300.0,
+                        help='Seconds to wait for in-flight jobs to finish on shutdown')
+    parser.add_argument('--browsers', type=int, default=2, help='Number of pooled headless browsers')
+    parser.add_argument('--full-browser', action='store_true',
+                        help='Load pages with images, media and ads instead of the lightweight profile')
+    parser.add_argument('--page-cache', type=str, default=None,
+                        help='Directory for an on-disk cache of fetched pages')
+    parser.add_argument('--replay', action='store_true',
+                        help='Serve pages only from --page-cache, without network access or browsers')
+    parser.add_argument('--download-audio', action='store_true', help='Download video audio in the pipeline')
+    parser.add_argument('--download-workers', type=int, default=3, help='Number of parallel audio downloads')
+    parser.add_argument('--audio-quota', type=float, default=0,
+                        help='Disk quota for downloaded audio in GB; least recently used files are evicted (default: 0, no limit)')
+    parser.add_argument('--transcribe', action='store_true',
+                        help='Transcribe downloaded audio in the pipeline (implies --download-audio)')
+    parser.add_argument('--asr-model', type=str, default='vinai/PhoWhisper-medium',
+                        help='PhoWhisper model (e.g. vinai/PhoWhisper-small for faster CPU transcription)')
+    parser.add_argument('--asr-batch-size', type=int, default=8, help='Number of 30-second chunks per transcription batch')
+    parser.add_argument('--asr-quantize', action='store_true', help='Quantize the transcription model to int8 (CPU)')
+    parser.add_argument('--no-vad', action='store_true',
+                        help='Transcribe whole files instead of only the detected speech')
+    parser.add_argument('--no-fingerprint', action='store_true',
+                        help='Transcribe re-uploaded audio again instead of reusing the earlier transcription')
+    parser.add_argument('--store-audio', action='store_true',
+                        help='Keep transcribed audio in per-channel PCM/Opus containers instead of the downloads')
+    parser.add_argument('--store-hot-gb', type=float, default=2.0,
+                        help='GB of stored audio kept as PCM for fast re-transcription (the rest is Opus)')
+    parser.add_argument('--store-max-gb', type=float, default=0,
+                        help='Maximum size of the audio store in GB (0 for no limit)')
+    parser.add_argument('--cache-ttl', type=float, default=5.0,
+                        help='Seconds channel, video and analysis responses are cached (0 disables the cache)')
+    
+    return parser
+
+
+def server_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Map parsed command line arguments to initialize_server keyword arguments.
     
-    args = parser.parse_args()
+    Args:
+        args: Arguments parsed by build_arg_parser
+        
+    Returns:
+        Keyword arguments for initialize_server
+    """
+    return {
+        "db_file_path": args.db,
+        "output_dir": args.output,
+        "schema_path": args.schema,
+        "num_workers": args.workers,
+        "refresh_budget": args.refresh_budget,
+        "refresh_videos": args.refresh_videos,
+        "max_tasks": args.max_tasks,
+        "task_ttl_hours": args.task_ttl,
+        "num_browsers": args.browsers,
+        "lightweight_browsers": not args.full_browser,
+        "page_cache_dir": args.page_cache,
+        "replay": args.replay,
+        "download_audio": args.download_audio,
+        "download_workers": args.download_workers,
+        "audio_quota_gb": args.audio_quota,
+        "transcribe": args.transcribe,
+        "asr_model": args.asr_model,
+        "asr_batch_size": args.asr_batch_size,
+        "asr_quantize": args.asr_quantize,
+        "vad": not args.no_vad,
+        "fingerprint": not args.no_fingerprint,
+        "store_audio": args.store_audio,
+        "store_hot_gb": args.store_hot_gb,
+        "store_max_gb": args.store_max_gb,
+        "response_ttl": args.cache_ttl
+    }
+
+
+# Application of the single-process development server; serve.py creates its own per API worker
+app = create_app()
+
+
+def main():
+    """Run API and pipeline in one process on Flask's development server (see serve.py for production)."""
+    args = build_arg_parser().parse_args()
+    
+    # Turn SIGTERM (deploys, process managers) into the same clean shutdown as Ctrl+C
+    signal.signal(signal.SIGTERM, _handle_sigterm)
     
     # Initialize server components
-    initialize_server(args.db, args.output, args.schema)
+    initialize_server(**server_options(args))
     
     try:
         # Run the Flask server
         app.run(host=args.host, port=args.port, debug=args.debug)
     finally:
-        # Clean up resources when server stops
-        global running
-        running = False
-        
-        if worker_thread:
-            worker_thread.join(timeout=5.0)
-            
-        if pipeline_manager:
-            pipeline_manager.close()
-            
-        print("Server stopped")
+        shutdown_server(args.drain_timeout)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -4,6 +4,31 @@ import json
 import threading
 from typing import Dict, Any, Optional
 
+# Columns added to existing tables after their first release. CREATE TABLE IF NOT EXISTS
+# leaves old tables untouched, so these are added to databases that lack them.
+COLUMN_MIGRATIONS = {
+    "audio_files": [
+        ("checksum", "TEXT"),
+        ("last_accessed", "TIMESTAMP"),
+        ("evicted", "BOOLEAN DEFAULT 0")
+    ],
+    "transcript_segments": [
+        ("is_dangerous", "BOOLEAN"),
+        ("highest_severity", "INTEGER"),
+        ("hate_spans", "TEXT"),
+        ("analysis_model", "TEXT"),
+        ("analysis_time", "TIMESTAMP")
+    ]
+}
+
+# Seconds a connection waits for another process's write lock before failing
+BUSY_TIMEOUT = 30.0
+
+# Indexes on migrated columns, created once the columns exist
+MIGRATION_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_audio_files_checksum ON audio_files(checksum)"
+]
+
 class DatabaseManager:
     """
     Handles all database operations for the YouTube analysis server.
@@ -27,11 +52,14 @@ class DatabaseManager:
             os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
             
             # Connect to the database in the main thread for initialization
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
             
             # Enable foreign keys
             conn.execute("PRAGMA foreign_keys = ON")
             
+            # Readers don't block the writer (and vice versa) when several processes share the file
+            conn.execute("PRAGMA journal_mode = WAL")
+            
             # Create cursor
             cursor = conn.cursor()
             
@@ -40,6 +68,8 @@ class DatabaseManager:
                 schema = f.read()
                 conn.executescript(schema)
             
+            self._migrate_columns(conn)
+            
             conn.commit()
             conn.close()
             print(f"Database initialized at {self.db_path}")
@@ -48,6 +78,18 @@ class DatabaseManager:
             print(f"Error initializing database: {e}")
             raise
     
+    @staticmethod
+    def _migrate_columns(conn: sqlite3.Connection) -> None:
+        """Add columns from COLUMN_MIGRATIONS that an existing database is missing."""
+        for table, columns in COLUMN_MIGRATIONS.items():
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for name, definition in columns:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+        
+        for statement in MIGRATION_INDEXES:
+            conn.execute(statement)
+    
     def close(self) -> None:
         """Close the database connection for the current thread."""
         if hasattr(self.local, 'conn') and self.local.conn:
@@ -64,7 +106,7 @@ class DatabaseManager:
             SQLite connection object
         """
         if not hasattr(self.local, 'conn') or self.local.conn is None:
-            self.local.conn = sqlite3.connect(self.db_path)
+            self.local.conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
             self.local.conn.execute("PRAGMA foreign_keys = ON")
             self.local.cursor = self.local.conn.cursor()
         return self.local.conn
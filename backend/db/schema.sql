@@ -37,6 +37,18 @@ CREATE TABLE IF NOT EXISTS audio_files (
     file_size INTEGER,
     duration REAL,
     download_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    checksum TEXT,  -- SHA-256 of the file, used to share identical downloads
+    last_accessed TIMESTAMP,  -- For least-recently-used eviction under the disk quota
+    evicted BOOLEAN DEFAULT 0,  -- File was deleted to free space
+    FOREIGN KEY (video_id) REFERENCES videos(id) ON DELETE CASCADE
+);
+
+-- Audio in use by a worker (downloading, decoding or transcribing); quota eviction skips it
+CREATE TABLE IF NOT EXISTS audio_pins (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id INTEGER NOT NULL,
+    owner TEXT NOT NULL,  -- host:pid of the process using the audio
+    pinned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (video_id) REFERENCES videos(id) ON DELETE CASCADE
 );
 
@@ -52,6 +64,42 @@ CREATE TABLE IF NOT EXISTS transcriptions (
     FOREIGN KEY (audio_id) REFERENCES audio_files(id) ON DELETE CASCADE
 );
 
+-- Timestamped segments of each transcription
+CREATE TABLE IF NOT EXISTS transcript_segments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    transcription_id INTEGER NOT NULL,
+    segment_index INTEGER NOT NULL,
+    start_time REAL NOT NULL,  -- Seconds from the start of the audio
+    end_time REAL NOT NULL,
+    text TEXT NOT NULL,
+    is_dangerous BOOLEAN,  -- NULL until the segment is analyzed
+    highest_severity INTEGER,
+    hate_spans TEXT,  -- JSON list of spans with character positions and times
+    analysis_model TEXT,  -- Detector model of the analysis; other models trigger re-analysis
+    analysis_time TIMESTAMP,
+    FOREIGN KEY (transcription_id) REFERENCES transcriptions(id) ON DELETE CASCADE
+);
+
+-- Landmark fingerprints of downloaded audio, used to spot re-uploads
+CREATE TABLE IF NOT EXISTS audio_fingerprints (
+    audio_id INTEGER PRIMARY KEY,
+    hash_count INTEGER NOT NULL,
+    duplicate_of INTEGER,  -- Earlier audio with the same content, NULL for originals
+    match_score REAL,  -- Share of hashes agreeing with duplicate_of
+    time_shift REAL,  -- Seconds to subtract from duplicate_of's times to get this audio's times
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (audio_id) REFERENCES audio_files(id) ON DELETE CASCADE,
+    FOREIGN KEY (duplicate_of) REFERENCES audio_files(id) ON DELETE SET NULL
+);
+
+-- Fingerprint hash index of original (non-duplicate) audio
+CREATE TABLE IF NOT EXISTS fingerprint_hashes (
+    hash INTEGER NOT NULL,
+    audio_id INTEGER NOT NULL,
+    offset INTEGER NOT NULL,  -- Spectrogram frame of the hash (32 ms units)
+    FOREIGN KEY (audio_id) REFERENCES audio_files(id) ON DELETE CASCADE
+);
+
 -- Content analysis table to store dangerous content detection results
 CREATE TABLE IF NOT EXISTS content_analysis (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -92,12 +140,244 @@ CREATE TABLE IF NOT EXISTS tasks (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Archive of finished API tasks evicted from the server's in-memory task store
+CREATE TABLE IF NOT EXISTS task_archive (
+    task_id TEXT PRIMARY KEY,  -- UUID of the API task
+    task_type TEXT NOT NULL,  -- 'channel' or 'video'
+    status TEXT NOT NULL,  -- 'completed' or 'failed'
+    start_time TEXT,
+    end_time TEXT,
+    record TEXT NOT NULL,  -- JSON task record (params, progress, error)
+    results TEXT,  -- JSON task results
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Live and recently finished API tasks when several server processes share the task state (serve.py)
+CREATE TABLE IF NOT EXISTS task_state (
+    task_id TEXT PRIMARY KEY,  -- UUID of the API task
+    status TEXT NOT NULL,
+    record TEXT NOT NULL,  -- JSON task record
+    results TEXT,  -- JSON (partial) task results
+    created_at REAL NOT NULL,  -- Unix time the task was created
+    finished_at REAL  -- Unix time the task finished
+);
+
+-- Shared job queue of serve.py; rows are deleted once their job is done
+CREATE TABLE IF NOT EXISTS job_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,  -- JSON job
+    priority INTEGER NOT NULL,
+    fair_key TEXT,
+    pass_value REAL NOT NULL,  -- Stride scheduling position within the priority class
+    claimed_by TEXT,  -- host:pid of the worker running the job, NULL while queued
+    claimed_at TIMESTAMP
+);
+
+-- Virtual time of each priority class of the shared job queue
+CREATE TABLE IF NOT EXISTS job_queue_clock (
+    priority INTEGER PRIMARY KEY,
+    virtual_time REAL NOT NULL
+);
+
+-- Recent task events of serve.py, read by the SSE streams of all API workers
+CREATE TABLE IF NOT EXISTS task_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type TEXT NOT NULL,
+    payload TEXT NOT NULL,  -- JSON event data
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Jobs queued or running on the API server, kept until they finish so they can resume after a restart
+CREATE TABLE IF NOT EXISTS pending_jobs (
+    task_id TEXT PRIMARY KEY,  -- UUID of the API task
+    job TEXT NOT NULL,  -- JSON job as put on the queue
+    priority INTEGER NOT NULL,
+    fair_key TEXT,
+    record TEXT NOT NULL,  -- JSON task record
+    state TEXT,  -- JSON channel results once discovery has finished
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Per-video checkpoints of channel jobs
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    video_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,  -- 'discovered' or 'completed'
+    result TEXT,  -- JSON per-video results for 'completed'
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (task_id, video_id, stage)
+);
+
+-- Location of transcribed audio in the per-channel storage containers
+CREATE TABLE IF NOT EXISTS audio_store (
+    audio_id INTEGER PRIMARY KEY,
+    codec TEXT NOT NULL,  -- 'pcm' (16 kHz int16) or 'opus'
+    container TEXT NOT NULL,  -- Path of the container file
+    byte_offset INTEGER NOT NULL,
+    byte_length INTEGER NOT NULL,
+    sample_count INTEGER NOT NULL,  -- Number of 16 kHz samples
+    stored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- For least-recently-used retention
+    FOREIGN KEY (audio_id) REFERENCES audio_files(id) ON DELETE CASCADE
+);
+
+-- Change counters of the data behind cached API responses, bumped by the triggers below.
+-- Entities are whole tables ('channels') or single rows ('channel:3', 'video:42').
+CREATE TABLE IF NOT EXISTS data_versions (
+    entity TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
 -- Indexes for improved query performance
 CREATE INDEX IF NOT EXISTS idx_videos_channel_id ON videos(channel_id);
 CREATE INDEX IF NOT EXISTS idx_audio_files_video_id ON audio_files(video_id);
 CREATE INDEX IF NOT EXISTS idx_transcriptions_audio_id ON transcriptions(audio_id);
+CREATE INDEX IF NOT EXISTS idx_fingerprint_hashes_hash ON fingerprint_hashes(hash);
+CREATE INDEX IF NOT EXISTS idx_fingerprint_hashes_audio_id ON fingerprint_hashes(audio_id);
+CREATE INDEX IF NOT EXISTS idx_audio_store_container ON audio_store(container, byte_offset);
+CREATE INDEX IF NOT EXISTS idx_transcript_segments_transcription_id ON transcript_segments(transcription_id, segment_index);
 CREATE INDEX IF NOT EXISTS idx_content_analysis_transcription_id ON content_analysis(transcription_id);
 CREATE INDEX IF NOT EXISTS idx_content_analysis_video_id ON content_analysis(video_id);
 CREATE INDEX IF NOT EXISTS idx_content_analysis_content_type ON content_analysis(content_type);
 CREATE INDEX IF NOT EXISTS idx_comments_video_id ON comments(video_id);
-CREATE INDEX IF NOT EXISTS idx_tasks_entity ON tasks(entity_id, entity_type);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_tasks_entity ON tasks(entity_id, entity_type);
+CREATE INDEX IF NOT EXISTS idx_task_archive_start_time ON task_archive(start_time);
+CREATE INDEX IF NOT EXISTS idx_task_archive_status ON task_archive(status, task_type);
+CREATE INDEX IF NOT EXISTS idx_job_checkpoints_task_id ON job_checkpoints(task_id);
+CREATE INDEX IF NOT EXISTS idx_task_state_created_at ON task_state(created_at);
+CREATE INDEX IF NOT EXISTS idx_job_queue_order ON job_queue(claimed_by, priority, pass_value, id);
+
+-- Bump data_versions whenever rows shown by cached API responses change
+CREATE TRIGGER IF NOT EXISTS channels_insert_version AFTER INSERT ON channels
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('channels', 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) VALUES ('channel:' || NEW.id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS channels_update_version AFTER UPDATE ON channels
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('channels', 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) VALUES ('channel:' || NEW.id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS channels_delete_version AFTER DELETE ON channels
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('channels', 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) VALUES ('channel:' || OLD.id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS videos_insert_version AFTER INSERT ON videos
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('videos', 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) VALUES ('channel:' || NEW.channel_id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) VALUES ('video:' || NEW.id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS videos_update_version AFTER UPDATE ON videos
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('videos', 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) VALUES ('channel:' || NEW.channel_id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) VALUES ('video:' || NEW.id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS videos_delete_version AFTER DELETE ON videos
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('videos', 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) VALUES ('channel:' || OLD.channel_id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) VALUES ('video:' || OLD.id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS comments_insert_version AFTER INSERT ON comments
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('video:' || NEW.video_id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS comments_update_version AFTER UPDATE ON comments
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('video:' || NEW.video_id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS comments_delete_version AFTER DELETE ON comments
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('video:' || OLD.video_id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS audio_files_insert_version AFTER INSERT ON audio_files
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('video:' || NEW.video_id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+-- last_accessed and evicted change when audio is read or archived, which no response shows
+CREATE TRIGGER IF NOT EXISTS audio_files_update_version AFTER UPDATE OF file_path, format_type, file_size, download_time ON audio_files
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('video:' || NEW.video_id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS audio_files_delete_version AFTER DELETE ON audio_files
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('video:' || OLD.video_id, 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS transcriptions_insert_version AFTER INSERT ON transcriptions
+BEGIN
+    INSERT INTO data_versions (entity, version) SELECT 'video:' || video_id, 1 FROM audio_files WHERE id = NEW.audio_id
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS transcriptions_update_version AFTER UPDATE ON transcriptions
+BEGIN
+    INSERT INTO data_versions (entity, version) SELECT 'video:' || video_id, 1 FROM audio_files WHERE id = NEW.audio_id
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS transcriptions_delete_version AFTER DELETE ON transcriptions
+BEGIN
+    INSERT INTO data_versions (entity, version) SELECT 'video:' || video_id, 1 FROM audio_files WHERE id = OLD.audio_id
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS content_analysis_insert_version AFTER INSERT ON content_analysis
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('content_analysis', 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) SELECT 'video:' || NEW.video_id, 1 FROM videos WHERE id = NEW.video_id
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS content_analysis_update_version AFTER UPDATE ON content_analysis
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('content_analysis', 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) SELECT 'video:' || NEW.video_id, 1 FROM videos WHERE id = NEW.video_id
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS content_analysis_delete_version AFTER DELETE ON content_analysis
+BEGIN
+    INSERT INTO data_versions (entity, version) VALUES ('content_analysis', 1)
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+    INSERT INTO data_versions (entity, version) SELECT 'video:' || OLD.video_id, 1 FROM videos WHERE id = OLD.video_id
+    ON CONFLICT(entity) DO UPDATE SET version = version + 1;
+END;
@@ -0,0 +1,168 @@
+"""Streaming ffmpeg decoder producing 16 kHz mono float32 PCM."""
+
+import subprocess
+import tempfile
+import threading
+from typing import Iterator, Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 4
+
+
+class AudioDecodeError(Exception):
+    """Raised when ffmpeg cannot decode a file."""
+
+
+def _ffmpeg_command(file_path: str, sample_rate: int, start: Optional[float],
+                    duration: Optional[float]) -> list:
+    """Build the ffmpeg command that writes mono float32 PCM to stdout."""
+    command = ["ffmpeg", "-v", "error"]
+    if file_path != "pipe:0":
+        # stdin only carries audio data; otherwise ffmpeg must not read it
+        command.append("-nostdin")
+    if start:
+        # Seeking before -i skips decoding of the part before start
+        command += ["-ss", f"{start:.3f}"]
+    command += ["-i", file_path]
+    if duration is not None:
+        command += ["-t", f"{duration:.3f}"]
+    command += ["-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "pipe:1"]
+    return command
+
+
+def feed_stdin(process: subprocess.Popen, data) -> threading.Thread:
+    """
+    Write data to a process's stdin from a background thread, then close it.
+
+    Args:
+        process: Process started with stdin=subprocess.PIPE
+        data: Bytes-like object (e.g. a memoryview of a memory map); written without copying
+
+    Returns:
+        The started writer thread
+    """
+    def write() -> None:
+        try:
+            with memoryview(data) as view:
+                for position in range(0, len(view), 1 << 20):
+                    process.stdin.write(view[position:position + (1 << 20)])
+        except (BrokenPipeError, ValueError, OSError):
+            # The process exited or was killed before reading everything
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    thread = threading.Thread(target=write, daemon=True)
+    thread.start()
+    return thread
+
+
+def stream_pcm(file_path: Optional[str], frame_seconds: float = 30.0, sample_rate: int = SAMPLE_RATE,
+               start: Optional[float] = None, duration: Optional[float] = None,
+               data=None) -> Iterator[np.ndarray]:
+    """
+    Decode an audio file into consecutive fixed-size PCM frames.
+
+    ffmpeg writes raw float32 samples to a pipe that is read one frame at a
+    time, so memory use depends on the frame size, not the file length.
+
+    Args:
+        file_path: Path to the audio file (ignored when data is given)
+        frame_seconds: Length of each frame in seconds
+        sample_rate: Output sample rate in Hz
+        start: Offset in seconds to start decoding at
+        duration: Maximum number of seconds to decode
+        data: Encoded audio to decode instead of a file (any bytes-like object)
+
+    Yields:
+        1-D float32 arrays of frame_seconds * sample_rate samples in [-1, 1]; the
+        last frame holds the remaining samples and may be shorter. Frame i starts
+        at (start or 0) + i * frame_seconds seconds of the source.
+
+    Raises:
+        AudioDecodeError: If ffmpeg is missing or fails to decode the file
+    """
+    frame_bytes = int(frame_seconds * sample_rate) * BYTES_PER_SAMPLE
+    if frame_bytes <= 0:
+        raise ValueError("frame_seconds is too small for the sample rate")
+
+    source = "pipe:0" if data is not None else file_path
+
+    # ffmpeg errors go to a temporary file so a chatty stderr can't fill a pipe and stall decoding
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            process = subprocess.Popen(
+                _ffmpeg_command(source, sample_rate, start, duration),
+                stdin=subprocess.PIPE if data is not None else None,
+                stdout=subprocess.PIPE, stderr=stderr, bufsize=frame_bytes
+            )
+        except OSError as e:
+            raise AudioDecodeError(f"Could not start ffmpeg: {e}") from e
+
+        writer = feed_stdin(process, data) if data is not None else None
+
+        try:
+            while True:
+                chunk = _read_exactly(process.stdout, frame_bytes)
+                # Drop a trailing partial sample, which ffmpeg never writes on success
+                usable = len(chunk) - len(chunk) % BYTES_PER_SAMPLE
+                if usable:
+                    # A fresh buffer per frame, so the array can wrap it without a copy
+                    yield np.frombuffer(chunk, dtype="<f4", count=usable // BYTES_PER_SAMPLE)
+                if len(chunk) < frame_bytes:
+                    break
+
+            if process.wait() != 0:
+                stderr.seek(0)
+                message = stderr.read().decode("utf-8", errors="replace").strip()
+                raise AudioDecodeError(f"ffmpeg failed to decode {file_path or 'audio data'}: {message}")
+
+        finally:
+            # Also reached when the consumer stops iterating early
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            process.wait()
+            if writer is not None:
+                writer.join()
+
+
+def _read_exactly(stream, size: int) -> bytearray:
+    """Read size bytes from a pipe, or fewer at end of stream."""
+    buffer = bytearray(size)
+    filled = 0
+    with memoryview(buffer) as view:
+        while filled < size:
+            count = stream.readinto(view[filled:])
+            if not count:
+                break
+            filled += count
+    del buffer[filled:]
+    return buffer
+
+
+def decode_pcm(file_path: str, sample_rate: int = SAMPLE_RATE, start: Optional[float] = None,
+               duration: Optional[float] = None) -> np.ndarray:
+    """
+    Decode (part of) an audio file into a single PCM array.
+
+    Meant for short clips; use stream_pcm for whole videos.
+
+    Args:
+        file_path: Path to the audio file
+        sample_rate: Output sample rate in Hz
+        start: Offset in seconds to start decoding at
+        duration: Maximum number of seconds to decode
+
+    Returns:
+        1-D float32 array of samples
+    """
+    frames = list(stream_pcm(file_path, 30.0, sample_rate, start, duration))
+    if not frames:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(frames)
@@ -0,0 +1,427 @@
+"""Tiered per-channel storage for audio kept after transcription."""
+
+import os
+import mmap
+import argparse
+import subprocess
+import tempfile
+from typing import Dict, Any, Optional, Iterator, Tuple
+
+import numpy as np
+
+from db.db_setup import DatabaseManager
+from modules.audio_decode import stream_pcm, feed_stdin, AudioDecodeError, SAMPLE_RATE
+from modules.process_lock import ProcessLock
+
+HOT = "pcm"
+COLD = "opus"
+PCM_BYTES_PER_SAMPLE = 2
+
+
+class AudioStore:
+    """
+    Keeps transcribed audio in per-channel PCM and Opus containers.
+
+    The hot tier (channel_<id>.pcm) holds 16 kHz int16 PCM read through a
+    memory map; the cold tier (channel_<id>.opus) holds one Ogg Opus stream
+    per recording. Over budget, the least recently used recordings move from
+    hot to cold, and then out of the store. Containers are append-only and
+    rewritten once most of their bytes belong to removed recordings.
+    """
+
+    def __init__(self, db_path: str, root: str = "downloads/store", hot_bytes: Optional[int] = 2 * 1024 ** 3,
+                 max_bytes: Optional[int] = None, opus_bitrate: str = "24k", compact_ratio: float = 0.5):
+        """
+        Initialize the store.
+
+        Args:
+            db_path: Path to SQLite database file
+            root: Folder holding the containers
+            hot_bytes: Budget of the PCM tier in bytes (None keeps all audio as PCM)
+            max_bytes: Budget of the whole store in bytes (None for no limit)
+            opus_bitrate: Bitrate of the Opus tier (ffmpeg syntax, e.g. "24k")
+            compact_ratio: Share of removed bytes at which a container is rewritten
+        """
+        self.db_path = db_path
+        self.root = root
+        self.hot_bytes = hot_bytes
+        self.max_bytes = max_bytes
+        self.opus_bitrate = opus_bitrate
+        self.compact_ratio = compact_ratio
+
+        os.makedirs(root, exist_ok=True)
+
+        # Serializes container writes, also with other processes sharing the store (serve.py);
+        # readers hold it only while opening a memory map
+        self.lock = ProcessLock(os.path.join(root, ".lock"))
+
+    def has(self, audio_id: int) -> bool:
+        """
+        Check whether audio is in the store.
+
+        Args:
+            audio_id: ID of the audio_files row
+
+        Returns:
+            True if the audio can be read with stream_pcm
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            return db.fetchone("SELECT 1 FROM audio_store WHERE audio_id = ?", (audio_id,)) is not None
+        finally:
+            db.close()
+
+    def archive(self, audio_id: int) -> bool:
+        """
+        Move downloaded audio into its channel's PCM container and delete the download.
+
+        Every audio_files row sharing the download is archived with it.
+
+        Args:
+            audio_id: ID of the audio_files row
+
+        Returns:
+            True if the audio is in the store afterwards
+        """
+        with self.lock:
+            db = DatabaseManager(self.db_path)
+            try:
+                if db.fetchone("SELECT 1 FROM audio_store WHERE audio_id = ?", (audio_id,)):
+                    return True
+
+                audio = db.fetchone(
+                    """
+                    SELECT a.file_path, a.checksum, v.channel_id
+                    FROM audio_files a JOIN videos v ON v.id = a.video_id
+                    WHERE a.id = ?
+                    """,
+                    (audio_id,)
+                )
+                if not audio:
+                    return False
+                file_path, checksum, channel_id = audio
+
+                # Identical audio that is already stored is shared instead of stored twice
+                stored = None
+                if checksum:
+                    stored = db.fetchone(
+                        """
+                        SELECT s.codec, s.container, s.byte_offset, s.byte_length, s.sample_count
+                        FROM audio_store s JOIN audio_files a ON a.id = s.audio_id
+                        WHERE a.checksum = ? LIMIT 1
+                        """,
+                        (checksum,)
+                    )
+
+                if stored is None:
+                    if not os.path.exists(file_path):
+                        return False
+                    container = os.path.join(self.root, f"channel_{channel_id}.{HOT}")
+                    try:
+                        offset, length, samples = self._append_pcm(container, file_path)
+                    except AudioDecodeError as e:
+                        print(f"Error archiving audio {audio_id}: {e}")
+                        return False
+                    stored = (HOT, container, offset, length, samples)
+
+                owners = db.fetchall(
+                    """
+                    SELECT id FROM audio_files
+                    WHERE (id = ? OR file_path = ?) AND id NOT IN (SELECT audio_id FROM audio_store)
+                    """,
+                    (audio_id, file_path)
+                )
+                db.execute_many(
+                    """
+                    INSERT INTO audio_store (audio_id, codec, container, byte_offset, byte_length, sample_count)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    [(owner,) + tuple(stored) for (owner,) in owners]
+                )
+
+                # The download is no longer needed; marking it evicted keeps the disk quota accurate
+                db.execute("UPDATE audio_files SET evicted = 1 WHERE file_path = ?", (file_path,))
+                db.get_connection().commit()
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+
+                print(f"Archived audio {audio_id} into {stored[1]} ({stored[3]} bytes)")
+                return True
+            finally:
+                db.close()
+
+    def stream_pcm(self, audio_id: int, frame_seconds: float = 30.0, start: Optional[float] = None,
+                   duration: Optional[float] = None) -> Iterator[np.ndarray]:
+        """
+        Read stored audio as consecutive PCM frames.
+
+        Same contract as modules.audio_decode.stream_pcm, so stored audio can
+        be transcribed like a file.
+
+        Args:
+            audio_id: ID of the audio_files row
+            frame_seconds: Length of each frame in seconds
+            start: Offset in seconds to start reading at
+            duration: Maximum number of seconds to read
+
+        Yields:
+            1-D float32 arrays of 16 kHz samples in [-1, 1]
+
+        Raises:
+            AudioDecodeError: If the audio is not in the store or cannot be decoded
+        """
+        with self.lock:
+            db = DatabaseManager(self.db_path)
+            try:
+                entry = db.fetchone(
+                    "SELECT codec, container, byte_offset, byte_length, sample_count FROM audio_store WHERE audio_id = ?",
+                    (audio_id,)
+                )
+                if not entry:
+                    raise AudioDecodeError(f"Audio {audio_id} is not in the store")
+                db.execute("UPDATE audio_store SET last_accessed = CURRENT_TIMESTAMP WHERE audio_id = ?", (audio_id,))
+                db.get_connection().commit()
+            finally:
+                db.close()
+
+            codec, container, offset, length, sample_count = entry
+            if not length:
+                return
+            # Opened under the lock: a map keeps its data even if compaction replaces the file later
+            if codec == HOT:
+                samples = np.memmap(container, dtype="<i2", mode="r", offset=offset, shape=(sample_count,))
+            else:
+                with open(container, "rb") as f:
+                    encoded = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if codec == HOT:
+            yield from self._read_pcm(samples, frame_seconds, start, duration)
+            return
+
+        view = memoryview(encoded)[offset:offset + length]
+        try:
+            yield from stream_pcm(None, frame_seconds, SAMPLE_RATE, start, duration, data=view)
+        finally:
+            view.release()
+            encoded.close()
+
+    def enforce_retention(self) -> Dict[str, int]:
+        """
+        Bring the store within its budgets.
+
+        Least recently used PCM recordings are transcoded to Opus until the
+        hot tier fits, then least recently used recordings are dropped until
+        the whole store fits. Containers left mostly empty are compacted.
+
+        Returns:
+            Dictionary with the number of recordings "demoted" and "dropped"
+        """
+        counts = {"demoted": 0, "dropped": 0}
+
+        with self.lock:
+            db = DatabaseManager(self.db_path)
+            try:
+                touched = set()
+
+                if self.hot_bytes is not None:
+                    entries = self._entries(db)
+                    hot = sum(length for codec, _, _, length in entries if codec == HOT)
+                    for codec, container, offset, length in entries:
+                        if hot <= self.hot_bytes:
+                            break
+                        if codec != HOT:
+                            continue
+                        try:
+                            self._demote(db, container, offset, length)
+                        except AudioDecodeError as e:
+                            print(f"Error transcoding audio at {container}:{offset}: {e}")
+                            continue
+                        hot -= length
+                        touched.add(container)
+                        counts["demoted"] += 1
+
+                if self.max_bytes is not None:
+                    entries = self._entries(db)
+                    total = sum(length for _, _, _, length in entries)
+                    for _, container, offset, length in entries:
+                        if total <= self.max_bytes:
+                            break
+                        db.execute("DELETE FROM audio_store WHERE container = ? AND byte_offset = ?",
+                                   (container, offset))
+                        total -= length
+                        touched.add(container)
+                        counts["dropped"] += 1
+                    db.get_connection().commit()
+
+                for container in touched:
+                    self._compact(db, container)
+
+                return counts
+            finally:
+                db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarize the store.
+
+        Returns:
+            Dictionary with "recordings", the stored bytes per tier ("pcm_bytes",
+            "opus_bytes") and "disk_bytes" used by the containers
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            entries = self._entries(db)
+            containers = {container for _, container, _, _ in entries}
+            return {
+                "recordings": len(entries),
+                "pcm_bytes": sum(length for codec, _, _, length in entries if codec == HOT),
+                "opus_bytes": sum(length for codec, _, _, length in entries if codec == COLD),
+                "disk_bytes": sum(os.path.getsize(path) for path in containers if os.path.exists(path))
+            }
+        finally:
+            db.close()
+
+    @staticmethod
+    def _read_pcm(samples: np.ndarray, frame_seconds: float, start: Optional[float],
+                  duration: Optional[float]) -> Iterator[np.ndarray]:
+        """Cut float32 frames out of memory-mapped int16 samples."""
+        frame_size = int(frame_seconds * SAMPLE_RATE)
+        if frame_size <= 0:
+            raise ValueError("frame_seconds is too small for the sample rate")
+
+        first = min(int((start or 0.0) * SAMPLE_RATE), len(samples))
+        last = len(samples) if duration is None else min(first + int(duration * SAMPLE_RATE), len(samples))
+
+        for position in range(first, last, frame_size):
+            # Only the slice being converted is paged in
+            yield np.multiply(samples[position:min(position + frame_size, last)], 1.0 / 32768,
+                              dtype=np.float32)
+
+    @staticmethod
+    def _append_pcm(container: str, file_path: str) -> Tuple[int, int, int]:
+        """Decode a file onto the end of a PCM container; returns (offset, length, samples)."""
+        with open(container, "ab") as out:
+            offset = out.tell()
+            samples = 0
+            try:
+                for frame in stream_pcm(file_path, 30.0):
+                    pcm = (np.clip(frame, -1.0, 1.0) * 32767).astype("<i2")
+                    out.write(pcm)
+                    samples += len(pcm)
+            except BaseException:
+                # Leave no partial recording behind
+                out.truncate(offset)
+                raise
+        return offset, samples * PCM_BYTES_PER_SAMPLE, samples
+
+    def _demote(self, db: DatabaseManager, container: str, offset: int, length: int) -> None:
+        """Transcode one PCM recording to the end of the channel's Opus container."""
+        target = os.path.splitext(container)[0] + f".{COLD}"
+        command = ["ffmpeg", "-v", "error", "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1",
+                   "-i", "pipe:0", "-c:a", "libopus", "-b:a", self.opus_bitrate,
+                   "-application", "voip", "-f", "ogg", "pipe:1"]
+
+        with open(container, "rb") as source, open(target, "ab") as out, tempfile.TemporaryFile() as stderr:
+            target_offset = out.tell()
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as pcm:
+                view = memoryview(pcm)[offset:offset + length]
+                try:
+                    try:
+                        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=out, stderr=stderr)
+                    except OSError as e:
+                        raise AudioDecodeError(f"Could not start ffmpeg: {e}") from e
+                    writer = feed_stdin(process, view)
+                    returncode = process.wait()
+                    writer.join()
+                finally:
+                    view.release()
+
+            if returncode != 0:
+                out.truncate(target_offset)
+                stderr.seek(0)
+                message = stderr.read().decode("utf-8", errors="replace").strip()
+                raise AudioDecodeError(f"ffmpeg failed to encode Opus: {message}")
+
+            out.seek(0, os.SEEK_END)
+            target_length = out.tell() - target_offset
+
+        db.execute(
+            """
+            UPDATE audio_store SET codec = ?, container = ?, byte_offset = ?, byte_length = ?
+            WHERE container = ? AND byte_offset = ?
+            """,
+            (COLD, target, target_offset, target_length, container, offset)
+        )
+        db.get_connection().commit()
+
+    def _compact(self, db: DatabaseManager, container: str) -> None:
+        """Rewrite a container without the bytes of removed recordings (caller holds the lock)."""
+        if not os.path.exists(container):
+            return
+
+        ranges = db.fetchall(
+            """
+            SELECT byte_offset, MAX(byte_length) FROM audio_store
+            WHERE container = ? GROUP BY byte_offset ORDER BY byte_offset
+            """,
+            (container,)
+        )
+        size = os.path.getsize(container)
+        live = sum(length for _, length in ranges)
+        if size == 0 or (size - live) / size < self.compact_ratio:
+            return
+
+        if not ranges:
+            os.remove(container)
+            print(f"Removed empty container {container}")
+            return
+
+        temp_path = f"{container}.compact"
+        moves = []
+        with open(container, "rb") as source, open(temp_path, "wb") as out:
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                with memoryview(data) as view:
+                    for offset, length in ranges:
+                        moves.append((out.tell(), offset))
+                        out.write(view[offset:offset + length])
+
+        # Ranges only move towards the start, so updating in order never hits a range not yet moved
+        db.execute_many(
+            "UPDATE audio_store SET byte_offset = ? WHERE container = ? AND byte_offset = ?",
+            [(new_offset, container, old_offset) for new_offset, old_offset in moves]
+        )
+        os.replace(temp_path, container)
+        print(f"Compacted {container} from {size} to {live} bytes")
+
+    @staticmethod
+    def _entries(db: DatabaseManager) -> list:
+        """Stored recordings as (codec, container, offset, length), least recently used first."""
+        return db.fetchall(
+            """
+            SELECT codec, container, byte_offset, MAX(byte_length)
+            FROM audio_store
+            GROUP BY container, byte_offset
+            ORDER BY MAX(last_accessed) ASC
+            """
+        )
+
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Archive transcribed audio and apply the storage budgets')
+    parser.add_argument('--audio', type=int, nargs='*', default=[], help='IDs of audio files to archive')
+    parser.add_argument('--db', type=str, default='db/youtube_analysis.db', help='Path to SQLite database file')
+    parser.add_argument('--root', type=str, default='downloads/store', help='Folder holding the containers')
+    parser.add_argument('--hot-gb', type=float, default=2.0, help='Budget of the PCM tier in GB')
+    parser.add_argument('--max-gb', type=float, default=0, help='Budget of the whole store in GB (0 for no limit)')
+
+    args = parser.parse_args()
+
+    store = AudioStore(args.db, args.root, hot_bytes=int(args.hot_gb * 1024 ** 3),
+                       max_bytes=int(args.max_gb * 1024 ** 3) if args.max_gb > 0 else None)
+    for audio_id in args.audio:
+        store.archive(audio_id)
+    print(store.enforce_retention())
+    print(store.stats())
@@ -0,0 +1,220 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Optional, Iterator
+
+
+class BrowserLease:
+    """A pooled browser checked out by one worker."""
+
+    def __init__(self, lease_id: int, driver: Any):
+        self.lease_id = lease_id
+        self.driver = driver
+        self.pages = 0  # Page loads since the browser was started
+        self.created_at = time.monotonic()
+        self.broken = False
+
+
+class BrowserPool:
+    """
+    Bounded pool of warm headless Chrome instances shared by pipeline workers.
+
+    Workers check a browser out for the duration of one scraper call and
+    check it back in afterwards, so browser startup is paid once per pooled
+    instance instead of once per task. At most `size` browsers exist at any
+    time; checkouts block when all of them are busy. Browsers are health
+    checked on checkout and recycled after max_pages page loads or when the
+    page's JS heap grows past max_memory_mb, which keeps total RAM capped.
+    """
+
+    def __init__(self, size: int = 2, headless: bool = True, max_pages: int = 200,
+                 max_memory_mb: float = 1024.0, driver_factory: Optional[Callable[[], Any]] = None,
+                 lightweight: bool = True):
+        """
+        Initialize the browser pool.
+
+        Args:
+            size: Maximum number of browsers alive at once
+            headless: Whether to run Chrome in headless mode
+            max_pages: Page loads after which a browser is restarted
+            max_memory_mb: JS heap size (MB) after which a browser is restarted
+            driver_factory: Callable creating a new WebDriver (defaults to the scraper's Chrome setup)
+            lightweight: Whether the default factory uses the lightweight scraping profile
+        """
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+
+        if driver_factory is None:
+            from modules.scrape import YouTubeChannelScraper
+            driver_factory = lambda: YouTubeChannelScraper.create_driver(headless, lightweight)
+        self.driver_factory = driver_factory
+
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.total = 0
+        self.next_id = 1
+        self.closed = False
+        self.recycled = 0
+
+    def warm(self, count: Optional[int] = None) -> None:
+        """
+        Start browsers ahead of time so the first jobs don't pay startup cost.
+
+        Args:
+            count: Number of browsers to start (defaults to the pool size)
+        """
+        count = min(count if count is not None else self.size, self.size)
+        leases = []
+        try:
+            for _ in range(count):
+                leases.append(self.checkout(timeout=0))
+        except TimeoutError:
+            pass
+        finally:
+            for lease in leases:
+                self.checkin(lease)
+
+    def checkout(self, timeout: Optional[float] = None) -> BrowserLease:
+        """
+        Take a healthy browser from the pool, starting one if under capacity.
+
+        Args:
+            timeout: Maximum seconds to wait for a free browser (None waits forever)
+
+        Returns:
+            Browser lease
+
+        Raises:
+            TimeoutError: If no browser became available in time
+            RuntimeError: If the pool is closed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self.condition:
+                while not self.idle and self.total >= self.size and not self.closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No browser available in the pool")
+                    self.condition.wait(remaining)
+
+                if self.closed:
+                    raise RuntimeError("Browser pool is closed")
+
+                if self.idle:
+                    lease = self.idle.popleft()
+                else:
+                    # Reserve a slot, then start the browser outside the lock
+                    lease = None
+                    self.total += 1
+                    lease_id = self.next_id
+                    self.next_id += 1
+
+            if lease is None:
+                try:
+                    return BrowserLease(lease_id, self.driver_factory())
+                except Exception:
+                    with self.condition:
+                        self.total -= 1
+                        self.condition.notify()
+                    raise
+
+            if self._is_healthy(lease):
+                return lease
+
+            # Crashed or hung browser: replace it and try again
+            self._discard(lease)
+
+    def checkin(self, lease: BrowserLease) -> None:
+        """
+        Return a browser to the pool, recycling it if it is worn out.
+
+        Args:
+            lease: Lease returned by checkout
+        """
+        if lease.broken or self.closed or self._needs_recycling(lease):
+            self._discard(lease)
+            return
+
+        with self.condition:
+            self.idle.append(lease)
+            self.condition.notify()
+
+    @contextmanager
+    def browser(self, timeout: Optional[float] = None) -> Iterator[BrowserLease]:
+        """
+        Context manager around checkout/checkin.
+
+        Args:
+            timeout: Maximum seconds to wait for a free browser
+
+        Yields:
+            Browser lease
+        """
+        lease = self.checkout(timeout)
+        try:
+            yield lease
+        finally:
+            self.checkin(lease)
+
+    def close(self) -> None:
+        """Quit all idle browsers and refuse further checkouts."""
+        with self.condition:
+            self.closed = True
+            idle = list(self.idle)
+            self.idle.clear()
+            self.condition.notify_all()
+
+        for lease in idle:
+            self._discard(lease)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage statistics.
+
+        Returns:
+            Dictionary with pool size, live, idle and recycled browser counts
+        """
+        with self.condition:
+            return {
+                "size": self.size,
+                "alive": self.total,
+                "idle": len(self.idle),
+                "in_use": self.total - len(self.idle),
+                "recycled": self.recycled
+            }
+
+    def _is_healthy(self, lease: BrowserLease) -> bool:
+        """Check that a browser still responds."""
+        try:
+            return lease.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _needs_recycling(self, lease: BrowserLease) -> bool:
+        """Check whether a browser hit its page or memory ceiling."""
+        if lease.pages >= self.max_pages:
+            return True
+
+        try:
+            heap = lease.driver.execute_script(
+                "return performance.memory ? performance.memory.usedJSHeapSize : 0"
+            ) or 0
+        except Exception:
+            return True
+
+        return heap / (1024 * 1024) > self.max_memory_mb
+
+    def _discard(self, lease: BrowserLease) -> None:
+        """Quit a browser and free its slot."""
+        try:
+            lease.driver.quit()
+        except Exception as e:
+            print(f"Error closing pooled browser {lease.lease_id}: {e}")
+
+        with self.condition:
+            self.total -= 1
+            self.recycled += 1
+            self.condition.notify()
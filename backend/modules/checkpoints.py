@@ -0,0 +1,172 @@
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+from db.db_setup import DatabaseManager
+
+
+class JobCheckpointer:
+    """
+    Persists queued jobs and per-video progress so work survives restarts.
+
+    Every API task is recorded in pending_jobs when it is queued and removed
+    once it finishes. Channel tasks additionally record the videos found by
+    discovery and a checkpoint per completed video in job_checkpoints, so a
+    resumed channel task only re-queues the videos that never completed.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the checkpointer.
+
+        Args:
+            db_path: Path to SQLite database file
+        """
+        self.db_path = db_path
+
+    def save_job(self, task_id: str, job: Dict[str, Any], priority: int,
+                 fair_key: Optional[str], record: Dict[str, Any]) -> None:
+        """
+        Record a queued job.
+
+        Args:
+            task_id: Task ID
+            job: Job dictionary as put on the queue
+            priority: Job queue priority class
+            fair_key: Job queue fair key
+            record: Task record shown by the API
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            db.execute(
+                """
+                INSERT OR REPLACE INTO pending_jobs (task_id, job, priority, fair_key, record)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (task_id, json.dumps(job, ensure_ascii=False), priority, fair_key,
+                 json.dumps(record, ensure_ascii=False))
+            )
+            db.get_connection().commit()
+        finally:
+            db.close()
+
+    def save_discovery(self, task_id: str, results: Dict[str, Any], video_ids: List[int]) -> None:
+        """
+        Record the outcome of a channel task's discovery step.
+
+        Args:
+            task_id: Task ID
+            results: Channel results from discover_channel_videos (without video_ids)
+            video_ids: Database IDs of the videos to process
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            conn = db.get_connection()
+            conn.execute(
+                "UPDATE pending_jobs SET state = ? WHERE task_id = ?",
+                (json.dumps(results, ensure_ascii=False), task_id)
+            )
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO job_checkpoints (task_id, video_id, stage)
+                VALUES (?, ?, 'discovered')
+                """,
+                [(task_id, video_id) for video_id in video_ids]
+            )
+            conn.commit()
+        finally:
+            db.close()
+
+    def complete_video(self, task_id: str, video_id: int, video_results: Dict[str, Any]) -> None:
+        """
+        Record that a channel task finished processing one video.
+
+        Args:
+            task_id: Task ID
+            video_id: Database ID of the video
+            video_results: Results from process_channel_video
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            db.execute(
+                """
+                INSERT OR REPLACE INTO job_checkpoints (task_id, video_id, stage, result)
+                VALUES (?, ?, 'completed', ?)
+                """,
+                (task_id, video_id, json.dumps(video_results, ensure_ascii=False))
+            )
+            db.get_connection().commit()
+        finally:
+            db.close()
+
+    def load_discovery(self, task_id: str) -> Optional[Tuple[Dict[str, Any], List[int], List[Dict[str, Any]]]]:
+        """
+        Load the checkpointed state of a channel task.
+
+        Args:
+            task_id: Task ID
+
+        Returns:
+            Tuple of (channel results, video IDs still to process, results of
+            completed videos), or None if discovery never finished
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            row = db.fetchone("SELECT state FROM pending_jobs WHERE task_id = ?", (task_id,))
+            if not row or not row[0]:
+                return None
+
+            checkpoints = db.fetchall(
+                "SELECT video_id, stage, result FROM job_checkpoints WHERE task_id = ? ORDER BY id",
+                (task_id,)
+            )
+        finally:
+            db.close()
+
+        completed = {video_id: json.loads(result) for video_id, stage, result in checkpoints
+                     if stage == "completed"}
+        remaining = [video_id for video_id, stage, _ in checkpoints
+                     if stage == "discovered" and video_id not in completed]
+
+        return json.loads(row[0]), remaining, list(completed.values())
+
+    def remove_job(self, task_id: str) -> None:
+        """
+        Forget a finished job and its checkpoints.
+
+        Args:
+            task_id: Task ID
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            conn = db.get_connection()
+            conn.execute("DELETE FROM job_checkpoints WHERE task_id = ?", (task_id,))
+            conn.execute("DELETE FROM pending_jobs WHERE task_id = ?", (task_id,))
+            conn.commit()
+        finally:
+            db.close()
+
+    def pending_jobs(self) -> List[Dict[str, Any]]:
+        """
+        Get jobs that were queued or running when the server last stopped.
+
+        Returns:
+            List of dictionaries with "task_id", "job", "priority", "fair_key" and "record"
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            rows = db.fetchall(
+                "SELECT task_id, job, priority, fair_key, record FROM pending_jobs ORDER BY created_at"
+            )
+        finally:
+            db.close()
+
+        return [
+            {
+                "task_id": row[0],
+                "job": json.loads(row[1]),
+                "priority": row[2],
+                "fair_key": row[3],
+                "record": json.loads(row[4])
+            }
+            for row in rows
+        ]
@@ -0,0 +1,288 @@
+"""HTTP-only crawler for YouTube's paged lists (channel videos and comments)."""
+
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.yt_initial_data import (
+    extract_initial_data, extract_ytcfg, extract_continuation_token,
+    parse_video_renderers, find_key, first_key, get_text
+)
+
+
+class RequestsTransport:
+    """Transport backed by a pooled requests.Session."""
+
+    def __init__(self, session: Optional[requests.Session] = None, headers: Optional[Dict[str, str]] = None,
+                 timeout: float = 10.0, pool_size: int = 10):
+        """
+        Initialize the transport.
+
+        Args:
+            session: Session to use (a new one is created if None)
+            headers: Default headers sent with every request
+            timeout: Request timeout in seconds
+            pool_size: Maximum number of kept-alive connections per host
+        """
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def get_text(self, url: str, headers: Optional[Dict[str, str]] = None) -> str:
+        """
+        GET a page.
+
+        Args:
+            url: Page URL
+            headers: Extra request headers
+
+        Returns:
+            Response body as text
+
+        Raises:
+            requests.RequestException: If the request failed
+        """
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def post_json(self, url: str, payload: Dict[str, Any],
+                  headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        POST a JSON payload and decode the JSON response.
+
+        Args:
+            url: Endpoint URL
+            payload: JSON-serializable request body
+            headers: Extra request headers
+
+        Returns:
+            Decoded response
+
+        Raises:
+            requests.RequestException: If the request failed
+        """
+        response = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
+
+class ContinuationCrawler:
+    """
+    Pages through channel video lists and video comments over plain HTTP.
+
+    The first page comes from the page's ytInitialData; later pages are
+    fetched by posting its continuation token to youtubei/v1/browse (channel
+    tabs) or youtubei/v1/next (comments) with the page's ytcfg key and client
+    context. No browser is involved.
+    """
+
+    def __init__(self, transport: Optional[Any] = None, base_url: str = "https://www.youtube.com",
+                 max_pages: int = 100):
+        """
+        Initialize the crawler.
+
+        Args:
+            transport: Object with get_text(url, headers) and post_json(url, payload, headers)
+                       (defaults to a RequestsTransport)
+            base_url: Scheme and host requests are sent to
+            max_pages: Maximum number of continuation requests per list
+        """
+        self.transport = transport or RequestsTransport()
+        self.base_url = base_url.rstrip("/")
+        self.max_pages = max_pages
+
+    def channel_videos(self, channel_url: str, max_videos: int = 20) -> Optional[List[Dict[str, Any]]]:
+        """
+        List a channel's videos, newest first.
+
+        Args:
+            channel_url: URL of the YouTube channel
+            max_videos: Maximum number of videos to return
+
+        Returns:
+            List of dictionaries with the same fields as YouTubeChannelScraper.get_channel_videos,
+            or None if the videos tab could not be read
+        """
+        html = self._get_page(f"{self._path(channel_url)}/videos")
+        initial_data = extract_initial_data(html) if html else None
+        if not initial_data:
+            return None
+
+        videos = parse_video_renderers(initial_data)
+        token = extract_continuation_token(initial_data)
+        client = self._client(html)
+
+        pages = 0
+        while token and len(videos) < max_videos and pages < self.max_pages and client:
+            response = self._post("browse", client, token)
+            if response is None:
+                break
+
+            items = self._continuation_items(response)
+            videos.extend(parse_video_renderers(items))
+            token = self._next_token(items)
+            pages += 1
+
+        return videos[:max_videos]
+
+    def video_comments(self, video_url: str, max_comments: int = 20) -> Optional[List[Dict[str, Any]]]:
+        """
+        List a video's top-level comments in the default (top comments) order.
+
+        Args:
+            video_url: URL of the YouTube video
+            max_comments: Maximum number of comments to return
+
+        Returns:
+            List of dictionaries with the same fields as YouTubeChannelScraper.get_video_comments,
+            or None if the comment section could not be read
+        """
+        html = self._get_page(self._path(video_url))
+        initial_data = extract_initial_data(html) if html else None
+        client = self._client(html) if html else None
+        if not initial_data or not client:
+            return None
+
+        token = None
+        for section in find_key(initial_data, "itemSectionRenderer"):
+            if section.get("sectionIdentifier") == "comment-item-section":
+                token = extract_continuation_token(section)
+                break
+
+        if token is None:
+            # Comments are disabled or the layout changed
+            return None
+
+        comments: List[Dict[str, Any]] = []
+        pages = 0
+        while token and len(comments) < max_comments and pages < self.max_pages:
+            response = self._post("next", client, token)
+            if response is None:
+                break
+
+            items = self._continuation_items(response)
+            comments.extend(self._parse_comments(items, response))
+            token = self._next_token(items)
+            pages += 1
+
+        return comments[:max_comments]
+
+    def _path(self, url: str) -> str:
+        """Rebase a YouTube URL onto base_url."""
+        parts = urlsplit(url)
+        path = parts.path.rstrip("/")
+        return f"{self.base_url}{path}" + (f"?{parts.query}" if parts.query else "")
+
+    def _get_page(self, url: str) -> Optional[str]:
+        """Fetch a page, returning None on failure."""
+        try:
+            return self.transport.get_text(url)
+        except requests.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+
+    def _client(self, html: str) -> Optional[Tuple[str, Dict[str, Any], Dict[str, str]]]:
+        """Get the API key, client context and client headers from a page's ytcfg."""
+        config = extract_ytcfg(html)
+        api_key = config.get("INNERTUBE_API_KEY")
+        context = config.get("INNERTUBE_CONTEXT")
+        if not api_key or not context:
+            return None
+
+        headers = {}
+        if config.get("INNERTUBE_CONTEXT_CLIENT_NAME"):
+            headers["X-YouTube-Client-Name"] = str(config["INNERTUBE_CONTEXT_CLIENT_NAME"])
+        if config.get("INNERTUBE_CLIENT_VERSION"):
+            headers["X-YouTube-Client-Version"] = config["INNERTUBE_CLIENT_VERSION"]
+
+        return api_key, context, headers
+
+    def _post(self, endpoint: str, client: Tuple[str, Dict[str, Any], Dict[str, str]],
+              token: str) -> Optional[Dict[str, Any]]:
+        """Request the next page of a list."""
+        api_key, context, headers = client
+        url = f"{self.base_url}/youtubei/v1/{endpoint}?key={api_key}&prettyPrint=false"
+
+        try:
+            return self.transport.post_json(url, {"context": context, "continuation": token}, headers)
+        except (requests.RequestException, ValueError) as e:
+            print(f"Error fetching continuation from {endpoint}: {e}")
+            return None
+
+    @staticmethod
+    def _continuation_items(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Get the list items appended (or reloaded) by a continuation response."""
+        items = []
+        for key in ("onResponseReceivedEndpoints", "onResponseReceivedActions"):
+            for action in response.get(key, []):
+                for command in ("appendContinuationItemsAction", "reloadContinuationItemsCommand"):
+                    items.extend(action.get(command, {}).get("continuationItems", []))
+        return items
+
+    @staticmethod
+    def _next_token(items: List[Dict[str, Any]]) -> Optional[str]:
+        """Get the token for the next page from the list's trailing continuation item."""
+        for item in reversed(items):
+            if "continuationItemRenderer" in item:
+                return first_key(item["continuationItemRenderer"], "token")
+        return None
+
+    @staticmethod
+    def _parse_comments(items: List[Dict[str, Any]], response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Parse the comment threads in a page of continuation items."""
+        # Newer responses keep comment contents in entity payloads keyed by comment ID
+        entities = {}
+        for payload in find_key(response.get("frameworkUpdates", {}), "commentEntityPayload"):
+            comment_id = payload.get("properties", {}).get("commentId")
+            if comment_id:
+                entities[comment_id] = payload
+
+        comments = []
+        for item in items:
+            thread = item.get("commentThreadRenderer")
+            if not thread:
+                continue
+
+            renderer = first_key(thread.get("comment", {}), "commentRenderer")
+            if renderer:
+                comments.append({
+                    "author": (get_text(renderer.get("authorText")) or "").strip(),
+                    "text": (get_text(renderer.get("contentText")) or "").strip(),
+                    "likes": (get_text(renderer.get("voteCount")) or "").strip() or "0",
+                    "date": get_text(renderer.get("publishedTimeText")) or "Unknown",
+                    "is_verified": "authorCommentBadge" in renderer,
+                    "is_pinned": "pinnedCommentBadge" in renderer
+                })
+                continue
+
+            # The view model is wrapped as {"commentViewModel": {"commentViewModel": {...}}}
+            view_model = thread.get("commentViewModel", {})
+            view_model = view_model.get("commentViewModel", view_model)
+            payload = entities.get(view_model.get("commentId"))
+            if not payload:
+                continue
+
+            properties = payload.get("properties", {})
+            author = payload.get("author", {})
+            comments.append({
+                "author": author.get("displayName", "").strip(),
+                "text": get_text(properties.get("content")) or "",
+                "likes": payload.get("toolbar", {}).get("likeCountNotliked", "").strip() or "0",
+                "date": properties.get("publishedTime") or "Unknown",
+                "is_verified": bool(author.get("isCreator")),
+                "is_pinned": bool(view_model.get("pinnedText"))
+            })
+
+        return comments
@@ -1,40 +1,63 @@
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable, ContextManager, Deque
 import json
 import time
 import os
 from datetime import datetime
 import traceback
+from contextlib import nullcontext
 import re
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
 
 # Import our database manager
 from db.db_setup import DatabaseManager
 
 # Import the original modules
 from modules.scrape import YouTubeChannelScraper
+from modules.fetcher import ConcurrentFetcher
 from modules.detect import VietnameseDangerousContentDetector
 from utils import get_filename_without_extension
 
 class ChannelManager:
     """Manages YouTube channel data and operations."""
     
-    def __init__(self, db_path: str, headless: bool = True):
+    def __init__(self, db_path: str, headless: bool = True, browser_pool=None, page_cache=None,
+                 fetcher: Optional[ConcurrentFetcher] = None):
         """
         Initialize the channel manager.
         
         Args:
             db_path: Path to SQLite database file
             headless: Whether to run Chrome in headless mode
+            browser_pool: Optional BrowserPool shared between workers
+            page_cache: Optional PageCache for fetched pages (see YouTubeChannelScraper)
+            fetcher: Optional ConcurrentFetcher shared between workers, so its per-host
+                     caps and rate limit apply to all of them (a private one if None)
         """
         self.db = DatabaseManager(db_path)
-        self.scraper = YouTubeChannelScraper(headless=headless)
+        self.scraper = YouTubeChannelScraper(headless=headless, pool=browser_pool, page_cache=page_cache)
+        # Fetches video details and comments under per-host and rate limits
+        self.owns_fetcher = fetcher is None
+        self.fetcher = fetcher or ConcurrentFetcher()
+        # Called with (stage, count) as work completes, e.g. ("comments_scraped", 20)
+        self.progress_callback: Optional[Callable[[str, int], None]] = None
     
     def close(self):
         """Close resources."""
+        if self.fetcher and self.owns_fetcher:
+            self.fetcher.close()
         if self.scraper:
             self.scraper.close()
         if self.db:
             self.db.close()
     
+    def _report_progress(self, stage: str, count: int) -> None:
+        """Report pipeline progress to the registered callback, if any."""
+        if self.progress_callback and count:
+            self.progress_callback(stage, count)
+    
     def add_channel(self, channel_input: str) -> Optional[int]:
         """
         Add a YouTube channel to the database.
@@ -77,7 +100,8 @@ class ChannelManager:
                         "description": channel_info["description"],
                         "url": channel_info["url"],
                         "thumbnail": channel_info["thumbnail"],
-                        "scrape_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        # UTC, like the CURRENT_TIMESTAMP default of new channels
+                        "scrape_time": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
                     },
                     "id = ?",
                     (channel_id,)
@@ -137,17 +161,33 @@ class ChannelManager:
             # Initialize content detector
             detector = VietnameseDangerousContentDetector()
             
-            # Add each video to the database
+            # Check which videos already exist
+            existing_ids = {}
             for video in videos:
-                # Check if video already exists
                 existing = self.db.fetchone(
                     "SELECT id FROM videos WHERE video_id = ?", 
                     (video["video_id"],)
                 )
+                if existing:
+                    existing_ids[video["video_id"]] = existing[0]
+            
+            # Get detailed information for all new videos at once
+            new_videos = [video for video in videos if video["video_id"] not in existing_ids]
+            details = self.fetcher.map(
+                self.scraper.get_video_details,
+                [video["url"] for video in new_videos],
+                default={},
+                is_failure=lambda d: d.get("title") == "Unknown"
+            )
+            details_by_id = {video["video_id"]: d for video, d in zip(new_videos, details)}
+            
+            # Add each video to the database
+            for video in videos:
+                existing = existing_ids.get(video["video_id"])
                 
                 if existing:
                     # Video exists, update it
-                    video_db_id = existing[0]
+                    video_db_id = existing
                     self.db.update(
                         "videos",
                         {
@@ -159,11 +199,12 @@ class ChannelManager:
                         (video_db_id,)
                     )
                 else:
-                    # Get detailed video information
-                    video_details = self.scraper.get_video_details(video["url"])
+                    # Detailed video information fetched above
+                    video_details = details_by_id[video["video_id"]]
                     
                     # Analyze the video title for dangerous content
                     title_analysis = detector.analyze_title(video["title"])
+                    self._report_progress("texts_analysed", 1)
                     
                     # Insert new video
                     video_db_id = self.db.insert("videos", {
@@ -229,8 +270,14 @@ class ChannelManager:
             
             video_url = video_data[0]
             
-            # Scrape comments
-            comments = self.scraper.get_video_comments(video_url, max_comments)
+            # Scrape comments through the fetcher so they count against its host and rate limits;
+            # the scraper returns no comments when the page failed to load, so retry empty results
+            comments = self.fetcher.fetch(
+                lambda url: self.scraper.get_video_comments(url, max_comments),
+                video_url,
+                is_failure=lambda c: not c
+            )
+            self._report_progress("comments_scraped", len(comments))
             
             # Initialize content detector
             detector = VietnameseDangerousContentDetector()
@@ -238,6 +285,7 @@ class ChannelManager:
             # Analyze all comments together
             if comments:
                 comment_analysis = detector.analyze_comments(comments)
+                self._report_progress("texts_analysed", len(comments))
                 
                 # If dangerous content found in comments, store the analysis
                 if comment_analysis["is_dangerous"]:
@@ -276,18 +324,32 @@ class ChannelManager:
 class VideoProcessor:
     """Manages processing of YouTube videos (downloading, transcription, analysis)."""
     
-    def __init__(self, db_path: str, output_folder: str = "downloads"):
+    # Share of a re-upload's duration its original must cover for the transcription to be reused
+    REUSE_COVERAGE = 0.9
+    
+    def __init__(self, db_path: str, output_folder: str = "downloads", downloader=None,
+                 transcriber=None, fingerprints=None, audio_store=None):
         """
         Initialize the video processor.
         
         Args:
             db_path: Path to SQLite database file
             output_folder: Folder to store downloaded files
+            downloader: Optional AudioDownloader; audio is only downloaded when one is given
+            transcriber: Optional TranscriptionEngine; audio is only transcribed when one is given
+            fingerprints: Optional FingerprintIndex; re-uploaded audio then reuses the
+                          transcription and analysis of its earlier copy
+            audio_store: Optional AudioStore; transcribed audio is then moved into it
+                         and transcribed again from it when needed
         """
         self.db_path = db_path
         self.db = DatabaseManager(db_path)
         self.output_folder = output_folder
         self.detector = VietnameseDangerousContentDetector()
+        self.downloader = downloader
+        self.transcriber = transcriber
+        self.fingerprints = fingerprints
+        self.audio_store = audio_store
         
         # Create output folder if it doesn't exist
         os.makedirs(output_folder, exist_ok=True)
@@ -296,6 +358,545 @@ class VideoProcessor:
         """Close resources."""
         if self.db:
             self.db.close()
+    
+    def download_audio(self, video_db_id: int) -> Optional[int]:
+        """
+        Download the audio of a video (reusing a stored copy if there is one).
+        
+        Args:
+            video_db_id: Database ID of the video
+            
+        Returns:
+            ID of the audio_files row, or None if downloading is disabled or failed
+        """
+        if self.downloader is None:
+            return None
+        return self.downloader.download(video_db_id)
+    
+    def audio_in_use(self, video_db_id: int) -> ContextManager:
+        """
+        Keep a video's audio from quota eviction while it is downloaded and transcribed.
+        
+        Args:
+            video_db_id: Database ID of the video
+            
+        Returns:
+            Context manager pinning the audio (does nothing if downloading is disabled)
+        """
+        if self.downloader is None:
+            return nullcontext()
+        return self.downloader.pinned(video_db_id)
+    
+    def analyze_transcription(self, transcription_id: int, min_severity: int = 1,
+                              batch_size: int = 16) -> Dict[str, Any]:
+        """
+        Analyze a transcription segment by segment.
+        
+        Only segments without an analysis by the current detector model are
+        run through the model, so re-analysis after a model change (or after
+        an interrupted run) never re-transcribes and skips finished segments.
+        Hate spans are mapped to timestamps by their position in the segment.
+        The per-segment verdicts are then summarized into the transcription's
+        content_analysis row.
+        
+        Args:
+            transcription_id: ID of the transcriptions row
+            min_severity: Minimum severity level for content analysis
+            batch_size: Number of segments per model call
+            
+        Returns:
+            Summary with "is_dangerous", "highest_severity", "segments_analyzed"
+            and "dangerous_segments"
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            model_name = self.detector.model_name
+            pending = db.fetchall(
+                """
+                SELECT id, start_time, end_time, text FROM transcript_segments
+                WHERE transcription_id = ? AND (analysis_model IS NULL OR analysis_model != ?)
+                ORDER BY segment_index
+                """,
+                (transcription_id, model_name)
+            )
+            
+            if pending:
+                analyses = self.detector.analyze_batch(
+                    [text for _, _, _, text in pending], min_severity, batch_size
+                )
+                
+                db.execute_many(
+                    """
+                    UPDATE transcript_segments
+                    SET is_dangerous = ?, highest_severity = ?, hate_spans = ?,
+                        analysis_model = ?, analysis_time = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                    """,
+                    [(analysis["is_dangerous"], analysis["highest_severity"],
+                      json.dumps(self._timed_spans(start, end, text, analysis["hate_spans"]),
+                                 ensure_ascii=False),
+                      model_name, segment_id)
+                     for (segment_id, start, end, text), analysis in zip(pending, analyses)]
+                )
+            
+            summary = self._write_transcription_verdict(db, transcription_id)
+            summary["segments_analyzed"] = len(pending)
+            
+            return summary
+            
+        except Exception as e:
+            error_msg = f"Error analyzing transcription: {e}\n{traceback.format_exc()}"
+            print(error_msg)
+            return {"error": str(e)}
+        finally:
+            db.close()
+    
+    def stream_transcription(self, audio_id: int, min_severity: int = 1,
+                             on_progress: Optional[Callable[[str, int], None]] = None,
+                             chunk_queue_size: int = 4, detect_batch_size: int = 8) -> Dict[str, Any]:
+        """
+        Transcribe audio and analyze it as a stream, with the stages overlapping.
+        
+        Three stages run at once, connected by bounded queues: a decoder thread
+        turns the file into model-sized chunks, a transcriber thread submits
+        chunks to the engine as soon as they arrive (where they are batched with
+        the chunks of other videos) and stores the segments, and the calling thread
+        analyzes segments as soon as they are transcribed. Each segment and its
+        analysis is written to the database when it is produced, and the
+        transcription's verdict is updated whenever a dangerous segment is
+        found, so the first flag of a long video shows up after its first
+        chunk instead of after the whole file.
+        
+        A transcription left unfinished by a failed or interrupted run is
+        resumed: its segments are kept and decoding continues after the last
+        one. Segments without an analysis (from that run, or whose detection
+        failed in this one) are analyzed when the stream ends.
+        
+        Args:
+            audio_id: ID of the audio_files row
+            min_severity: Minimum severity level for content analysis
+            on_progress: Optional callback receiving (stage, count) for
+                         'texts_analysed' and 'segments_flagged'
+            chunk_queue_size: Decoded chunks buffered ahead of the transcriber
+            detect_batch_size: Maximum segments per detector call
+            
+        Returns:
+            Summary as returned by analyze_transcription, plus "transcription_id"
+            (empty if transcription is disabled)
+        """
+        if self.transcriber is None:
+            return {}
+        
+        db = DatabaseManager(self.db_path)
+        try:
+            # Audio transcribed before only needs its segments (re-)analyzed
+            existing = db.fetchone(
+                "SELECT id FROM transcriptions WHERE audio_id = ? AND success = 1 ORDER BY id DESC LIMIT 1",
+                (audio_id,)
+            )
+            if existing:
+                summary = self.analyze_transcription(existing[0], min_severity)
+                summary["transcription_id"] = existing[0]
+                if on_progress:
+                    on_progress("texts_analysed", summary.get("segments_analyzed", 0))
+                return summary
+            
+            # Continue an unfinished transcription instead of starting a second one
+            unfinished = db.fetchone(
+                "SELECT id FROM transcriptions WHERE audio_id = ? AND success = 0 ORDER BY id DESC LIMIT 1",
+                (audio_id,)
+            )
+            resume_at = 0.0
+            next_index = 0
+            if unfinished:
+                last_index, last_end = db.fetchone(
+                    "SELECT MAX(segment_index), MAX(end_time) FROM transcript_segments WHERE transcription_id = ?",
+                    (unfinished[0],)
+                )
+                if last_index is not None:
+                    next_index = last_index + 1
+                    resume_at = last_end or 0.0
+            
+            source = self._audio_source(db, audio_id, resume_at)
+            if source is None:
+                return {"error": f"Audio {audio_id} is not available"}
+            
+            if unfinished:
+                transcription_id = unfinished[0]
+                db.update("transcriptions", {"error_message": "Transcription in progress"},
+                          "id = ?", (transcription_id,))
+                print(f"Resuming transcription {transcription_id} of audio {audio_id} at {resume_at:.1f}s")
+            else:
+                reused = self._reuse_duplicate(db, audio_id, source)
+                if reused:
+                    summary = self.analyze_transcription(reused, min_severity)
+                    summary["transcription_id"] = reused
+                    return summary
+                
+                # The row exists from the start so partial results are visible while it runs
+                transcription_id = db.insert("transcriptions", {
+                    "audio_id": audio_id,
+                    "transcription_text": "",
+                    "language": "vi",
+                    "success": False,
+                    "error_message": "Transcription in progress"
+                })
+        finally:
+            db.close()
+        
+        chunk_queue: queue.Queue = queue.Queue(maxsize=chunk_queue_size)
+        segment_queue: queue.Queue = queue.Queue(maxsize=detect_batch_size * 4)
+        stats = {"audio_seconds": resume_at}
+        errors: List[str] = []
+        
+        def decode() -> None:
+            try:
+                for chunk in self.transcriber.chunks(source, stats, resume_at):
+                    chunk_queue.put(chunk)
+            except Exception as e:
+                errors.append(f"Decoding failed: {e}")
+            finally:
+                chunk_queue.put(None)
+        
+        def transcribe() -> None:
+            stage_db = DatabaseManager(self.db_path)
+            segment_index = next_index
+            in_flight: Deque[Future] = deque()
+            done = False
+            try:
+                while not done or in_flight:
+                    # Hand every chunk that is ready to the engine's shared batcher, which
+                    # batches them with the chunks of other videos being transcribed
+                    while not done and len(in_flight) < self.transcriber.batch_size:
+                        try:
+                            chunk = chunk_queue.get(block=not in_flight)
+                        except queue.Empty:
+                            break
+                        if chunk is None:
+                            done = True
+                        else:
+                            in_flight.append(self.transcriber.submit(chunk))
+                    if not in_flight:
+                        continue
+                    
+                    # Segments are stored in chunk order
+                    for segment in in_flight.popleft().result():
+                        segment_id = stage_db.insert("transcript_segments", {
+                            "transcription_id": transcription_id,
+                            "segment_index": segment_index,
+                            "start_time": segment["start"],
+                            "end_time": segment["end"],
+                            "text": segment["text"]
+                        })
+                        segment_queue.put((segment_id, segment))
+                        segment_index += 1
+            except Exception as e:
+                errors.append(f"Transcription failed: {e}")
+                # Unblock the decoder so it can finish
+                while not done:
+                    done = chunk_queue.get() is None
+            finally:
+                segment_queue.put(None)
+                stage_db.close()
+        
+        threads = [threading.Thread(target=decode, daemon=True),
+                   threading.Thread(target=transcribe, daemon=True)]
+        for thread in threads:
+            thread.start()
+        
+        # Detection runs on this thread, taking segments as they are transcribed
+        db = DatabaseManager(self.db_path)
+        model_name = self.detector.model_name
+        done = False
+        try:
+            try:
+                while not done:
+                    batch = [segment_queue.get()]
+                    while batch[-1] is not None and len(batch) < detect_batch_size:
+                        try:
+                            batch.append(segment_queue.get_nowait())
+                        except queue.Empty:
+                            break
+                    if batch[-1] is None:
+                        batch.pop()
+                        done = True
+                    if not batch:
+                        continue
+                    
+                    try:
+                        analyses = self.detector.analyze_batch(
+                            [segment["text"] for _, segment in batch], min_severity, detect_batch_size
+                        )
+                    except Exception as e:
+                        # Leave these segments unanalyzed; they are analyzed again once the stream ends
+                        print(f"Detection failed on transcription {transcription_id}: {e}")
+                        continue
+                    
+                    db.execute_many(
+                        """
+                        UPDATE transcript_segments
+                        SET is_dangerous = ?, highest_severity = ?, hate_spans = ?,
+                            analysis_model = ?, analysis_time = CURRENT_TIMESTAMP
+                        WHERE id = ?
+                        """,
+                        [(analysis["is_dangerous"], analysis["highest_severity"],
+                          json.dumps(self._timed_spans(segment["start"], segment["end"], segment["text"],
+                                                       analysis["hate_spans"]), ensure_ascii=False),
+                          model_name, segment_id)
+                         for (segment_id, segment), analysis in zip(batch, analyses)]
+                    )
+                    
+                    # Publish the verdict as soon as something is flagged
+                    flagged = sum(1 for analysis in analyses if analysis["is_dangerous"])
+                    if flagged:
+                        self._write_transcription_verdict(db, transcription_id)
+                    if on_progress:
+                        on_progress("texts_analysed", len(batch))
+                        if flagged:
+                            on_progress("segments_flagged", flagged)
+            finally:
+                # Drain anything left so the transcriber thread can exit
+                while not done:
+                    done = segment_queue.get() is None
+                for thread in threads:
+                    thread.join()
+            
+            # Analyze segments left unanalyzed by failed detector calls or an earlier run
+            summary = self.analyze_transcription(transcription_id, min_severity)
+            if "error" in summary:
+                errors.append(f"Detection failed: {summary['error']}")
+                summary = self._write_transcription_verdict(db, transcription_id)
+            else:
+                analyzed_late = summary.pop("segments_analyzed")
+                if on_progress:
+                    on_progress("texts_analysed", analyzed_late)
+            
+            # A failed run keeps the row unfinished, so the next run resumes it
+            segments = db.fetchall(
+                "SELECT text FROM transcript_segments WHERE transcription_id = ? ORDER BY segment_index",
+                (transcription_id,)
+            )
+            db.update("transcriptions", {
+                "transcription_text": " ".join(row[0] for row in segments),
+                "success": not errors,
+                "error_message": "; ".join(errors) or None
+            }, "id = ?", (transcription_id,))
+            
+            summary["transcription_id"] = transcription_id
+            summary["audio_seconds"] = stats["audio_seconds"]
+            if errors:
+                summary["errors"] = errors
+            else:
+                self._archive_audio([audio_id])
+            return summary
+        finally:
+            db.close()
+    
+    def _audio_source(self, db: DatabaseManager, audio_id: int, start: float = 0.0) -> Optional[Any]:
+        """
+        Find where audio can be read from for transcription.
+        
+        Args:
+            db: Database connection
+            audio_id: ID of the audio_files row
+            start: Seconds into the audio that stored audio is read from (downloads
+                   are decoded from the offset passed to TranscriptionEngine.chunks)
+        
+        Returns:
+            Path of the download, PCM frames from the audio store if the download
+            was archived, or None if the audio is not available
+        """
+        audio = db.fetchone("SELECT file_path, evicted FROM audio_files WHERE id = ?", (audio_id,))
+        if not audio:
+            return None
+        if not audio[1]:
+            return audio[0]
+        if self.audio_store is not None and self.audio_store.has(audio_id):
+            return self.audio_store.stream_pcm(audio_id, self.transcriber.chunk_seconds, start=start or None)
+        return None
+    
+    def _archive_audio(self, audio_ids: List[int]) -> None:
+        """Move transcribed downloads into the audio store and apply its budgets."""
+        if self.audio_store is None or not audio_ids:
+            return
+        
+        try:
+            for audio_id in audio_ids:
+                self.audio_store.archive(audio_id)
+            self.audio_store.enforce_retention()
+        except Exception as e:
+            print(f"Error archiving audio: {e}")
+    
+    def _reuse_duplicate(self, db: DatabaseManager, audio_id: int, source: Any) -> Optional[int]:
+        """
+        Copy the transcription of an earlier upload of the same audio, if there is one.
+        
+        Only the segments within the part of the original that this audio
+        matches are copied; they keep their analysis and are shifted onto this
+        audio's timeline. A clip of a longer video thus only gets the clip's
+        segments, while audio that the original covers only in part (or whose
+        duration is unknown) is transcribed.
+        
+        Returns:
+            ID of the copied transcription, or None if the audio has to be transcribed
+        """
+        # Stored audio was fingerprinted when it was downloaded
+        if self.fingerprints is None or not isinstance(source, str):
+            return None
+        
+        try:
+            match = self.fingerprints.fingerprint(audio_id, source)
+        except Exception as e:
+            print(f"Error fingerprinting audio {audio_id}: {e}")
+            return None
+        
+        if match["duplicate_of"] is None:
+            return None
+        
+        source = db.fetchone(
+            """
+            SELECT id, language FROM transcriptions
+            WHERE audio_id = ? AND success = 1 ORDER BY id DESC LIMIT 1
+            """,
+            (match["duplicate_of"],)
+        )
+        if not source:
+            return None
+        
+        segments = db.fetchall(
+            """
+            SELECT start_time, end_time, text, is_dangerous, highest_severity,
+                   hate_spans, analysis_model, analysis_time
+            FROM transcript_segments WHERE transcription_id = ? ORDER BY segment_index
+            """,
+            (source[0],)
+        )
+        
+        # This audio spans [shift, shift + duration] of the original's timeline
+        shift = match["time_shift"] or 0.0
+        durations = dict(db.fetchall(
+            "SELECT id, duration FROM audio_files WHERE id IN (?, ?)",
+            (audio_id, match["duplicate_of"])
+        ))
+        duration = durations.get(audio_id)
+        if not duration:
+            print(f"Audio {audio_id} duplicates audio {match['duplicate_of']} but its duration is unknown; "
+                  f"transcribing it")
+            return None
+        original_duration = durations.get(match["duplicate_of"]) or max((row[1] for row in segments), default=0.0)
+        covered = min(shift + duration, original_duration) - max(shift, 0.0)
+        if covered < self.REUSE_COVERAGE * duration:
+            print(f"Audio {audio_id} overlaps audio {match['duplicate_of']} for only {max(covered, 0.0):.0f}s "
+                  f"of {duration:.0f}s; transcribing it")
+            return None
+        
+        print(f"Audio {audio_id} duplicates audio {match['duplicate_of']} "
+              f"(score {match['score']}, from {shift:.1f}s); reusing transcription {source[0]}")
+        
+        def shifted(seconds: float) -> float:
+            return round(min(max(seconds - shift, 0.0), duration), 2)
+        
+        clipped = [row for row in segments if row[1] > shift and row[0] < shift + duration]
+        
+        transcription_id = db.insert("transcriptions", {
+            "audio_id": audio_id,
+            "transcription_text": " ".join(row[2] for row in clipped),
+            "language": source[1],
+            "success": True,
+            "error_message": None
+        })
+        
+        rows = []
+        for index, (start, end, text, is_dangerous, severity, spans, model, analyzed) in enumerate(clipped):
+            spans = json.loads(spans) if spans else None
+            if spans is not None:
+                # Spans of a segment cut by the clip boundary may lie outside the clip
+                spans = [dict(span, start_time=shifted(span["start_time"]), end_time=shifted(span["end_time"]))
+                         for span in spans
+                         if span["end_time"] > shift and span["start_time"] < shift + duration]
+            rows.append((transcription_id, index, shifted(start), shifted(end), text, is_dangerous, severity,
+                         json.dumps(spans, ensure_ascii=False) if spans is not None else None,
+                         model, analyzed))
+        
+        db.execute_many(
+            """
+            INSERT INTO transcript_segments (transcription_id, segment_index, start_time, end_time, text,
+                                             is_dangerous, highest_severity, hate_spans, analysis_model,
+                                             analysis_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows
+        )
+        
+        self._write_transcription_verdict(db, transcription_id)
+        return transcription_id
+    
+    def _write_transcription_verdict(self, db: DatabaseManager, transcription_id: int) -> Dict[str, Any]:
+        """Replace a transcription's content_analysis row with one built from its analyzed segments."""
+        summary = self._summarize_segments(db, transcription_id)
+        
+        db.delete("content_analysis", "transcription_id = ? AND content_type = 'transcription'",
+                  (transcription_id,))
+        video = db.fetchone(
+            """
+            SELECT a.video_id FROM transcriptions t
+            JOIN audio_files a ON a.id = t.audio_id
+            WHERE t.id = ?
+            """,
+            (transcription_id,)
+        )
+        db.insert("content_analysis", {
+            "transcription_id": transcription_id,
+            "video_id": video[0] if video else None,
+            "content_type": "transcription",
+            "is_dangerous": summary["is_dangerous"],
+            "highest_severity": summary["highest_severity"],
+            "analysis_results": json.dumps(summary, ensure_ascii=False)
+        })
+        
+        return summary
+    
+    @staticmethod
+    def _timed_spans(start: float, end: float, text: str, spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add start/end times to hate spans, interpolated by character position within the segment."""
+        seconds_per_char = (end - start) / max(len(text), 1)
+        return [
+            dict(span,
+                 start_time=round(start + span["start"] * seconds_per_char, 2),
+                 end_time=round(start + span["end"] * seconds_per_char, 2))
+            for span in spans
+        ]
+    
+    @staticmethod
+    def _summarize_segments(db: DatabaseManager, transcription_id: int) -> Dict[str, Any]:
+        """Summarize the analyzed segments of a transcription."""
+        dangerous = db.fetchall(
+            """
+            SELECT segment_index, start_time, end_time, text, highest_severity, hate_spans
+            FROM transcript_segments
+            WHERE transcription_id = ? AND is_dangerous = 1
+            ORDER BY segment_index
+            """,
+            (transcription_id,)
+        )
+        
+        return {
+            "is_dangerous": bool(dangerous),
+            "highest_severity": max((row[4] or 0 for row in dangerous), default=0),
+            "content_type": "transcription",
+            "dangerous_segment_count": len(dangerous),
+            "dangerous_segments": [
+                {
+                    "segment_index": row[0],
+                    "start_time": row[1],
+                    "end_time": row[2],
+                    "text": row[3],
+                    "highest_severity": row[4],
+                    "hate_spans": json.loads(row[5] or "[]")
+                }
+                for row in dangerous
+            ]
+        }
             
     def analyze_video_title(self, video_db_id: int, min_severity: int = 1) -> Dict[str, Any]:
         """
@@ -447,20 +1048,33 @@ class VideoProcessor:
 class PipelineManager:
     """Manages the entire YouTube analysis pipeline."""
     
-    def __init__(self, db_path: str, output_folder: str = "downloads"):
+    def __init__(self, db_path: str, output_folder: str = "downloads", browser_pool=None,
+                 page_cache=None, downloader=None, transcriber=None, fingerprints=None,
+                 audio_store=None, fetcher=None):
         """
         Initialize the pipeline manager.
         
         Args:
             db_path: Path to the SQLite database file
             output_folder: Folder to store downloaded files
+            browser_pool: Optional BrowserPool shared between workers
+            page_cache: Optional PageCache for fetched pages
+            downloader: Optional AudioDownloader shared between workers (enables the download stage)
+            transcriber: Optional TranscriptionEngine shared between workers (enables the
+                         transcription stage; needs a downloader)
+            fingerprints: Optional FingerprintIndex used to skip transcribing re-uploaded audio
+            audio_store: Optional AudioStore that keeps transcribed audio
+            fetcher: Optional ConcurrentFetcher shared between workers
         """
         self.db_path = db_path
         self.output_folder = output_folder
         # Create separate instances for each component
         # This ensures each thread has its own database connection
-        self.channel_manager = ChannelManager(db_path)
-        self.video_processor = VideoProcessor(db_path, output_folder)
+        self.channel_manager = ChannelManager(db_path, browser_pool=browser_pool, page_cache=page_cache,
+                                              fetcher=fetcher)
+        self.video_processor = VideoProcessor(db_path, output_folder, downloader, transcriber, fingerprints,
+                                              audio_store)
+        self.progress_callback: Optional[Callable[[str, int], None]] = None
     
     def close(self):
         """Close all resources."""
@@ -469,6 +1083,23 @@ class PipelineManager:
         if self.video_processor:
             self.video_processor.close()
     
+    def set_progress_callback(self, callback: Optional[Callable[[str, int], None]]) -> None:
+        """
+        Register a callback that receives per-stage progress.
+        
+        Args:
+            callback: Called with (stage, count) where stage is 'videos_discovered',
+                      'comments_scraped', 'texts_analysed', 'audio_downloaded',
+                      'audio_transcribed' or 'segments_flagged'; None to unregister
+        """
+        self.progress_callback = callback
+        self.channel_manager.progress_callback = callback
+    
+    def _report_progress(self, stage: str, count: int) -> None:
+        """Report pipeline progress to the registered callback, if any."""
+        if self.progress_callback and count:
+            self.progress_callback(stage, count)
+    
     def process_channel(self, channel_input: str, max_videos: int = 5, 
                    scrape_comments: bool = True, min_severity: int = 1) -> Dict[str, Any]:
         """
@@ -483,14 +1114,58 @@ class PipelineManager:
         Returns:
             Dictionary with processing results
         """
+        results = self.discover_channel_videos(channel_input, max_videos)
+        
+        if results["channel_id"] is None:
+            return results
+        
+        try:
+            # Step 3: Process each video; audio of the next few downloads while earlier ones are processed
+            video_ids = results["video_ids"]
+            downloader = self.video_processor.downloader
+            window = downloader.prefetch_window if downloader is not None else 0
+            if window:
+                downloader.prefetch(video_ids[:window])
+            
+            for index, video_id in enumerate(video_ids):
+                video_results = self.process_channel_video(video_id, scrape_comments, min_severity)
+                self.merge_video_results(results, video_results)
+                if window and index + window < len(video_ids):
+                    downloader.prefetch([video_ids[index + window]])
+            
+            results["videos_processed"] = len(results["video_ids"])
+            
+            return results
+            
+        except Exception as e:
+            error_msg = f"Error in pipeline: {e}\n{traceback.format_exc()}"
+            print(error_msg)
+            results["errors"].append(error_msg)
+            return results
+    
+    def discover_channel_videos(self, channel_input: str, max_videos: int = 5) -> Dict[str, Any]:
+        """
+        Add/update a channel and scrape its video list (steps 1 and 2 of process_channel).
+        
+        The returned video IDs can be processed one by one with process_channel_video,
+        which lets the job queue interleave per-video sub-jobs with other work.
+        
+        Args:
+            channel_input: Channel name, URL, or @username
+            max_videos: Maximum number of videos to scrape
+            
+        Returns:
+            Dictionary with processing results, including "video_ids" to process
+        """
         results = {
             "channel_id": None,
+            "video_ids": [],
             "videos_processed": 0,
             "videos_with_dangerous_content": 0,
             "videos_with_dangerous_titles": 0,
             "videos_with_dangerous_comments": 0,
             "highest_severity_found": 0,
-            "dangerous_categories": set(),
+            "dangerous_categories": [],
             "errors": []
         }
         
@@ -507,57 +1182,128 @@ class PipelineManager:
             
             # Step 2: Scrape videos
             print(f"Scraping up to {max_videos} videos")
-            video_ids = self.channel_manager.scrape_channel_videos(channel_id, max_videos)
+            results["video_ids"] = self.channel_manager.scrape_channel_videos(channel_id, max_videos)
+            self._report_progress("videos_discovered", len(results["video_ids"]))
             
-            # Step 3: Process each video
-            for video_id in video_ids:
-                # Create a new database connection for safety
-                db = DatabaseManager(self.db_path)
-                
-                # Get video details
-                video_data = db.fetchone(
-                    "SELECT title, video_id FROM videos WHERE id = ?", 
-                    (video_id,)
-                )
-                
-                db.close()
-                
-                if not video_data:
-                    results["errors"].append(f"Video with ID {video_id} not found in database")
-                    continue
-                
-                video_title, yt_video_id = video_data
-                print(f"Processing video: {video_title}")
-                
-                # Step 3b: Scrape comments if requested
-                if scrape_comments:
-                    print("Scraping comments")
-                    self.channel_manager.scrape_video_comments(video_id)
-                
-                # Check for any dangerous content
-                db = DatabaseManager(self.db_path)
-                dangerous_content = db.fetchone(
-                    "SELECT COUNT(*) FROM content_analysis WHERE video_id = ? AND is_dangerous = 1",
-                    (video_id,)
-                )
-                
-                if dangerous_content and dangerous_content[0] > 0:
-                    results["videos_with_dangerous_content"] += 1
+            return results
+            
+        except Exception as e:
+            error_msg = f"Error in pipeline: {e}\n{traceback.format_exc()}"
+            print(error_msg)
+            results["errors"].append(error_msg)
+            return results
+    
+    def process_channel_video(self, video_id: int, scrape_comments: bool = True,
+                              min_severity: int = 1) -> Dict[str, Any]:
+        """
+        Process a single video discovered by discover_channel_videos.
+        
+        Args:
+            video_id: Database ID of the video
+            scrape_comments: Whether to scrape video comments
+            min_severity: Minimum severity level for content analysis
+            
+        Returns:
+            Dictionary with the per-video results
+        """
+        results = {
+            "video_id": video_id,
+            "audio_id": None,
+            "transcription_id": None,
+            "is_dangerous": False,
+            "errors": []
+        }
+        
+        try:
+            # Create a new database connection for safety
+            db = DatabaseManager(self.db_path)
+            
+            # Get video details
+            video_data = db.fetchone(
+                "SELECT title, video_id FROM videos WHERE id = ?", 
+                (video_id,)
+            )
+            
+            db.close()
+            
+            if not video_data:
+                results["errors"].append(f"Video with ID {video_id} not found in database")
+                return results
+            
+            video_title, yt_video_id = video_data
+            print(f"Processing video: {video_title}")
+            
+            # Scrape comments if requested
+            if scrape_comments:
+                print("Scraping comments")
+                self.channel_manager.scrape_video_comments(video_id)
+            
+            # Other workers' downloads must not evict the audio before it is transcribed
+            with self.video_processor.audio_in_use(video_id):
+                # Download audio if the download stage is enabled
+                if self.video_processor.downloader is not None:
+                    print("Downloading audio")
+                    results["audio_id"] = self.video_processor.download_audio(video_id)
+                    if results["audio_id"]:
+                        self._report_progress("audio_downloaded", 1)
                 
-                db.close()
+                # Transcribe and analyze the audio as a stream if the transcription stage is enabled
+                if results["audio_id"] and self.video_processor.transcriber is not None:
+                    results["transcription_id"] = self.stream_transcription(
+                        results["audio_id"], min_severity
+                    ).get("transcription_id")
+            
+            # Check for any dangerous content
+            db = DatabaseManager(self.db_path)
+            dangerous_content = db.fetchone(
+                "SELECT COUNT(*) FROM content_analysis WHERE video_id = ? AND is_dangerous = 1",
+                (video_id,)
+            )
             
-            results["videos_processed"] = len(video_ids)
+            if dangerous_content and dangerous_content[0] > 0:
+                results["is_dangerous"] = True
             
-            # Convert set to list for JSON serialization
-            results["dangerous_categories"] = list(results["dangerous_categories"])
+            db.close()
             
             return results
             
         except Exception as e:
-            error_msg = f"Error in pipeline: {e}\n{traceback.format_exc()}"
+            error_msg = f"Error processing video {video_id}: {e}\n{traceback.format_exc()}"
             print(error_msg)
             results["errors"].append(error_msg)
             return results
+    
+    def stream_transcription(self, audio_id: int, min_severity: int = 1) -> Dict[str, Any]:
+        """
+        Transcribe and analyze one video's audio with overlapping stages and report progress.
+        
+        Args:
+            audio_id: ID of the audio_files row
+            min_severity: Minimum severity level for content analysis
+            
+        Returns:
+            Summary from VideoProcessor.stream_transcription
+        """
+        print("Transcribing and analyzing audio")
+        summary = self.video_processor.stream_transcription(audio_id, min_severity, self._report_progress)
+        if summary.get("transcription_id"):
+            self._report_progress("audio_transcribed", 1)
+        for error in summary.get("errors", []):
+            print(f"Error in audio {audio_id}: {error}")
+        return summary
+    
+    @staticmethod
+    def merge_video_results(results: Dict[str, Any], video_results: Dict[str, Any]) -> None:
+        """
+        Fold the results of process_channel_video into channel results.
+        
+        Args:
+            results: Channel results from discover_channel_videos (updated in place)
+            video_results: Results from process_channel_video
+        """
+        if video_results["is_dangerous"]:
+            results["videos_with_dangerous_content"] += 1
+        results["errors"].extend(video_results["errors"])
 
     def process_video(self, video_url: str, scrape_comments: bool = True, 
                     min_severity: int = 1) -> Dict[str, Any]:
@@ -579,6 +1325,8 @@ class PipelineManager:
             "has_dangerous_comments": False,
             "highest_severity": 0,
             "dangerous_categories": [],
+            "audio_id": None,
+            "transcription_id": None,
             "errors": []
         }
         
@@ -606,88 +1354,102 @@ class PipelineManager:
                 video_db_id = existing[0]
                 print(f"Video already exists in database with ID: {video_db_id}")
             else:
-                # Initialize YouTube scraper
-                scraper = YouTubeChannelScraper(headless=True)
+                # Reuse the channel manager's scraper instead of launching another browser
+                scraper = self.channel_manager.scraper
                 
+                # Get video details
+                video_details = scraper.get_video_details(video_url)
+                
+                # Get channel information
+                channel_url = None
                 try:
-                    # Get video details
-                    video_details = scraper.get_video_details(video_url)
-                    
-                    # Get channel information
-                    channel_url = None
-                    try:
-                        # Try to navigate to the channel from the video page
-                        # This is a simplified approach - in a real implementation,
-                        # you would use Selenium to navigate to the channel
-                        channel_url = video_details.get("channel_url")
-                    except:
-                        pass
+                    # Try to navigate to the channel from the video page
+                    # This is a simplified approach - in a real implementation,
+                    # you would use Selenium to navigate to the channel
+                    channel_url = video_details.get("channel_url")
+                except:
+                    pass
+                
+                # Create a new database connection
+                db = DatabaseManager(self.db_path)
+                
+                # If we couldn't get the channel URL, create a placeholder channel
+                channel_id = None
+                if channel_url:
+                    channel_info = scraper.get_channel_info(channel_url)
                     
-                    # Create a new database connection
-                    db = DatabaseManager(self.db_path)
+                    # Check if channel exists in database
+                    existing_channel = db.fetchone(
+                        "SELECT id FROM channels WHERE channel_id = ?", 
+                        (channel_info["channel_id"],)
+                    )
                     
-                    # If we couldn't get the channel URL, create a placeholder channel
-                    channel_id = None
-                    if channel_url:
-                        channel_info = scraper.get_channel_info(channel_url)
-                        
-                        # Check if channel exists in database
-                        existing_channel = db.fetchone(
-                            "SELECT id FROM channels WHERE channel_id = ?", 
-                            (channel_info["channel_id"],)
-                        )
-                        
-                        if existing_channel:
-                            channel_id = existing_channel[0]
-                        else:
-                            # Insert new channel
-                            channel_id = db.insert("channels", {
-                                "channel_id": channel_info["channel_id"],
-                                "channel_name": channel_info["channel_name"],
-                                "subscribers": channel_info["subscribers"],
-                                "description": channel_info["description"],
-                                "url": channel_info["url"]
-                            })
+                    if existing_channel:
+                        channel_id = existing_channel[0]
                     else:
-                        # Create a placeholder channel
+                        # Insert new channel
                         channel_id = db.insert("channels", {
-                            "channel_id": "unknown",
-                            "channel_name": "Unknown Channel",
-                            "subscribers": "Unknown",
-                            "description": "Automatically created for video processing",
-                            "url": "#"
+                            "channel_id": channel_info["channel_id"],
+                            "channel_name": channel_info["channel_name"],
+                            "subscribers": channel_info["subscribers"],
+                            "description": channel_info["description"],
+                            "url": channel_info["url"]
                         })
-                    
-                    # Insert video
-                    video_db_id = db.insert("videos", {
-                        "video_id": yt_video_id,
-                        "channel_id": channel_id,
-                        "title": video_details["title"],
-                        "url": video_url,
-                        "views": video_details.get("views", "Unknown"),
-                        "upload_date": video_details.get("upload_date", "Unknown"),
-                        "likes": video_details.get("likes", 0),
-                        "description": video_details.get("description", ""),
-                        "thumbnail": video_details.get("thumbnail", "")
+                else:
+                    # Create a placeholder channel
+                    channel_id = db.insert("channels", {
+                        "channel_id": "unknown",
+                        "channel_name": "Unknown Channel",
+                        "subscribers": "Unknown",
+                        "description": "Automatically created for video processing",
+                        "url": "#"
                     })
-                    
-                    db.close()
-                    
-                finally:
-                    if scraper:
-                        scraper.close()
+                
+                # Insert video
+                video_db_id = db.insert("videos", {
+                    "video_id": yt_video_id,
+                    "channel_id": channel_id,
+                    "title": video_details["title"],
+                    "url": video_url,
+                    "views": video_details.get("views", "Unknown"),
+                    "upload_date": video_details.get("upload_date", "Unknown"),
+                    "likes": video_details.get("likes", 0),
+                    "description": video_details.get("description", ""),
+                    "thumbnail": video_details.get("thumbnail", "")
+                })
+                
+                db.close()
             
             results["video_id"] = video_db_id
             
             # Step 1: Analyze video title
             print("Analyzing video title")
             self.video_processor.analyze_video_title(video_db_id, min_severity)
+            self._report_progress("texts_analysed", 1)
             
             # Step 2: Scrape comments if requested
             if scrape_comments:
                 print("Scraping comments")
                 self.channel_manager.scrape_video_comments(video_db_id)
             
+            # Other workers' downloads must not evict the audio before it is transcribed
+            with self.video_processor.audio_in_use(video_db_id):
+                # Step 3: Download audio if the download stage is enabled
+                if self.video_processor.downloader is not None:
+                    print("Downloading audio")
+                    results["audio_id"] = self.video_processor.download_audio(video_db_id)
+                    if results["audio_id"]:
+                        self._report_progress("audio_downloaded", 1)
+                
+                # Step 4: Transcribe and analyze the audio as a stream if the transcription stage is enabled
+                if results["audio_id"] and self.video_processor.transcriber is not None:
+                    transcript_analysis = self.stream_transcription(results["audio_id"], min_severity)
+                    results["transcription_id"] = transcript_analysis.get("transcription_id")
+                    if transcript_analysis.get("is_dangerous"):
+                        results["is_dangerous"] = True
+                        results["highest_severity"] = max(results["highest_severity"],
+                                                          transcript_analysis["highest_severity"])
+            
             return results
             
         except Exception as e:
@@ -19,6 +19,7 @@ class VietnameseDangerousContentDetector:
             model_name: Name of the pretrained model to use
         """
         # Load the transformer model and tokenizer
+        self.model_name = model_name
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
         
@@ -49,23 +50,38 @@ class VietnameseDangerousContentDetector:
         
         return output_text
     
-    def analyze_text(self, text: str, min_severity: int = 1) -> Dict:
+    def generate_outputs(self, input_texts: List[str], batch_size: int = 16) -> List[str]:
         """
-        Analyze text and identify dangerous content.
+        Generate hate-span outputs for many texts, several per model call.
         
         Args:
-            text: The Vietnamese text to analyze
-            min_severity: Minimum severity level (ignored, kept for API compatibility)
+            input_texts: The texts to analyze
+            batch_size: Number of texts per model call
             
         Returns:
-            Dictionary with analysis results
+            The model's output for each text, in input order
         """
-        # Get model output with hate spans
-        result = self.generate_output(text)
+        outputs = []
         
+        for i in range(0, len(input_texts), batch_size):
+            batch = [f"{self.prefix}: {text}" for text in input_texts[i:i + batch_size]]
+            
+            # Pad the batch to its longest text; the attention mask hides the padding
+            inputs = self.tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=512)
+            
+            with torch.inference_mode():
+                output_ids = self.model.generate(**inputs, max_length=256)
+            
+            outputs.extend(self.tokenizer.batch_decode(output_ids, skip_special_tokens=True))
+        
+        return outputs
+    
+    @staticmethod
+    def _results_from_output(output_text: str) -> Dict:
+        """Turn the model's marked-up output into an analysis result."""
         # Extract hate spans (text within [hate] tags)
         pattern = r'\[hate\](.*?)\[hate\]'
-        hate_spans = re.findall(pattern, result)
+        hate_spans = re.findall(pattern, output_text)
         
         # Determine if text is dangerous based on presence of hate spans
         is_dangerous = len(hate_spans) > 0
@@ -89,6 +105,79 @@ class VietnameseDangerousContentDetector:
         
         return results
     
+    @staticmethod
+    def locate_spans(text: str, spans: List[str]) -> List[Dict]:
+        """
+        Find the character positions of hate spans in the analyzed text.
+        
+        Args:
+            text: The analyzed text
+            spans: Hate spans returned by the model, in order of appearance
+            
+        Returns:
+            List of {"text", "start", "end"} dictionaries; spans the model
+            reworded and that can't be found are left out
+        """
+        located = []
+        cursor = 0
+        lowered = text.lower()
+        
+        for span in spans:
+            needle = span.strip().lower()
+            if not needle:
+                continue
+            
+            position = lowered.find(needle, cursor)
+            if position < 0:
+                position = lowered.find(needle)
+            if position < 0:
+                continue
+            
+            located.append({"text": text[position:position + len(needle)],
+                            "start": position, "end": position + len(needle)})
+            cursor = position + len(needle)
+        
+        return located
+    
+    def analyze_batch(self, texts: List[str], min_severity: int = 1, batch_size: int = 16) -> List[Dict]:
+        """
+        Analyze many texts (e.g. transcript segments) in batches.
+        
+        Args:
+            texts: The Vietnamese texts to analyze
+            min_severity: Minimum severity level (ignored, kept for API compatibility)
+            batch_size: Number of texts per model call
+            
+        Returns:
+            Analysis result of each text in the format of analyze_text, plus
+            "hate_spans" with the character positions of each span
+        """
+        results = []
+        
+        for text, output_text in zip(texts, self.generate_outputs(texts, batch_size)):
+            result = self._results_from_output(output_text)
+            keywords = result["matches"].get("hate_speech", {}).get("keywords", [])
+            result["hate_spans"] = self.locate_spans(text, keywords)
+            results.append(result)
+        
+        return results
+    
+    def analyze_text(self, text: str, min_severity: int = 1) -> Dict:
+        """
+        Analyze text and identify dangerous content.
+        
+        Args:
+            text: The Vietnamese text to analyze
+            min_severity: Minimum severity level (ignored, kept for API compatibility)
+            
+        Returns:
+            Dictionary with analysis results
+        """
+        # Get model output with hate spans
+        result = self.generate_output(text)
+        
+        return self._results_from_output(result)
+    
     def analyze_title(self, title: str, min_severity: int = 1) -> Dict:
         """
         Analyze video title for dangerous content.
@@ -1,64 +1,474 @@
-# from __future__ import unicode_literals
-# import os
-# import json
-# import yt_dlp
-# import argparse
-
-# def download_audio_from_id(video_id, output_folder, format_type="mp3"):
-#     """
-#     Download audio from a YouTube video ID using yt-dlp.
-    
-#     Args:
-#         video_id: YouTube video ID
-#         output_folder: Folder to save the downloaded audio
-#         format_type: Audio format (default: "mp3")
-        
-#     Returns:
-#         bool: True if download was successful, False otherwise
-#     """
-#     try:
-#         # Create output folder if it doesn't exist
-#         os.makedirs(output_folder, exist_ok=True)
-        
-#         # Create YouTube URL from video ID
-#         url = f"https://www.youtube.com/watch?v={video_id}"
-        
-#         # Create the output filename without extension
-#         # yt-dlp will add the extension based on the format
-#         filename = os.path.join(output_folder, video_id)
-        
-#         # Configure yt-dlp options
-#         ydl_opts = {
-#             'format': 'bestaudio/best',
-#             'outtmpl': filename,
-#             'postprocessors': [{
-#                 'key': 'FFmpegExtractAudio',
-#                 'preferredcodec': format_type,
-#                 'preferredquality': '192',
-#             }],
-#             'quiet': False,
-#             'no_warnings': False,
-#             'cookiefile': 'cookies.txt'
-#         }
-        
-#         # Download the audio
-#         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-#             ydl.download([url])
-            
-#         print(f"Downloaded: {video_id}.{format_type}")
-#         return True
-        
-#     except Exception as e:
-#         print(f"Error downloading video ID {video_id}: {e}")
-#         return False
-    
-# # Main execution
-# if __name__ == "__main__":
-#     parser = argparse.ArgumentParser(description='Download audio from YouTube video IDs')
-#     parser.add_argument('--id', type=str, required=True, help='Single YouTube video ID to download')
-#     parser.add_argument('--output', type=str, default='downloads', help='Output folder')
-#     parser.add_argument('--format', type=str, default='mp3', help='Audio format (mp3, wav, etc.)')
-    
-#     args = parser.parse_args()
-
-#     download_audio_from_id(args.id, args.output, args.format)
\ No newline at end of file
+import os
+import socket
+import hashlib
+import threading
+import argparse
+import subprocess
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Iterator
+
+import requests
+
+from db.db_setup import DatabaseManager
+from modules.process_lock import ProcessLock
+
+# Pins older than this are left by crashed workers and no longer protect their audio
+PIN_TTL_HOURS = 12
+
+# Number of lock files videos are spread over for cross-process download locks
+VIDEO_LOCK_STRIPES = 64
+
+
+class RangeIgnored(IOError):
+    """The server answered a Range request with the whole stream; the download restarts from 0."""
+
+
+class SourceExpired(IOError):
+    """The resolved stream URL is no longer valid; the video has to be resolved again."""
+
+
+class YtDlpTransport:
+    """
+    Resolves the best audio-only stream of a video with yt-dlp and streams it over HTTP.
+
+    Streams are fetched with Range requests so interrupted downloads can resume.
+    """
+
+    def __init__(self, cookiefile: Optional[str] = "cookies.txt", timeout: float = 30.0):
+        """
+        Initialize the transport.
+
+        Args:
+            cookiefile: Cookie file passed to yt-dlp (ignored if it doesn't exist)
+            timeout: HTTP timeout in seconds
+        """
+        self.cookiefile = cookiefile
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def resolve(self, video_id: str) -> Dict[str, Any]:
+        """
+        Find the audio stream of a video.
+
+        Args:
+            video_id: YouTube video ID
+
+        Returns:
+            Dictionary with "url", "ext", "format_id", "duration" and "headers"
+        """
+        import yt_dlp
+
+        ydl_opts = {
+            "format": "bestaudio/best",
+            "quiet": True,
+            "no_warnings": True
+        }
+        if self.cookiefile and os.path.exists(self.cookiefile):
+            ydl_opts["cookiefile"] = self.cookiefile
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+
+        return {
+            "url": info["url"],
+            "ext": info.get("ext", "m4a"),
+            "format_id": info.get("format_id"),
+            "duration": info.get("duration"),
+            "headers": info.get("http_headers", {})
+        }
+
+    def stream(self, source: Dict[str, Any], offset: int, chunk_size: int) -> Iterator[bytes]:
+        """
+        Stream a resolved source starting at a byte offset.
+
+        Args:
+            source: Result of resolve
+            offset: Byte offset to start at
+            chunk_size: Size of the yielded chunks
+
+        Yields:
+            Chunks of the stream
+
+        Raises:
+            RangeIgnored: The server ignored the Range request of a resumed download
+            SourceExpired: The stream URL has expired (403 or 410)
+        """
+        headers = dict(source.get("headers", {}))
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        with self.session.get(source["url"], headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # Range starts at the end: the partial file is already complete
+                return
+            if response.status_code in (403, 410):
+                raise SourceExpired(f"Stream URL expired (HTTP {response.status_code})")
+            response.raise_for_status()
+            if offset and response.status_code != 206:
+                raise RangeIgnored("Server ignored the Range request")
+            yield from response.iter_content(chunk_size)
+
+
+class FileTransport:
+    """Serves audio from local files named <video_id>.<ext> (tests and offline runs)."""
+
+    def __init__(self, root: str):
+        """
+        Initialize the transport.
+
+        Args:
+            root: Directory holding the audio files
+        """
+        self.root = root
+
+    def resolve(self, video_id: str) -> Dict[str, Any]:
+        """Find the local file of a video."""
+        for name in os.listdir(self.root):
+            stem, ext = os.path.splitext(name)
+            if stem == video_id and ext:
+                return {"url": os.path.join(self.root, name), "ext": ext[1:], "duration": None, "headers": {}}
+        raise FileNotFoundError(f"No audio file for {video_id} in {self.root}")
+
+    def stream(self, source: Dict[str, Any], offset: int, chunk_size: int) -> Iterator[bytes]:
+        """Stream a local file starting at a byte offset."""
+        with open(source["url"], "rb") as f:
+            f.seek(offset)
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+
+class AudioDownloader:
+    """
+    Downloads video audio into the output folder and records it in audio_files.
+
+    Several downloads run in parallel, and prefetch starts the downloads of
+    a batch of videos in the background before they are needed. Each
+    download writes to a .part file that is resumed from its current size
+    after an interruption; if the server ignores the Range request the file
+    is truncated and downloaded again, and an expired stream URL is resolved
+    again. Finished files are checksummed; a file identical to one already
+    stored is dropped and the existing copy reused. When the stored audio
+    exceeds the disk quota, the least recently used files are deleted and
+    their rows marked as evicted, so a later request downloads them again;
+    audio pinned by a worker that is still using it is never evicted.
+    Downloads of one video and quota passes are serialized across the
+    processes sharing the output folder (serve.py) with lock files.
+    Audio moved into the audio store (modules.audio_storage) is not
+    downloaded again.
+    """
+
+    def __init__(self, db_path: str, output_folder: str = "downloads", transport: Optional[Any] = None,
+                 workers: int = 3, max_bytes: Optional[int] = None, chunk_size: int = 1 << 20,
+                 prefetch_ahead: int = 2):
+        """
+        Initialize the downloader.
+
+        Args:
+            db_path: Path to SQLite database file
+            output_folder: Folder to store downloaded audio
+            transport: Object with resolve(video_id) and stream(source, offset, chunk_size)
+                       (defaults to YtDlpTransport)
+            workers: Number of parallel downloads
+            max_bytes: Disk quota for stored audio in bytes (None for no limit)
+            chunk_size: Bytes written per chunk
+            prefetch_ahead: Videos per download worker that callers prefetch ahead of
+                            processing (see prefetch_window)
+        """
+        self.db_path = db_path
+        self.output_folder = output_folder
+        self.transport = transport or YtDlpTransport()
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        # Prefetching a whole channel would leave its later videos least recently used,
+        # so the quota would evict them before they are processed
+        self.prefetch_window = workers * prefetch_ahead
+
+        self.lock = threading.Lock()
+        # Video ID -> [lock, number of callers using it]; dropped when the last caller is done
+        self.in_flight: Dict[int, List[Any]] = {}
+        # Caps concurrent downloads of this process across prefetches and direct callers
+        self.slots = threading.BoundedSemaphore(workers)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download")
+
+        os.makedirs(output_folder, exist_ok=True)
+
+        # Lock files shared with other processes downloading into the same folder
+        self.lock_dir = os.path.join(output_folder, ".locks")
+        self.quota_lock = ProcessLock(os.path.join(self.lock_dir, "quota.lock"))
+        # A fixed set of lock files, so they don't pile up with every video ever downloaded
+        self.video_file_locks = [ProcessLock(os.path.join(self.lock_dir, f"video_{stripe}.lock"))
+                                 for stripe in range(VIDEO_LOCK_STRIPES)]
+
+    def download(self, video_db_id: int) -> Optional[int]:
+        """
+        Make sure the audio of a video is on disk.
+
+        Args:
+            video_db_id: Database ID of the video
+
+        Returns:
+            ID of the audio_files row, or None if the download failed
+        """
+        with self.lock:
+            entry = self.in_flight.setdefault(video_db_id, [threading.Lock(), 0])
+            entry[1] += 1
+
+        # One download per video at a time, in any process; a second caller waits and reuses the result
+        video_file_lock = self.video_file_locks[video_db_id % VIDEO_LOCK_STRIPES]
+        try:
+            with entry[0], video_file_lock, self.slots:
+                db = DatabaseManager(self.db_path)
+                try:
+                    return self._download(db, video_db_id)
+                except Exception as e:
+                    print(f"Error downloading audio for video {video_db_id}: {e}")
+                    return None
+                finally:
+                    db.close()
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.in_flight[video_db_id]
+
+    def prefetch(self, video_db_ids: List[int]) -> List[Future]:
+        """
+        Start downloading the audio of several videos in the background.
+
+        A later download call for one of the videos waits for its prefetch
+        and returns the stored audio. Callers keep at most prefetch_window
+        videos prefetched ahead of the ones being processed.
+
+        Args:
+            video_db_ids: Database IDs of the videos
+
+        Returns:
+            Futures of the audio_files IDs (None on failure), in the same order
+        """
+        return [self.executor.submit(self.download, video_db_id) for video_db_id in video_db_ids]
+
+    def download_many(self, video_db_ids: List[int]) -> Dict[int, Optional[int]]:
+        """
+        Download the audio of several videos in parallel.
+
+        Args:
+            video_db_ids: Database IDs of the videos
+
+        Returns:
+            Dictionary mapping video database ID to audio_files ID (None on failure)
+        """
+        futures = self.prefetch(video_db_ids)
+        return {video_db_id: future.result() for video_db_id, future in zip(video_db_ids, futures)}
+
+    def close(self) -> None:
+        """Drop queued prefetches and wait for running downloads (their .part files resume later)."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def touch(self, audio_id: int) -> None:
+        """
+        Mark stored audio as used so quota eviction keeps it longer.
+
+        Args:
+            audio_id: ID of the audio_files row
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            db.execute("UPDATE audio_files SET last_accessed = CURRENT_TIMESTAMP WHERE id = ?", (audio_id,))
+            db.get_connection().commit()
+        finally:
+            db.close()
+
+    @contextmanager
+    def pinned(self, video_db_id: int) -> Iterator[None]:
+        """
+        Keep a video's audio from being evicted while the block uses it.
+
+        Pins are stored in the database, so they also protect audio used by
+        other processes sharing it.
+
+        Args:
+            video_db_id: Database ID of the video
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            pin_id = db.insert("audio_pins", {
+                "video_id": video_db_id,
+                "owner": f"{socket.gethostname()}:{os.getpid()}"
+            })
+            try:
+                yield
+            finally:
+                db.execute("DELETE FROM audio_pins WHERE id = ?", (pin_id,))
+                db.get_connection().commit()
+        finally:
+            db.close()
+
+    def _download(self, db: DatabaseManager, video_db_id: int) -> Optional[int]:
+        """Download one video's audio (caller holds the video's lock)."""
+        existing = db.fetchone(
+            """
+            SELECT a.id, a.file_path, s.audio_id IS NOT NULL FROM audio_files a
+            LEFT JOIN audio_store s ON s.audio_id = a.id
+            WHERE a.video_id = ? AND (a.evicted IS NULL OR a.evicted = 0 OR s.audio_id IS NOT NULL)
+            ORDER BY a.id DESC LIMIT 1
+            """,
+            (video_db_id,)
+        )
+        if existing and (existing[2] or os.path.exists(existing[1])):
+            db.execute("UPDATE audio_files SET last_accessed = CURRENT_TIMESTAMP WHERE id = ?", (existing[0],))
+            db.get_connection().commit()
+            return existing[0]
+
+        video = db.fetchone("SELECT video_id FROM videos WHERE id = ?", (video_db_id,))
+        if not video:
+            print(f"Video with ID {video_db_id} not found")
+            return None
+        yt_video_id = video[0]
+
+        source = self.transport.resolve(yt_video_id)
+        file_path = os.path.join(self.output_folder, f"{yt_video_id}.{source['ext']}")
+        part_path = f"{file_path}.part"
+
+        # Resume a partial download; hash what is already on disk first
+        checksum = hashlib.sha256()
+        offset = 0
+        if os.path.exists(part_path):
+            with open(part_path, "rb") as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                    checksum.update(chunk)
+                    offset += len(chunk)
+            print(f"Resuming download of {yt_video_id} at {offset} bytes")
+
+        refreshed = False
+        while True:
+            try:
+                with open(part_path, "ab") as f:
+                    for chunk in self.transport.stream(source, offset, self.chunk_size):
+                        f.write(chunk)
+                        checksum.update(chunk)
+                        offset += len(chunk)
+                break
+            except RangeIgnored:
+                # The partial file can't be resumed; start over instead of failing on every retry
+                print(f"Server ignored the Range request for {yt_video_id}; restarting the download")
+                open(part_path, "wb").close()
+                checksum = hashlib.sha256()
+                offset = 0
+            except SourceExpired:
+                # Stream URLs are signed and expire; resolve once more and continue where we are
+                if refreshed:
+                    raise
+                refreshed = True
+                print(f"Stream URL of {yt_video_id} expired; resolving it again")
+                fresh = self.transport.resolve(yt_video_id)
+                if (fresh.get("format_id"), fresh["ext"]) != (source.get("format_id"), source["ext"]):
+                    # A different format was picked; its bytes don't continue the partial file
+                    os.remove(part_path)
+                    file_path = os.path.join(self.output_folder, f"{yt_video_id}.{fresh['ext']}")
+                    part_path = f"{file_path}.part"
+                    checksum = hashlib.sha256()
+                    offset = 0
+                source = fresh
+
+        digest = checksum.hexdigest()
+        file_size = os.path.getsize(part_path)
+
+        # Reuse an identical stored file instead of keeping a second copy
+        duplicate = db.fetchone(
+            """
+            SELECT file_path FROM audio_files
+            WHERE checksum = ? AND (evicted IS NULL OR evicted = 0)
+            LIMIT 1
+            """,
+            (digest,)
+        )
+        if duplicate and os.path.exists(duplicate[0]):
+            os.remove(part_path)
+            file_path = duplicate[0]
+        else:
+            os.replace(part_path, file_path)
+
+        audio_id = db.insert("audio_files", {
+            "video_id": video_db_id,
+            "file_path": file_path,
+            "format_type": source["ext"],
+            "file_size": file_size,
+            "duration": source.get("duration") or self._probe_duration(file_path),
+            "checksum": digest,
+            "evicted": 0
+        })
+        db.execute("UPDATE audio_files SET last_accessed = CURRENT_TIMESTAMP WHERE id = ?", (audio_id,))
+        db.get_connection().commit()
+
+        print(f"Downloaded: {file_path} ({file_size} bytes)")
+
+        if self.max_bytes is not None:
+            self._enforce_quota(db, keep=file_path)
+
+        return audio_id
+
+    @staticmethod
+    def _probe_duration(file_path: str) -> Optional[float]:
+        """Read a file's duration with ffprobe (None if ffprobe is unavailable)."""
+        try:
+            output = subprocess.run(
+                ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                 "-of", "default=noprint_wrappers=1:nokey=1", file_path],
+                capture_output=True, text=True, timeout=30, check=True
+            ).stdout
+            return float(output.strip())
+        except (OSError, subprocess.SubprocessError, ValueError):
+            return None
+
+    def _enforce_quota(self, db: DatabaseManager, keep: str) -> None:
+        """Delete least recently used audio files until stored audio fits the quota."""
+        with self.quota_lock:
+            files = db.fetchall(
+                f"""
+                SELECT a.file_path, MAX(a.file_size), MAX(a.last_accessed) AS used,
+                       MAX(p.id IS NOT NULL) AS pinned
+                FROM audio_files a
+                LEFT JOIN audio_pins p ON p.video_id = a.video_id
+                    AND p.pinned_at > datetime('now', '-{PIN_TTL_HOURS} hours')
+                WHERE a.evicted IS NULL OR a.evicted = 0
+                GROUP BY a.file_path
+                ORDER BY used ASC
+                """
+            )
+
+            total = sum(size or 0 for _, size, _, _ in files)
+            for file_path, size, _, pinned in files:
+                if total <= self.max_bytes:
+                    break
+                if file_path == keep or pinned:
+                    continue
+
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+                db.execute("UPDATE audio_files SET evicted = 1 WHERE file_path = ?", (file_path,))
+                total -= size or 0
+                print(f"Evicted {file_path} to stay within the disk quota")
+
+            db.get_connection().commit()
+
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Download audio of videos stored in the database')
+    parser.add_argument('--video', type=int, nargs='+', required=True, help='Database IDs of the videos')
+    parser.add_argument('--db', type=str, default='db/youtube_analysis.db', help='Path to SQLite database file')
+    parser.add_argument('--output', type=str, default='downloads', help='Output folder')
+    parser.add_argument('--workers', type=int, default=3, help='Number of parallel downloads')
+
+    args = parser.parse_args()
+
+    downloader = AudioDownloader(args.db, args.output, workers=args.workers)
+    print(downloader.download_many(args.video))
+    downloader.close()
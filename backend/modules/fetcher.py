@@ -0,0 +1,131 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable, Optional, Iterable
+from urllib.parse import urlsplit
+
+from modules.scheduler import TokenBucket
+
+
+class ConcurrentFetcher:
+    """
+    Runs many scraper calls (video details, comments, ...) at once.
+
+    Calls run on a shared thread pool. Each call first takes a slot from its
+    host's semaphore, which caps concurrent requests per host, then a token
+    from a global token bucket, which caps the request rate. Failed calls are
+    retried with exponential backoff and jitter, so a batch of fetches takes
+    about as long as its slowest few calls instead of the sum of all of them.
+    """
+
+    def __init__(self, max_workers: int = 8, per_host: int = 4, rate: float = 5.0,
+                 burst: float = 10.0, retries: int = 2, backoff: float = 1.0,
+                 max_backoff: float = 30.0):
+        """
+        Initialize the fetcher.
+
+        Args:
+            max_workers: Size of the thread pool
+            per_host: Maximum concurrent calls per host
+            rate: Calls started per second across all hosts
+            burst: Calls that may start at once before the rate applies
+            retries: Retries after the first failed attempt
+            backoff: Delay before the first retry in seconds (doubled per retry)
+            max_backoff: Maximum delay between retries in seconds
+        """
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetcher")
+        self.bucket = TokenBucket(rate, burst)
+        self.lock = threading.Lock()
+        self.host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+    def map(self, fn: Callable[[str], Any], urls: Iterable[str], default: Any = None,
+            is_failure: Optional[Callable[[Any], bool]] = None) -> List[Any]:
+        """
+        Call fn for every URL concurrently.
+
+        Args:
+            fn: Function taking a URL (e.g. scraper.get_video_details)
+            urls: URLs to fetch
+            default: Result used for calls that still fail after all retries
+            is_failure: Optional check that marks a returned value as a failed
+                        attempt, for functions that report errors in their result
+
+        Returns:
+            Results in the same order as urls
+        """
+        futures = [self.executor.submit(self._call, fn, url, is_failure) for url in urls]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Error fetching after retries: {e}")
+                results.append(default)
+        return results
+
+    def fetch(self, fn: Callable[[str], Any], url: str,
+              is_failure: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Call fn for one URL on the calling thread.
+
+        The call shares the per-host caps, rate limit and retries of map, so
+        single fetches made by worker threads count against the same limits.
+
+        Args:
+            fn: Function taking a URL
+            url: URL to fetch
+            is_failure: Optional check that marks a returned value as a failed attempt
+
+        Returns:
+            Result of fn (raises the last error if every attempt failed)
+        """
+        return self._call(fn, url, is_failure)
+
+    def close(self) -> None:
+        """Wait for running calls and shut the thread pool down."""
+        self.executor.shutdown(wait=True)
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Get the concurrency semaphore for a URL's host."""
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self.host_slots[host]
+
+    def _call(self, fn: Callable[[str], Any], url: str,
+              is_failure: Optional[Callable[[Any], bool]]) -> Any:
+        """Call fn for one URL, retrying failed attempts with backoff."""
+        slot = self._host_slot(url)
+        attempt = 0
+
+        while True:
+            with slot:
+                self.bucket.acquire()
+                try:
+                    result = fn(url)
+                    error = None
+                except Exception as e:
+                    result = None
+                    error = e
+
+            failed = error is not None or (is_failure is not None and is_failure(result))
+            if not failed:
+                return result
+
+            if attempt >= self.retries:
+                if error is not None:
+                    raise error
+                # Keep the function's own failure value rather than discarding it
+                return result
+
+            delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+            time.sleep(delay * random.uniform(0.5, 1.0))
+            attempt += 1
@@ -0,0 +1,245 @@
+"""Landmark audio fingerprints for spotting re-uploads of the same audio."""
+
+from collections import Counter
+from typing import Dict, Any, Tuple, Iterable
+
+import numpy as np
+
+from db.db_setup import DatabaseManager
+from modules.audio_decode import stream_pcm, SAMPLE_RATE
+
+# Spectrogram of 8 kHz audio: 64 ms windows every 32 ms
+FFT_SIZE = 512
+HOP_SIZE = 256
+ANALYSIS_RATE = 8000
+HOP_SECONDS = HOP_SIZE / ANALYSIS_RATE
+
+
+def _spectrogram(pcm: np.ndarray) -> np.ndarray:
+    """Log-magnitude spectrogram (frames x bins) of 16 kHz PCM, computed at 8 kHz."""
+    # Average sample pairs: a cheap low-pass before halving the rate
+    even = len(pcm) - len(pcm) % 2
+    audio = pcm[:even].reshape(-1, 2).mean(axis=1)
+    if len(audio) < FFT_SIZE:
+        return np.zeros((0, FFT_SIZE // 2 + 1), dtype=np.float32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(audio, FFT_SIZE)[::HOP_SIZE]
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(FFT_SIZE), axis=1))
+    return np.log(spectrum + 1e-6).astype(np.float32)
+
+
+def _local_max(values: np.ndarray, radius: int, axis: int) -> np.ndarray:
+    """Maximum over a window of 2 * radius + 1 along an axis."""
+    pad = [(0, 0)] * values.ndim
+    pad[axis] = (radius, radius)
+    padded = np.pad(values, pad, mode="constant", constant_values=-np.inf)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=axis)
+    return windows.max(axis=-1)
+
+
+def find_peaks(spectrogram: np.ndarray, time_radius: int = 10, freq_radius: int = 12,
+               min_level: float = 2.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the spectral peaks of a spectrogram.
+
+    A peak is the largest value in its time/frequency neighbourhood and lies
+    clearly above the spectrogram's median level.
+
+    Args:
+        spectrogram: Log-magnitude spectrogram (frames x bins)
+        time_radius: Neighbourhood half-size in frames
+        freq_radius: Neighbourhood half-size in bins
+        min_level: Minimum height above the median (in log units)
+
+    Returns:
+        (frame indices, bin indices) of the peaks, sorted by frame
+    """
+    if spectrogram.size == 0:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+
+    neighbourhood = _local_max(_local_max(spectrogram, freq_radius, axis=1), time_radius, axis=0)
+    mask = (spectrogram == neighbourhood) & (spectrogram > np.median(spectrogram) + min_level)
+    frames, bins = np.nonzero(mask)
+    return frames.astype(np.int32), bins.astype(np.int32)
+
+
+def landmark_hashes(pcm: np.ndarray, fan_out: int = 5, max_delta: int = 63,
+                    frame_offset: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the landmark hashes of 16 kHz PCM.
+
+    Each peak is paired with a few peaks that follow it, and each pair is
+    hashed from the two frequencies and the time between them. The hashes
+    survive re-encoding, volume changes and trimmed intros.
+
+    Args:
+        pcm: 1-D float32 samples
+        fan_out: Number of following peaks each peak is paired with
+        max_delta: Maximum frames between the peaks of a pair (6 bits)
+        frame_offset: Frame index of the first sample, for PCM cut from a longer stream
+
+    Returns:
+        (hashes, frame offsets of the anchor peaks) as uint32 and int32 arrays
+    """
+    frames, bins = find_peaks(_spectrogram(pcm))
+    hashes = []
+    offsets = []
+
+    for k in range(1, fan_out + 1):
+        if len(frames) <= k:
+            break
+        delta = frames[k:] - frames[:-k]
+        valid = (delta > 0) & (delta <= max_delta)
+        # 9 bits per frequency bin and 6 bits for the time difference
+        hashes.append((bins[:-k][valid].astype(np.uint32) << 15)
+                      | (bins[k:][valid].astype(np.uint32) << 6)
+                      | delta[valid].astype(np.uint32))
+        offsets.append(frames[:-k][valid] + frame_offset)
+
+    if not hashes:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int32)
+    return np.concatenate(hashes), np.concatenate(offsets).astype(np.int32)
+
+
+def fingerprint_pcm(frames: Iterable[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fingerprint a stream of consecutive PCM frames.
+
+    Args:
+        frames: 16 kHz float32 frames (e.g. from stream_pcm)
+
+    Returns:
+        (hashes, frame offsets) of the whole stream
+    """
+    hashes = []
+    offsets = []
+    position = 0
+
+    for pcm in frames:
+        frame_hashes, frame_offsets = landmark_hashes(pcm, frame_offset=position // (2 * HOP_SIZE))
+        hashes.append(frame_hashes)
+        offsets.append(frame_offsets)
+        position += len(pcm)
+
+    if not hashes:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int32)
+    return np.concatenate(hashes), np.concatenate(offsets)
+
+
+class FingerprintIndex:
+    """
+    Stores audio fingerprints and finds earlier copies of the same audio.
+
+    Two recordings of the same audio share many hashes at a constant time
+    offset, while unrelated audio only shares a few scattered ones, so
+    matches are voted on by offset and a clear winner marks a duplicate.
+    """
+
+    def __init__(self, db_path: str, min_score: float = 0.05, min_matches: int = 20,
+                 lookup_batch: int = 500):
+        """
+        Initialize the index.
+
+        Args:
+            db_path: Path to SQLite database file
+            min_score: Share of a recording's hashes that must agree on one
+                       time offset for it to count as a duplicate
+            min_matches: Minimum number of agreeing hashes for a duplicate
+            lookup_batch: Hashes per index query
+        """
+        self.db_path = db_path
+        self.min_score = min_score
+        self.min_matches = min_matches
+        self.lookup_batch = lookup_batch
+
+    def fingerprint(self, audio_id: int, file_path: str) -> Dict[str, Any]:
+        """
+        Fingerprint audio and look it up in the index.
+
+        Audio that matches an indexed recording is marked as its duplicate.
+        Otherwise its hashes are added to the index. Audio fingerprinted
+        before is not decoded again.
+
+        Args:
+            audio_id: ID of the audio_files row
+            file_path: Path to the audio file
+
+        Returns:
+            Dictionary with "duplicate_of" (audio ID or None), "score" and
+            "time_shift" (seconds to subtract from the original's times to get
+            this audio's times)
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            existing = db.fetchone(
+                "SELECT duplicate_of, match_score, time_shift FROM audio_fingerprints WHERE audio_id = ?",
+                (audio_id,)
+            )
+            if existing:
+                return {"duplicate_of": existing[0], "score": existing[1], "time_shift": existing[2]}
+
+            hashes, offsets = fingerprint_pcm(stream_pcm(file_path, 60.0, SAMPLE_RATE))
+            match = self._match(db, audio_id, hashes, offsets)
+
+            conn = db.get_connection()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO audio_fingerprints (audio_id, hash_count, duplicate_of, match_score, time_shift)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (audio_id, len(hashes), match["duplicate_of"], match["score"], match["time_shift"])
+            )
+            # Only originals are indexed; a duplicate is found through its original
+            if match["duplicate_of"] is None:
+                conn.executemany(
+                    "INSERT INTO fingerprint_hashes (hash, audio_id, offset) VALUES (?, ?, ?)",
+                    zip(hashes.tolist(), [audio_id] * len(hashes), offsets.tolist())
+                )
+            conn.commit()
+
+            return match
+        finally:
+            db.close()
+
+    def _match(self, db: DatabaseManager, audio_id: int, hashes: np.ndarray,
+               offsets: np.ndarray) -> Dict[str, Any]:
+        """Vote for the indexed recording and time offset that share the most hashes."""
+        no_match = {"duplicate_of": None, "score": None, "time_shift": None}
+        if len(hashes) == 0:
+            return no_match
+
+        # Query offsets of each hash (a hash can occur several times in one recording)
+        query_offsets: Dict[int, list] = {}
+        for value, offset in zip(hashes.tolist(), offsets.tolist()):
+            query_offsets.setdefault(value, []).append(offset)
+
+        votes: Counter = Counter()
+        unique = list(query_offsets)
+        for i in range(0, len(unique), self.lookup_batch):
+            batch = unique[i:i + self.lookup_batch]
+            rows = db.fetchall(
+                f"""
+                SELECT hash, audio_id, offset FROM fingerprint_hashes
+                WHERE hash IN ({','.join('?' * len(batch))}) AND audio_id != ?
+                """,
+                tuple(batch) + (audio_id,)
+            )
+            for value, candidate, offset in rows:
+                for query_offset in query_offsets[value]:
+                    votes[(candidate, offset - query_offset)] += 1
+
+        if not votes:
+            return no_match
+
+        # Re-encoding can move peaks by a frame, so neighbouring offsets vote together
+        (candidate, shift), count = max(
+            (((candidate, shift), votes[(candidate, shift - 1)] + count + votes[(candidate, shift + 1)])
+             for (candidate, shift), count in list(votes.items())),
+            key=lambda item: item[1]
+        )
+        score = count / len(hashes)
+        if count < self.min_matches or score < self.min_score:
+            return no_match
+
+        return {"duplicate_of": candidate, "score": round(score, 4),
+                "time_shift": round(shift * HOP_SECONDS, 3)}
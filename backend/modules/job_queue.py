@@ -0,0 +1,394 @@
+import os
+import json
+import time
+import queue
+import socket
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, Hashable
+
+from db.db_setup import DatabaseManager
+
+# Priority classes, lower value is served first
+PRIORITY_INTERACTIVE = 0  # One-off requests made by a moderator (e.g. /api/process/video)
+PRIORITY_BULK = 1  # Channel crawls and the per-video sub-jobs they fan out into
+PRIORITY_BACKGROUND = 2  # Automatic re-crawls issued by the refresh scheduler
+
+
+class _Flow:
+    """Jobs queued by a single submitter or channel within one priority class."""
+
+    def __init__(self, weight: float):
+        self.jobs = deque()
+        self.weight = weight
+        self.pass_value = 0.0
+
+
+class JobQueue:
+    """
+    Priority job queue with weighted fair queueing between submitters.
+
+    Jobs are served strictly by priority class. Within a class every fair key
+    (submitter, channel, ...) gets its own flow and flows are served by stride
+    scheduling: each dequeue advances the flow's pass value by 1/weight and the
+    non-empty flow with the smallest pass value goes next. A 500-video crawl
+    therefore interleaves with other channels instead of blocking them.
+
+    The interface mirrors queue.Queue (put/get/task_done/qsize) so the worker
+    loop in app.py can use it as a drop-in replacement.
+    """
+
+    # Jobs are lost when the process exits; app.py re-queues them from checkpoints
+    durable = False
+
+    def __init__(self):
+        """Initialize an empty job queue."""
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+        self._classes: Dict[int, Dict[Hashable, _Flow]] = {}
+        self._virtual_time: Dict[int, float] = {}
+        self._size = 0
+        self._unfinished = 0
+
+    def put(self, job: Dict[str, Any], priority: int = PRIORITY_BULK,
+            fair_key: Optional[Hashable] = None, weight: float = 1.0) -> None:
+        """
+        Add a job to the queue.
+
+        Args:
+            job: Job dictionary (must be JSON-like, e.g. {"id", "type", "params"})
+            priority: Priority class (PRIORITY_INTERACTIVE, PRIORITY_BULK or PRIORITY_BACKGROUND)
+            fair_key: Key used to share capacity fairly (submitter or channel)
+            weight: Relative share of the flow within its priority class
+        """
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+
+        with self._lock:
+            flows = self._classes.setdefault(priority, {})
+            flow = flows.get(fair_key)
+
+            if flow is None:
+                # A new flow starts at the current virtual time so it can neither
+                # starve existing flows nor be starved by their accumulated credit
+                flow = _Flow(weight)
+                flow.pass_value = self._virtual_time.get(priority, 0.0)
+                flows[fair_key] = flow
+            else:
+                flow.weight = weight
+
+            flow.jobs.append(job)
+            self._size += 1
+            self._unfinished += 1
+            self._not_empty.notify()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Remove and return the next job.
+
+        Args:
+            block: Whether to wait for a job if the queue is empty
+            timeout: Maximum time to wait in seconds (None waits forever)
+
+        Returns:
+            The next job dictionary
+
+        Raises:
+            queue.Empty: If no job became available
+        """
+        with self._not_empty:
+            if not block:
+                if self._size == 0:
+                    raise queue.Empty
+            elif not self._not_empty.wait_for(lambda: self._size > 0, timeout):
+                raise queue.Empty
+
+            return self._pop_next()
+
+    def _pop_next(self) -> Dict[str, Any]:
+        """Pop the next job. Must be called with the lock held and the queue non-empty."""
+        priority = min(p for p, flows in self._classes.items() if flows)
+        flows = self._classes[priority]
+
+        fair_key, flow = min(flows.items(), key=lambda item: item[1].pass_value)
+        job = flow.jobs.popleft()
+
+        self._virtual_time[priority] = flow.pass_value
+        flow.pass_value += 1.0 / flow.weight
+
+        # Drop idle flows so finished channels don't accumulate
+        if not flow.jobs:
+            del flows[fair_key]
+
+        self._size -= 1
+        return job
+
+    def task_done(self) -> None:
+        """Mark a previously fetched job as finished."""
+        with self._lock:
+            if self._unfinished <= 0:
+                raise ValueError("task_done() called too many times")
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._all_done.notify_all()
+
+    def join(self) -> None:
+        """Block until every job put in the queue has been marked done."""
+        with self._all_done:
+            self._all_done.wait_for(lambda: self._unfinished == 0)
+
+    def qsize(self) -> int:
+        """Return the number of queued jobs."""
+        with self._lock:
+            return self._size
+
+    def stats(self) -> Dict[int, Dict[str, int]]:
+        """
+        Get queue depth per priority class.
+
+        Returns:
+            Dictionary mapping priority class to queued job and flow counts
+        """
+        with self._lock:
+            return {
+                priority: {
+                    "queued": sum(len(flow.jobs) for flow in flows.values()),
+                    "flows": len(flows)
+                }
+                for priority, flows in self._classes.items()
+            }
+
+
+class SharedJobQueue:
+    """
+    Job queue in the database, shared by pipeline worker processes.
+
+    Same interface and scheduling as JobQueue. Each job gets its stride
+    scheduling pass value when it is queued: the previous job of its flow
+    plus 1/weight, or the class's virtual time for a new flow. Workers claim
+    the queued job with the lowest (priority, pass value) in an immediate
+    transaction, so no two processes get the same job. Claimed jobs stay in
+    the table until task_done, so the jobs of a crashed worker can be handed
+    out again with release_claims.
+    """
+
+    # Jobs stay in the database across restarts
+    durable = True
+
+    def __init__(self, db_path: str, poll_interval: float = 0.5):
+        """
+        Initialize the queue.
+
+        Args:
+            db_path: Path to SQLite database file
+            poll_interval: Seconds between checks for new jobs while get() waits
+        """
+        self.db_path = db_path
+        self.db = DatabaseManager(db_path)
+        self.poll_interval = poll_interval
+        # Jobs claimed by each worker thread, for task_done
+        self.local = threading.local()
+
+    @staticmethod
+    def worker_id(pid: Optional[int] = None) -> str:
+        """
+        Name under which a process claims jobs.
+
+        Args:
+            pid: Process ID (default: the current process)
+
+        Returns:
+            "host:pid" string
+        """
+        return f"{socket.gethostname()}:{pid or os.getpid()}"
+
+    def put(self, job: Dict[str, Any], priority: int = PRIORITY_BULK,
+            fair_key: Optional[Hashable] = None, weight: float = 1.0) -> None:
+        """
+        Add a job to the queue.
+
+        Args:
+            job: JSON-serializable job dictionary
+            priority: Priority class (PRIORITY_INTERACTIVE, PRIORITY_BULK or PRIORITY_BACKGROUND)
+            fair_key: Key used to share capacity fairly (submitter or channel)
+            weight: Relative share of the flow within its priority class
+        """
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+
+        fair_key = None if fair_key is None else str(fair_key)
+
+        db = self.db
+        try:
+            conn = db.get_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                clock = conn.execute("SELECT virtual_time FROM job_queue_clock WHERE priority = ?",
+                                     (priority,)).fetchone()
+                last = conn.execute(
+                    """
+                    SELECT MAX(pass_value) FROM job_queue
+                    WHERE priority = ? AND fair_key IS ? AND claimed_by IS NULL
+                    """,
+                    (priority, fair_key)
+                ).fetchone()[0]
+
+                # A new flow starts at the current virtual time, like in JobQueue
+                virtual_time = clock[0] if clock else 0.0
+                pass_value = last + 1.0 / weight if last is not None else virtual_time
+
+                conn.execute(
+                    "INSERT INTO job_queue (job, priority, fair_key, pass_value) VALUES (?, ?, ?, ?)",
+                    (json.dumps(job, ensure_ascii=False), priority, fair_key, pass_value)
+                )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        finally:
+            db.close()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Claim and return the next job.
+
+        Args:
+            block: Whether to wait for a job if the queue is empty
+            timeout: Maximum time to wait in seconds (None waits forever)
+
+        Returns:
+            The next job dictionary
+
+        Raises:
+            queue.Empty: If no job became available
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            job = self._claim()
+            if job is not None:
+                return job
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                raise queue.Empty
+            wait = self.poll_interval
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - time.monotonic()))
+            time.sleep(wait)
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Claim the next queued job for this worker, if there is one."""
+        db = self.db
+        try:
+            conn = db.get_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    """
+                    SELECT id, job, priority, pass_value FROM job_queue
+                    WHERE claimed_by IS NULL
+                    ORDER BY priority, pass_value, id LIMIT 1
+                    """
+                ).fetchone()
+                if row is None:
+                    conn.rollback()
+                    return None
+
+                job_row_id, job, priority, pass_value = row
+                conn.execute(
+                    "UPDATE job_queue SET claimed_by = ?, claimed_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (self.worker_id(), job_row_id)
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO job_queue_clock (priority, virtual_time) VALUES (?, ?)",
+                    (priority, pass_value)
+                )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        finally:
+            db.close()
+
+        self._claimed().append(job_row_id)
+        return json.loads(job)
+
+    def _claimed(self) -> list:
+        """Row IDs of the jobs claimed by the current thread and not yet done."""
+        if not hasattr(self.local, "claimed"):
+            self.local.claimed = []
+        return self.local.claimed
+
+    def task_done(self) -> None:
+        """Mark the job most recently fetched by this thread as finished."""
+        claimed = self._claimed()
+        if not claimed:
+            raise ValueError("task_done() called too many times")
+
+        db = self.db
+        try:
+            db.execute("DELETE FROM job_queue WHERE id = ?", (claimed.pop(),))
+            db.get_connection().commit()
+        finally:
+            db.close()
+
+    def join(self) -> None:
+        """Block until every job put in the queue has been marked done."""
+        while self._count("1 = 1"):
+            time.sleep(self.poll_interval)
+
+    def qsize(self) -> int:
+        """Return the number of queued (unclaimed) jobs."""
+        return self._count("claimed_by IS NULL")
+
+    def stats(self) -> Dict[int, Dict[str, int]]:
+        """
+        Get queue depth per priority class.
+
+        Returns:
+            Dictionary mapping priority class to queued job and flow counts
+        """
+        db = self.db
+        try:
+            rows = db.fetchall(
+                """
+                SELECT priority, COUNT(*), COUNT(DISTINCT IFNULL(fair_key, ''))
+                FROM job_queue WHERE claimed_by IS NULL
+                GROUP BY priority
+                """
+            )
+        finally:
+            db.close()
+
+        return {priority: {"queued": queued, "flows": flows} for priority, queued, flows in rows}
+
+    def release_claims(self, worker: Optional[str] = None) -> int:
+        """
+        Put claimed jobs back in the queue (after their worker stopped without finishing them).
+
+        Args:
+            worker: Worker ID as returned by worker_id (None releases every claim)
+
+        Returns:
+            Number of released jobs
+        """
+        db = self.db
+        try:
+            if worker is None:
+                cursor = db.execute("UPDATE job_queue SET claimed_by = NULL, claimed_at = NULL "
+                                    "WHERE claimed_by IS NOT NULL")
+            else:
+                cursor = db.execute("UPDATE job_queue SET claimed_by = NULL, claimed_at = NULL "
+                                    "WHERE claimed_by = ?", (worker,))
+            db.get_connection().commit()
+            return cursor.rowcount
+        finally:
+            db.close()
+
+    def _count(self, where: str) -> int:
+        """Count job rows matching a WHERE clause."""
+        db = self.db
+        try:
+            return db.fetchone(f"SELECT COUNT(*) FROM job_queue WHERE {where}")[0]
+        finally:
+            db.close()
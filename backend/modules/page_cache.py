@@ -0,0 +1,260 @@
+"""Content-addressed on-disk cache of fetched pages and API responses."""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import requests
+
+
+class CacheMiss(requests.RequestException):
+    """Raised in replay mode for requests that are not in the cache."""
+
+
+class PageCache:
+    """
+    Content-addressed gzip cache of response bodies keyed by request and time bucket.
+
+    Bodies live in objects/<2 hex>/<sha256 of body>.gz, stored once however
+    many requests returned them; refs/<sha256 of request>/<bucket>.json names
+    the object a request returned in each time bucket. In replay mode lookups
+    use the newest snapshot regardless of age and misses raise CacheMiss.
+    """
+
+    def __init__(self, root: str, ttl: float = 24 * 3600, bucket_seconds: float = 3600,
+                 replay: bool = False):
+        """
+        Initialize the cache.
+
+        Args:
+            root: Cache directory
+            ttl: Seconds a snapshot is served before the request is refetched
+            bucket_seconds: Length of a time bucket in seconds
+            replay: Serve only from the cache, never from the network
+        """
+        self.root = root
+        self.ttl = ttl
+        self.bucket_seconds = bucket_seconds
+        self.replay = replay
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "refs"), exist_ok=True)
+
+    @staticmethod
+    def request_key(url: str, payload: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Compute the cache key of a request.
+
+        Args:
+            url: Request URL
+            payload: JSON body of a POST request
+
+        Returns:
+            Hex digest identifying the request
+        """
+        material = url
+        if payload is not None:
+            material += "\n" + json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, url: str, payload: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Look up the newest snapshot of a request.
+
+        Args:
+            url: Request URL
+            payload: JSON body of a POST request
+
+        Returns:
+            Cached body, or None if there is no fresh snapshot
+        """
+        ref_dir = os.path.join(self.root, "refs", self.request_key(url, payload))
+        body = None
+
+        try:
+            buckets = sorted(os.listdir(ref_dir), reverse=True)
+        except FileNotFoundError:
+            buckets = []
+
+        for name in buckets:
+            try:
+                with open(os.path.join(ref_dir, name), "r", encoding="utf-8") as f:
+                    ref = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            if not self.replay and time.time() - ref["fetched_at"] > self.ttl:
+                break
+
+            body = self._read_object(ref["object"])
+            if body is not None:
+                break
+
+        with self.lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def put(self, url: str, body: str, payload: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Store a response body as the current bucket's snapshot of a request.
+
+        Args:
+            url: Request URL
+            body: Response body
+            payload: JSON body of a POST request
+
+        Returns:
+            Digest of the stored object
+        """
+        data = body.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            self._write_atomic(object_path, gzip.compress(data))
+
+        now = time.time()
+        ref_dir = os.path.join(self.root, "refs", self.request_key(url, payload))
+        os.makedirs(ref_dir, exist_ok=True)
+        ref = {"url": url, "object": digest, "fetched_at": now}
+        if payload is not None:
+            ref["payload"] = payload
+        bucket = int(now // self.bucket_seconds)
+        self._write_atomic(os.path.join(ref_dir, f"{bucket:012d}.json"),
+                           json.dumps(ref, ensure_ascii=False).encode("utf-8"))
+
+        return digest
+
+    def evict(self) -> int:
+        """
+        Remove expired refs and objects no remaining ref points to.
+
+        Returns:
+            Number of objects removed
+        """
+        now = time.time()
+        live = set()
+        refs_root = os.path.join(self.root, "refs")
+
+        for key in os.listdir(refs_root):
+            ref_dir = os.path.join(refs_root, key)
+            for name in os.listdir(ref_dir):
+                path = os.path.join(ref_dir, name)
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        ref = json.load(f)
+                except (OSError, ValueError):
+                    os.remove(path)
+                    continue
+
+                if now - ref["fetched_at"] > self.ttl:
+                    os.remove(path)
+                else:
+                    live.add(ref["object"])
+
+            if not os.listdir(ref_dir):
+                os.rmdir(ref_dir)
+
+        removed = 0
+        objects_root = os.path.join(self.root, "objects")
+        for prefix in os.listdir(objects_root):
+            prefix_dir = os.path.join(objects_root, prefix)
+            for name in os.listdir(prefix_dir):
+                if name[:-len(".gz")] not in live:
+                    os.remove(os.path.join(prefix_dir, name))
+                    removed += 1
+
+            if not os.listdir(prefix_dir):
+                os.rmdir(prefix_dir)
+
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache usage statistics.
+
+        Returns:
+            Dictionary with hit and miss counts and the replay flag
+        """
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "replay": self.replay}
+
+    def _object_path(self, digest: str) -> str:
+        """Path of the object with the given digest."""
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.gz")
+
+    def _read_object(self, digest: str) -> Optional[str]:
+        """Read and decompress an object."""
+        try:
+            with open(self._object_path(digest), "rb") as f:
+                return gzip.decompress(f.read()).decode("utf-8")
+        except (OSError, EOFError):
+            return None
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes) -> None:
+        """Write a file so readers never see it half written."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class CachingTransport:
+    """Transport wrapper that serves requests from a PageCache before the network."""
+
+    def __init__(self, transport: Any, cache: PageCache):
+        """
+        Initialize the caching transport.
+
+        Args:
+            transport: Underlying transport (e.g. RequestsTransport)
+            cache: Page cache
+        """
+        self.transport = transport
+        self.cache = cache
+
+    @property
+    def session(self) -> requests.Session:
+        """Session of the underlying transport."""
+        return self.transport.session
+
+    def get_text(self, url: str, headers: Optional[Dict[str, str]] = None) -> str:
+        """GET a page, from the cache when possible."""
+        body = self.cache.get(url)
+        if body is not None:
+            return body
+        if self.cache.replay:
+            raise CacheMiss(f"{url} is not in the page cache")
+
+        body = self.transport.get_text(url, headers)
+        self.cache.put(url, body)
+        return body
+
+    def post_json(self, url: str, payload: Dict[str, Any],
+                  headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """POST a JSON payload, from the cache when possible."""
+        body = self.cache.get(url, payload)
+        if body is not None:
+            return json.loads(body)
+        if self.cache.replay:
+            raise CacheMiss(f"{url} is not in the page cache")
+
+        response = self.transport.post_json(url, payload, headers)
+        self.cache.put(url, json.dumps(response, ensure_ascii=False), payload)
+        return response
+
+    def close(self) -> None:
+        """Close the underlying transport."""
+        self.transport.close()
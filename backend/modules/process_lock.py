@@ -0,0 +1,65 @@
+"""Locks shared by the threads of one process and by other processes on the host."""
+
+import os
+import threading
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class ProcessLock:
+    """
+    Reentrant lock held across threads and processes.
+
+    Adds an exclusive fcntl.flock on a lock file to a thread lock. Without
+    fcntl (Windows) the server runs as a single process and only the thread
+    lock is used.
+
+    The lock file is opened and locked by the outermost acquisition of a
+    thread and closed again when that thread releases it.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the lock.
+
+        Args:
+            path: Lock file; created if missing and never deleted
+        """
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.fd: Optional[int] = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def __enter__(self) -> "ProcessLock":
+        self.thread_lock.acquire()
+        if self.depth == 0 and fcntl is not None:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            except BaseException:
+                self.thread_lock.release()
+                raise
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                os.close(fd)
+                self.thread_lock.release()
+                raise
+            self.fd = fd
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.depth -= 1
+        if self.depth == 0 and self.fd is not None:
+            try:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self.fd)
+                self.fd = None
+        self.thread_lock.release()
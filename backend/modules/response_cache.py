@@ -0,0 +1,114 @@
+"""In-process cache of serialized API responses, invalidated by data versions."""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from db.db_setup import DatabaseManager
+
+
+class CachedResponse:
+    """Serialized body of a response with its ETag and the data versions it reflects."""
+
+    __slots__ = ("body", "etag", "versions", "expires")
+
+    def __init__(self, body: bytes, versions: Tuple[int, ...], expires: float):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()
+        self.versions = versions
+        self.expires = expires
+
+
+class ResponseCache:
+    """
+    Caches response bodies keyed by request and invalidated by data versions.
+
+    Versions come from the data_versions table, whose counters are bumped by
+    triggers, so writes from any process invalidate the responses showing
+    them. Within the TTL an entry is served without touching the database;
+    after that one query compares its versions with the current ones.
+    """
+
+    def __init__(self, db_path: str, ttl: float = 5.0, max_entries: int = 1000):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: Path to SQLite database file
+            ttl: Seconds an entry is served before its data versions are checked again
+            max_entries: Maximum number of cached responses (least recently used are dropped)
+        """
+        self.db = DatabaseManager(db_path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def versions(self, entities: List[str]) -> Tuple[int, ...]:
+        """
+        Read the current versions of some entities.
+
+        Args:
+            entities: Table names ('channels') or rows ('video:42')
+
+        Returns:
+            Version of each entity in the same order (0 if it never changed)
+        """
+        rows = self.db.fetchall(
+            f"SELECT entity, version FROM data_versions WHERE entity IN ({','.join('?' * len(entities))})",
+            tuple(entities)
+        )
+        current = dict(rows)
+        return tuple(current.get(entity, 0) for entity in entities)
+
+    def get(self, key: Hashable, entities: List[str],
+            build: Callable[[], Optional[bytes]]) -> Optional[CachedResponse]:
+        """
+        Return the cached response of a request, building it if needed.
+
+        Args:
+            key: Request key (route and query parameters)
+            entities: Data the response is built from (see versions)
+            build: Builds the response body; returns None for responses that
+                   must not be cached (e.g. errors)
+
+        Returns:
+            Cached response, or None if build declined to cache
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                if now < entry.expires:
+                    self.hits += 1
+                    return entry
+
+        # Read the versions before building, so a write during the build leaves the entry stale
+        versions = self.versions(entities)
+        if entry is not None and entry.versions == versions:
+            entry.expires = now + self.ttl
+            with self.lock:
+                self.hits += 1
+            return entry
+
+        body = build()
+        with self.lock:
+            self.misses += 1
+            if body is None:
+                return None
+            entry = CachedResponse(body, versions, now + self.ttl)
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            return entry
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of entries, hits and misses."""
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
@@ -1,108 +1,345 @@
-# import os
-# from pydub import AudioSegment
-# import torch
-# import warnings
-# from transformers import pipeline
-# warnings.filterwarnings("ignore")
-
-# def convert_mp3_to_wav(mp3_path):
-#     """
-#     Convert an MP3 file to WAV format using pydub
-    
-#     Parameters:
-#     mp3_path (str): Path to the MP3 file
-    
-#     Returns:
-#     str: Path to the converted WAV file
-#     """
-#     wav_path = os.path.splitext(mp3_path)[0] + ".wav"
-    
-#     # Load the MP3 file
-#     sound = AudioSegment.from_mp3(mp3_path)
-    
-#     # Convert to 16kHz sample rate (required for Whisper models)
-#     sound = sound.set_frame_rate(16000)
-    
-#     # Export as WAV
-#     sound.export(wav_path, format="wav")
-    
-#     return wav_path
-
-# def transcribe_vietnamese_audio(file_path, chunk_size=None):
-#     """
-#     Transcribe Vietnamese speech from an audio file using VINAI/PhoWhisper-medium.
-    
-#     Parameters:
-#     file_path (str): Path to the audio file (WAV or MP3)
-#     chunk_size (int, optional): Size of audio chunks in milliseconds for chunking long audio
-    
-#     Returns:
-#     dict: Dictionary containing success status, error (if any), and transcription
-#     """
-#     # Set up the response object
-#     response = {
-#         "success": True,
-#         "error": None,
-#         "transcription": None
-#     }
-    
-#     # Check if the file is MP3, convert to WAV if needed
-#     if file_path.lower().endswith('.mp3'):
-#         print(f"Đang chuyển đổi tệp MP3 sang định dạng WAV 16kHz...")
-#         file_path = convert_mp3_to_wav(file_path)
-    
-#     try:
-        
-#         # Create the pipeline with the PhoWhisper model
-#         # Enable return_timestamps for long audio files
-#         transcriber = pipeline("automatic-speech-recognition", 
-#                                model="vinai/PhoWhisper-medium",
-#                                chunk_length_s=30,  # Process 30 seconds at a time
-#                                return_timestamps=True)  # Enable timestamp tokens for long audio
-        
-#         # Transcribe the audio
-#         print(f"Đang phiên âm tệp: {file_path}...")
-#         output = transcriber(file_path)
-        
-#         # Extract the transcription text
-#         # If output is a dictionary with 'text' key, use that
-#         if isinstance(output, dict) and 'text' in output:
-#             response["transcription"] = output['text']
-#         # If output is a dictionary with 'chunks' key, combine the text from all chunks
-#         elif isinstance(output, dict) and 'chunks' in output:
-#             chunks_text = [chunk['text'] for chunk in output['chunks']]
-#             response["transcription"] = ' '.join(chunks_text)
-#         # Fallback case - try to convert output to string
-#         else:
-#             response["transcription"] = str(output)
-        
-#     except Exception as e:
-#         response["success"] = False
-#         response["error"] = f"Lỗi xử lý: {str(e)}"
-        
-#         # Provide more specific error details and help
-#         if "CUDA" in str(e):
-#             response["error"] += "\nLỗi liên quan đến GPU. Thử thêm: device='cpu' khi tải mô hình."
-#         elif "Memory" in str(e) or "memory" in str(e):
-#             response["error"] += "\nLỗi thiếu bộ nhớ. Thử mô hình nhỏ hơn như 'base' hoặc sử dụng thiết bị có nhiều RAM hơn."
-    
-#     return response
-
-# if __name__ == "__main__":
-#     import argparse
-    
-#     # Create argument parser
-#     parser = argparse.ArgumentParser(description='Phiên âm tiếng Việt từ tệp âm thanh sử dụng VINAI/PhoWhisper-medium')
-#     parser.add_argument('--file-path', type=str, help='Đường dẫn đến tệp âm thanh (WAV hoặc MP3)')
-    
-#     # Parse arguments
-#     args = parser.parse_args()
-    
-#     # Call the transcribe function
-#     print(f"Đang chuẩn bị phiên âm tệp âm thanh: {args.file_path}")
-#     result = transcribe_vietnamese_audio(args.file_path)
-    
-#     # Display the results
-#     if result["success"] and result["transcription"]:
-#         print("\nPhiên âm:")
-#         print(result["transcription"])
\ No newline at end of file
+import queue
+import threading
+import time
+import warnings
+from concurrent.futures import Future
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple, Union
+
+import numpy as np
+import torch
+from transformers import AutoProcessor, AutoModelForSpeechSeq2Seq
+
+from modules.audio_decode import stream_pcm, AudioDecodeError, SAMPLE_RATE
+from modules.vad import EnergyVAD, Piece, pack_speech, source_time
+
+warnings.filterwarnings("ignore")
+
+
+class TranscriptionEngine:
+    """
+    Vietnamese speech-to-text with a PhoWhisper model that is loaded once.
+
+    Audio is decoded as a stream of 30-second chunks (Whisper's input window).
+    Chunks from one or many files are transcribed in batches, and each chunk
+    is split into timestamped segments, so long files never need to be held
+    in memory and the model is reused for every file. Chunks submitted by
+    several threads (e.g. one per video being processed) are collected by one
+    batcher thread, so a model call batches chunks of all running
+    transcriptions instead of each caller's own. With a voice activity
+    detector, silence and quiet passages are cut out and the remaining speech
+    is packed into the chunks, so fewer chunks go through the model.
+    """
+
+    def __init__(self, model_name: str = "vinai/PhoWhisper-medium", device: Optional[str] = None,
+                 batch_size: int = 8, chunk_seconds: float = 30.0, quantize: bool = False,
+                 num_threads: Optional[int] = None, language: Optional[str] = "vi",
+                 vad: Optional[EnergyVAD] = None, batch_wait: float = 0.05):
+        """
+        Load the model.
+
+        Args:
+            model_name: PhoWhisper variant (vinai/PhoWhisper-tiny, -base, -small, -medium or -large);
+                        smaller variants are much faster on CPU
+            device: 'cuda' or 'cpu' (default: cuda if available)
+            batch_size: Number of chunks transcribed per model call
+            chunk_seconds: Length of the audio chunks in seconds (at most 30)
+            quantize: Quantize linear layers to int8 (CPU only)
+            num_threads: Number of CPU threads used by torch (default: torch's choice)
+            language: Language forced on the decoder (None lets the model detect it)
+            vad: Optional voice activity detector; only detected speech is transcribed
+            batch_wait: Seconds the batcher waits for more submitted chunks before it
+                        runs a batch that is not full
+        """
+        self.model_name = model_name
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.batch_size = batch_size
+        self.chunk_seconds = min(chunk_seconds, 30.0)
+        self.language = language
+        self.vad = vad
+        self.batch_wait = batch_wait
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        dtype = torch.float16 if self.device == "cuda" else torch.float32
+        self.processor = AutoProcessor.from_pretrained(model_name)
+        self.model = AutoModelForSpeechSeq2Seq.from_pretrained(model_name, torch_dtype=dtype)
+        self.model.eval()
+
+        if quantize and self.device == "cpu":
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.model.to(self.device)
+
+        # One model call at a time when the engine is shared between worker threads
+        self.lock = threading.Lock()
+
+        # Chunks submitted by all callers, batched by a single thread
+        self.submitted: queue.Queue = queue.Queue()
+        threading.Thread(target=self._batch_submitted, daemon=True, name="transcriber").start()
+
+    def transcribe_file(self, file_path: str) -> Dict[str, Any]:
+        """
+        Transcribe one audio file.
+
+        Args:
+            file_path: Path to the audio file (any format ffmpeg can read)
+
+        Returns:
+            Dictionary with "success", "error", "transcription" (full text),
+            "segments" (list of {"start", "end", "text"} with times in seconds
+            of the original audio), "audio_seconds" and "speech_seconds"
+            (audio actually sent to the model)
+        """
+        for _, result in self.transcribe_many([(file_path, file_path)]):
+            return result
+        return self._empty_result()
+
+    def transcribe_many(self, files: Iterable[Tuple[Any, str]]) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+        """
+        Transcribe several audio files, batching chunks across file boundaries.
+
+        Args:
+            files: (key, source) pairs; the key identifies the file in the results and
+                   the source is anything chunks accepts
+
+        Yields:
+            (key, result) pairs in input order, each as soon as its file is done;
+            result has the same fields as transcribe_file
+        """
+        results: Dict[Any, Dict[str, Any]] = {}
+        pending: List[Tuple[Any, List[Piece], np.ndarray]] = []
+        finished: List[Any] = []
+
+        for key, source in files:
+            results[key] = self._empty_result()
+            try:
+                for pieces, pcm in self.chunks(source, results[key]):
+                    results[key]["speech_seconds"] += len(pcm) / SAMPLE_RATE
+                    pending.append((key, pieces, pcm))
+                    if len(pending) >= self.batch_size:
+                        self._run_batch(pending, results)
+                        pending = []
+                        # Every file read to the end before this batch is now complete
+                        yield from self._pop_finished(finished, results)
+            except AudioDecodeError as e:
+                results[key]["success"] = False
+                results[key]["error"] = str(e)
+            finished.append(key)
+
+        if pending:
+            self._run_batch(pending, results)
+        yield from self._pop_finished(finished, results)
+
+    def submit(self, chunk: Tuple[List[Piece], np.ndarray]) -> Future:
+        """
+        Queue a decoded chunk for the shared batcher.
+
+        Args:
+            chunk: (pieces, pcm) pair as yielded by chunks
+
+        Returns:
+            Future of the chunk's segments (as returned by transcribe_pcm for one chunk)
+        """
+        future: Future = Future()
+        self.submitted.put((chunk, future))
+        return future
+
+    def transcribe_pcm(self, chunks: List[Tuple[List[Piece], np.ndarray]]) -> List[List[Dict[str, Any]]]:
+        """
+        Transcribe already decoded chunks in one model call.
+
+        Args:
+            chunks: (pieces, 16 kHz float32 samples of at most chunk_seconds) pairs, where
+                    pieces map chunk time to source time (see modules.vad)
+
+        Returns:
+            Segments of each chunk, with times relative to the start of the source
+        """
+        features = self.processor.feature_extractor(
+            [pcm for _, pcm in chunks], sampling_rate=SAMPLE_RATE, return_tensors="pt"
+        ).input_features.to(self.device, dtype=self.model.dtype)
+
+        generate_kwargs = {"return_timestamps": True}
+        if self.language:
+            generate_kwargs.update(language=self.language, task="transcribe")
+
+        with self.lock, torch.inference_mode():
+            token_ids = self.model.generate(features, **generate_kwargs)
+
+        decoded = self.processor.tokenizer.batch_decode(
+            token_ids, skip_special_tokens=True, output_offsets=True
+        )
+
+        segments = []
+        for (pieces, pcm), output in zip(chunks, decoded):
+            chunk_length = len(pcm) / SAMPLE_RATE
+            chunk_segments = []
+            for item in output.get("offsets", []):
+                text = item["text"].strip()
+                if not text:
+                    continue
+                start, end = item["timestamp"]
+                end = chunk_length if end is None else min(end, chunk_length)
+                chunk_segments.append({
+                    "start": round(source_time(pieces, start or 0.0), 2),
+                    "end": round(source_time(pieces, end), 2),
+                    "text": text
+                })
+
+            # Without timestamp tokens the whole chunk is one segment
+            if not chunk_segments and output["text"].strip():
+                chunk_segments.append({"start": round(source_time(pieces, 0.0), 2),
+                                       "end": round(source_time(pieces, chunk_length), 2),
+                                       "text": output["text"].strip()})
+            segments.append(chunk_segments)
+
+        return segments
+
+    def chunks(self, source: Union[str, Iterable[np.ndarray]], result: Dict[str, Any],
+               start: float = 0.0) -> Iterator[Tuple[List[Piece], np.ndarray]]:
+        """
+        Decode a file into model-sized chunks, keeping only speech when a VAD is set.
+
+        Args:
+            source: Path to the audio file, or 16 kHz PCM frames of at most
+                    chunk_seconds (e.g. from AudioStore.stream_pcm)
+            result: Dictionary whose "audio_seconds" is increased as audio is decoded
+            start: Source time in seconds to start at (e.g. to resume a transcription);
+                   files are decoded from there, PCM frames must already start there
+
+        Yields:
+            (pieces, pcm) pairs accepted by transcribe_pcm
+        """
+        def frames() -> Iterator[np.ndarray]:
+            if isinstance(source, str):
+                decoded = stream_pcm(source, self.chunk_seconds, start=start or None)
+            else:
+                decoded = source
+            for pcm in decoded:
+                result["audio_seconds"] += len(pcm) / SAMPLE_RATE
+                yield pcm
+
+        if self.vad is not None:
+            for pieces, pcm in pack_speech(frames(), self.vad, self.chunk_seconds):
+                yield [(chunk_start, start + source_start, length)
+                       for chunk_start, source_start, length in pieces], pcm
+            return
+
+        offset = start
+        for pcm in frames():
+            length = len(pcm) / SAMPLE_RATE
+            yield [(0.0, offset, length)], pcm
+            offset += length
+
+    def _batch_submitted(self) -> None:
+        """Transcribe submitted chunks in batches of up to batch_size, whoever submitted them."""
+        while True:
+            batch = [self.submitted.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.submitted.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            try:
+                batch_segments = self.transcribe_pcm([chunk for chunk, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), segments in zip(batch, batch_segments):
+                future.set_result(segments)
+
+    def _run_batch(self, batch: List[Tuple[Any, List[Piece], np.ndarray]],
+                   results: Dict[Any, Dict[str, Any]]) -> None:
+        """Transcribe a batch of chunks and add their segments to the file results."""
+        try:
+            batch_segments = self.transcribe_pcm([(pieces, pcm) for _, pieces, pcm in batch])
+        except Exception as e:
+            for key, _, _ in batch:
+                results[key]["success"] = False
+                results[key]["error"] = f"Transcription failed: {e}"
+            return
+
+        for (key, _, _), segments in zip(batch, batch_segments):
+            results[key]["segments"].extend(segments)
+
+    @staticmethod
+    def _pop_finished(finished: List[Any], results: Dict[Any, Dict[str, Any]]) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+        """Yield and forget the results of completely transcribed files."""
+        while finished:
+            key = finished.pop(0)
+            result = results.pop(key)
+            result["segments"].sort(key=lambda segment: segment["start"])
+            result["transcription"] = " ".join(segment["text"] for segment in result["segments"])
+            yield key, result
+
+    @staticmethod
+    def _empty_result() -> Dict[str, Any]:
+        """Result of a file before any chunk is transcribed."""
+        return {"success": True, "error": None, "transcription": "", "segments": [],
+                "audio_seconds": 0.0, "speech_seconds": 0.0}
+
+
+_default_engine: Optional[TranscriptionEngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_engine(**kwargs) -> TranscriptionEngine:
+    """
+    Get the process-wide transcription engine, loading it on first use.
+
+    Args:
+        **kwargs: TranscriptionEngine options, used only when the engine is created
+
+    Returns:
+        Shared TranscriptionEngine
+    """
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = TranscriptionEngine(**kwargs)
+        return _default_engine
+
+
+def transcribe_vietnamese_audio(file_path: str) -> Dict[str, Any]:
+    """
+    Transcribe Vietnamese speech from an audio file with the shared engine.
+
+    Args:
+        file_path: Path to the audio file (any format ffmpeg can read)
+
+    Returns:
+        Dictionary with "success", "error", "transcription" and "segments"
+    """
+    try:
+        return get_engine().transcribe_file(file_path)
+    except Exception as e:
+        return {"success": False, "error": f"Lỗi xử lý: {e}", "transcription": None, "segments": []}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Phiên âm tiếng Việt từ tệp âm thanh sử dụng PhoWhisper')
+    parser.add_argument('file_paths', type=str, nargs='+', help='Đường dẫn đến tệp âm thanh')
+    parser.add_argument('--model', type=str, default='vinai/PhoWhisper-medium', help='PhoWhisper model')
+    parser.add_argument('--batch-size', type=int, default=8, help='Number of 30-second chunks per batch')
+    parser.add_argument('--quantize', action='store_true', help='Quantize the model to int8 (CPU)')
+    parser.add_argument('--no-vad', action='store_true', help='Transcribe silence and music too')
+
+    args = parser.parse_args()
+
+    engine = TranscriptionEngine(args.model, batch_size=args.batch_size, quantize=args.quantize,
+                                 vad=None if args.no_vad else EnergyVAD())
+    for path, result in engine.transcribe_many((path, path) for path in args.file_paths):
+        print(f"\n{path}:")
+        if not result["success"]:
+            print(result["error"])
+        print(f"Speech: {result['speech_seconds']:.0f}s of {result['audio_seconds']:.0f}s")
+        for segment in result["segments"]:
+            print(f"[{segment['start']:8.2f} - {segment['end']:8.2f}] {segment['text']}")
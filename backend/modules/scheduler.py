@@ -0,0 +1,256 @@
+import threading
+import time
+import zlib
+import traceback
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Callable, Optional
+
+from db.db_setup import DatabaseManager
+
+
+class TokenBucket:
+    """Token bucket used to enforce a global rate budget."""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens the bucket can hold
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Take tokens from the bucket if enough are available.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            True if the tokens were taken, False otherwise
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Take tokens from the bucket, waiting until enough are available.
+
+        Args:
+            tokens: Number of tokens to take (at most the bucket capacity)
+        """
+        while not self.try_acquire(tokens):
+            with self.lock:
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(max(wait, 0.01))
+
+
+class ChannelRefreshScheduler:
+    """
+    Periodically re-enqueues refresh jobs for known channels.
+
+    Each channel gets its own refresh interval: channels that upload often or
+    that recently had dangerous content are re-crawled sooner. Every interval
+    is shifted by a stable per-channel jitter so channels added together don't
+    come due together, and a global token bucket caps refreshes per hour so the
+    crawl load is spread evenly over the day.
+    """
+
+    def __init__(self, db_path: str, enqueue: Callable[[Dict[str, Any]], None],
+                 base_interval_hours: float = 24.0, min_interval_hours: float = 1.0,
+                 max_interval_hours: float = 168.0, budget_per_hour: float = 120.0,
+                 jitter: float = 0.15, window_days: int = 30, tick_seconds: float = 30.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            db_path: Path to SQLite database file
+            enqueue: Callback that enqueues a refresh job for a channel row
+                     (a dict with "id", "url", "channel_name" keys)
+            base_interval_hours: Refresh interval for an inactive, clean channel
+            min_interval_hours: Lower bound on any channel's refresh interval
+            max_interval_hours: Upper bound on any channel's refresh interval
+            budget_per_hour: Maximum number of refreshes enqueued per hour
+            jitter: Fraction of the interval used to spread due times
+            window_days: Look-back window for upload frequency and danger rate
+            tick_seconds: How often to look for due channels
+        """
+        self.db_path = db_path
+        self.enqueue = enqueue
+        self.base_interval = timedelta(hours=base_interval_hours)
+        self.min_interval = timedelta(hours=min_interval_hours)
+        self.max_interval = timedelta(hours=max_interval_hours)
+        self.jitter = jitter
+        self.window_days = window_days
+        self.tick_seconds = tick_seconds
+
+        # Allow at most one tick's worth of refreshes in a burst
+        rate = budget_per_hour / 3600.0
+        self.budget = TokenBucket(rate, max(1.0, rate * tick_seconds))
+
+        # Channels enqueued but not yet re-scraped: channel id -> enqueue time
+        self.pending: Dict[int, datetime] = {}
+
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the scheduler thread."""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        """Scheduler loop."""
+        while not self.stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Error in refresh scheduler: {e}\n{traceback.format_exc()}")
+            self.stop_event.wait(self.tick_seconds)
+
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """
+        Enqueue refreshes for due channels, most overdue first, within the budget.
+
+        Args:
+            now: Current UTC time (defaults to datetime.utcnow())
+
+        Returns:
+            Number of refresh jobs enqueued
+        """
+        # SQLite's CURRENT_TIMESTAMP is UTC, so every timestamp the scheduler compares is UTC
+        now = now or datetime.utcnow()
+        due = self.due_channels(now)
+
+        enqueued = 0
+        for channel in due:
+            if not self.budget.try_acquire():
+                break
+            self.enqueue(channel)
+            self.pending[channel["id"]] = now
+            enqueued += 1
+
+        return enqueued
+
+    def due_channels(self, now: datetime) -> List[Dict[str, Any]]:
+        """
+        Get channels whose refresh is due, sorted by how overdue they are.
+
+        Args:
+            now: Current UTC time
+
+        Returns:
+            List of channel dictionaries with scheduling details
+        """
+        db = DatabaseManager(self.db_path)
+        try:
+            window_start = (now - timedelta(days=self.window_days)).strftime("%Y-%m-%d %H:%M:%S")
+
+            # Videos first seen on the initial crawl of a channel are not new
+            # uploads, so only videos discovered an hour after it count
+            rows = db.fetchall(
+                """
+                SELECT c.id, c.url, c.channel_name, c.scrape_time,
+                       (SELECT COUNT(*) FROM videos v
+                        WHERE v.channel_id = c.id
+                          AND v.created_at >= ?
+                          AND v.created_at > (SELECT datetime(MIN(v2.created_at), '+1 hour')
+                                              FROM videos v2 WHERE v2.channel_id = c.id)),
+                       (SELECT COUNT(*) FROM videos v
+                        WHERE v.channel_id = c.id AND v.created_at >= ?),
+                       (SELECT COUNT(DISTINCT ca.video_id) FROM content_analysis ca
+                        JOIN videos v ON ca.video_id = v.id
+                        WHERE v.channel_id = c.id AND ca.is_dangerous = 1
+                          AND ca.analysis_time >= ?)
+                FROM channels c
+                WHERE c.url != '#'
+                """,
+                (window_start, window_start, window_start)
+            )
+        finally:
+            db.close()
+
+        due = []
+        for channel_id, url, name, scrape_time, new_uploads, recent_videos, dangerous_videos in rows:
+            last_scrape = self._parse_time(scrape_time)
+
+            # Skip channels still waiting in the queue, unless the job was lost
+            enqueued_at = self.pending.get(channel_id)
+            if enqueued_at is not None:
+                if (last_scrape is None or last_scrape < enqueued_at) and now - enqueued_at < self.max_interval:
+                    continue
+                del self.pending[channel_id]
+
+            uploads_per_day = new_uploads / self.window_days
+            danger_rate = min(1.0, dangerous_videos / recent_videos) if recent_videos else 0.0
+            interval = self.refresh_interval(channel_id, uploads_per_day, danger_rate)
+
+            if last_scrape is None:
+                next_due = now
+            else:
+                next_due = last_scrape + interval
+
+            if next_due <= now:
+                due.append({
+                    "id": channel_id,
+                    "url": url,
+                    "channel_name": name,
+                    "uploads_per_day": uploads_per_day,
+                    "danger_rate": danger_rate,
+                    "interval_hours": interval.total_seconds() / 3600,
+                    "overdue_seconds": (now - next_due).total_seconds()
+                })
+
+        due.sort(key=lambda c: c["overdue_seconds"], reverse=True)
+        return due
+
+    def refresh_interval(self, channel_id: int, uploads_per_day: float, danger_rate: float) -> timedelta:
+        """
+        Compute a channel's refresh interval.
+
+        Args:
+            channel_id: Database ID of the channel (seeds the jitter)
+            uploads_per_day: Observed new uploads per day
+            danger_rate: Fraction of recent videos flagged as dangerous
+
+        Returns:
+            Refresh interval including jitter
+        """
+        activity_factor = 1.0 + min(uploads_per_day, 10.0)
+        danger_factor = 1.0 + 4.0 * danger_rate
+        interval = self.base_interval / (activity_factor * danger_factor)
+        interval = max(self.min_interval, min(self.max_interval, interval))
+
+        # Stable jitter in [-jitter, +jitter] so the same channel keeps its slot
+        fraction = (zlib.crc32(str(channel_id).encode()) % 10000) / 10000.0
+        return interval * (1.0 + self.jitter * (2.0 * fraction - 1.0))
+
+    @staticmethod
+    def _parse_time(value: Optional[str]) -> Optional[datetime]:
+        """Parse a timestamp stored in the database."""
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value[:19], "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return None
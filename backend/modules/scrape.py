@@ -9,40 +9,341 @@ It extracts channel information and video data based on the channel name.
 import time
 import json
 import re
+import threading
+import functools
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 
+import requests
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, WebDriverException
+)
 from webdriver_manager.chrome import ChromeDriverManager
 
+from modules.yt_initial_data import parse_video_details, parse_channel_info
+from modules.continuation import ContinuationCrawler, RequestsTransport
+from modules.page_cache import CachingTransport
+
+
+# Video grid items not yet extracted; extracted items are marked with data-yti-seen
+UNSEEN_VIDEOS_SELECTOR = "ytd-rich-item-renderer:not([data-yti-seen])"
+
+# Extract every field of up to arguments[0] unseen video items in a single
+# round-trip and mark them as seen, so each scroll step only touches new
+# items. When arguments[1] is true the extracted nodes are removed from the
+# DOM to keep the page small on long channels.
+EXTRACT_VIDEOS_JS = """
+var elements = document.querySelectorAll('ytd-rich-item-renderer:not([data-yti-seen])');
+var items = [];
+for (var i = 0; i < elements.length && items.length < arguments[0]; i++) {
+    var element = elements[i];
+    var title = element.querySelector('#video-title');
+    var link = element.querySelector('#video-title-link');
+    var metadata = element.querySelector('#metadata-line');
+    items.push({
+        title: title ? title.innerText : null,
+        url: link ? link.href : null,
+        metadata: metadata ? metadata.innerText : ''
+    });
+    element.setAttribute('data-yti-seen', '1');
+    if (arguments[1]) {
+        element.remove();
+    }
+}
+return items;
+"""
+
+# Extract every field of the comment threads from index arguments[0] onwards in
+# a single round-trip (at most arguments[1] items). Returns the index of the
+# next unscanned item together with the extracted items.
+EXTRACT_COMMENTS_JS = """
+var elements = document.querySelectorAll('ytd-comment-thread-renderer');
+var items = [];
+var i = arguments[0];
+for (; i < elements.length && items.length < arguments[1]; i++) {
+    var element = elements[i];
+    var author = element.querySelector('#author-text');
+    var text = element.querySelector('#content-text');
+    var likes = element.querySelector('#vote-count-middle');
+    var date = element.querySelector('#published-time-text a');
+    items.push({
+        author: author ? author.innerText.trim() : null,
+        text: text ? text.innerText.trim() : null,
+        likes: likes ? likes.innerText.trim() : '',
+        date: date ? date.innerText.trim() : null,
+        is_verified: element.querySelector('#author-comment-badge') !== null,
+        is_pinned: element.querySelector('#pinned-comment-badge') !== null
+    });
+}
+return {next: i, items: items};
+"""
+
+# Loaded replies not yet extracted (expanded reply threads), marked as seen once read
+EXTRACT_REPLIES_JS = """
+var elements = document.querySelectorAll(
+    'ytd-comment-thread-renderer #replies ytd-comment-view-model:not([data-yti-seen]),' +
+    'ytd-comment-thread-renderer #replies ytd-comment-renderer:not([data-yti-seen])'
+);
+var items = [];
+for (var i = 0; i < elements.length && items.length < arguments[0]; i++) {
+    var element = elements[i];
+    var author = element.querySelector('#author-text');
+    var text = element.querySelector('#content-text');
+    var likes = element.querySelector('#vote-count-middle');
+    var date = element.querySelector('#published-time-text a');
+    items.push({
+        author: author ? author.innerText.trim() : null,
+        text: text ? text.innerText.trim() : null,
+        likes: likes ? likes.innerText.trim() : '',
+        date: date ? date.innerText.trim() : null,
+        is_verified: element.querySelector('#author-comment-badge') !== null,
+        is_pinned: false
+    });
+    element.setAttribute('data-yti-seen', '1');
+}
+return items;
+"""
+
+# Click the "N replies" button of every thread not expanded yet
+EXPAND_REPLIES_JS = """
+var threads = document.querySelectorAll('ytd-comment-thread-renderer:not([data-yti-expanded])');
+var clicked = 0;
+for (var i = 0; i < threads.length; i++) {
+    threads[i].setAttribute('data-yti-expanded', '1');
+    var button = threads[i].querySelector('#more-replies button, #more-replies');
+    if (button) {
+        button.click();
+        clicked++;
+    }
+}
+return clicked;
+"""
+
+# Loading state of the comment section: number of threads, whether the thread
+# list's continuation item (the spinner that loads the next page; not the one
+# inside an expanded thread's replies) is still present, and the number of
+# network requests made by the page so far
+COMMENT_STATE_JS = """
+var section = document.querySelector('ytd-comments#comments');
+var continuation = section ? section.querySelector('#sections > #contents > ytd-continuation-item-renderer') : null;
+return {
+    count: document.querySelectorAll('ytd-comment-thread-renderer').length,
+    continuation: continuation !== null,
+    requests: performance.getEntriesByType('resource').length
+};
+"""
+
+# Scroll so the thread list's continuation item (or the page bottom) comes into view
+SCROLL_COMMENTS_JS = """
+var section = document.querySelector('ytd-comments#comments');
+var continuation = section ? section.querySelector('#sections > #contents > ytd-continuation-item-renderer') : null;
+if (continuation) {
+    continuation.scrollIntoView({block: 'end'});
+} else {
+    window.scrollTo(0, document.documentElement.scrollHeight);
+}
+"""
+
+
+class AdaptiveTimeouts:
+    """
+    Per-call-kind timeouts derived from observed page load times.
+
+    Each wait records how long the page took to become ready. The timeout
+    for a kind of call is a multiple of its moving average, clamped to
+    [minimum, maximum], so slow pages get more time and fast pages fail fast.
+    """
+
+    def __init__(self, default: float = 10.0, minimum: float = 3.0, maximum: float = 30.0,
+                 factor: float = 3.0, alpha: float = 0.2):
+        """
+        Initialize the timeout tracker.
+
+        Args:
+            default: Timeout used before any observation
+            minimum: Lower bound for derived timeouts
+            maximum: Upper bound for derived timeouts
+            factor: Multiple of the average load time used as timeout
+            alpha: Weight of the newest observation in the moving average
+        """
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.alpha = alpha
+        self.lock = threading.Lock()
+        self.observed: Dict[str, Dict[str, float]] = {}
+
+    def timeout(self, kind: str, minimum: Optional[float] = None) -> float:
+        """
+        Get the timeout for a kind of call.
+
+        Args:
+            kind: Call kind (e.g. 'video', 'channel', 'scroll')
+            minimum: Optional lower bound overriding the default minimum
+
+        Returns:
+            Timeout in seconds
+        """
+        with self.lock:
+            stats = self.observed.get(kind)
+            if not stats:
+                return self.default
+            floor = self.minimum if minimum is None else minimum
+            return max(floor, min(self.maximum, stats["average"] * self.factor))
+
+    def record(self, kind: str, seconds: float, timed_out: bool = False) -> None:
+        """
+        Record an observed load time.
+
+        Args:
+            kind: Call kind
+            seconds: Time until the page was ready (or the timeout that expired)
+            timed_out: Whether the wait timed out
+        """
+        with self.lock:
+            stats = self.observed.setdefault(kind, {"count": 0, "average": seconds, "last": seconds, "timeouts": 0})
+            stats["count"] += 1
+            stats["last"] = seconds
+            if timed_out:
+                stats["timeouts"] += 1
+            else:
+                stats["average"] = (1 - self.alpha) * stats["average"] + self.alpha * seconds
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return a copy of the recorded statistics per call kind."""
+        with self.lock:
+            return {kind: dict(stats) for kind, stats in self.observed.items()}
+
+
+# URL patterns blocked in the lightweight scraping profile: video/audio
+# streams, images, fonts, ads and analytics. Scraping only needs the HTML,
+# scripts and the JSON API calls that render lists.
+BLOCKED_URL_PATTERNS = [
+    "*googlevideo.com/*",
+    "*.mp4", "*.webm", "*.m4a",
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*ytimg.com/vi/*", "*ggpht.com/*",
+    "*.woff", "*.woff2", "*.ttf", "*fonts.gstatic.com/*",
+    "*doubleclick.net/*", "*googlesyndication.com/*", "*googleadservices.com/*",
+    "*google-analytics.com/*", "*googletagmanager.com/*",
+    "*youtube.com/api/stats/*", "*youtube.com/pagead/*", "*youtube.com/ptracking*",
+    "*play.google.com/log*"
+]
+
+# Bytes transferred by the current page so far (document plus subresources)
+PAGE_TRANSFER_JS = """
+var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+var total = 0;
+for (var i = 0; i < entries.length; i++) { total += entries[i].transferSize || 0; }
+return total;
+"""
+
+# Headers for plain HTTP page fetches; English keeps counts and dates in the
+# same format as the rendered pages
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9"
+}
+
+
+def uses_browser(method):
+    """Run a scraper method with a browser checked out of the scraper's pool (if any)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._browser():
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class YouTubeChannelScraper:
     """Scraper for YouTube channels using Selenium with headless Chrome."""
 
-    def __init__(self, headless: bool = True, scroll_pause_time: float = 1.5):
+    def __init__(self, headless: bool = True, scroll_pause_time: float = 1.5, pool=None,
+                 use_http: bool = True, lightweight: bool = True, prune_scanned: bool = False,
+                 page_cache=None):
         """
         Initialize the YouTube scraper.
 
         Args:
             headless: Whether to run Chrome in headless mode (default: True)
             scroll_pause_time: Time to pause between scrolls in seconds (default: 1.5)
+            pool: Optional BrowserPool; when given, each call borrows a pooled
+                  browser instead of the scraper owning one
+            use_http: Try reading metadata from the JSON embedded in the raw
+                      page HTML before rendering the page in Chrome (default: True)
+            lightweight: Use the lightweight Chrome profile that blocks media,
+                         images, fonts and ads (default: True; pooled browsers
+                         are configured by the pool)
+            prune_scanned: Remove video items from the page once they have been
+                           extracted, keeping memory flat on very long channels
+                           (default: False)
+            page_cache: Optional PageCache for HTTP fetches; in replay mode
+                        pages are served only from the cache and Chrome is
+                        never started
         """
         self.scroll_pause_time = scroll_pause_time
-        self.driver = self._setup_driver(headless)
-        self.wait = WebDriverWait(self.driver, 10)
+        self.pool = pool
+        self.prune_scanned = prune_scanned
+        self.page_cache = page_cache
+        self.replay = bool(page_cache and page_cache.replay)
+        self.use_http = use_http or self.replay
+        transport = RequestsTransport(headers=HTTP_HEADERS)
+        self.session = transport.session
+        self.session.cookies.set("CONSENT", "YES+1", domain=".youtube.com")
+        self.transport = CachingTransport(transport, page_cache) if page_cache else transport
+        self.crawler = ContinuationCrawler(self.transport)
+        self._local = threading.local()
+        # Serializes calls on the scraper's own browser when it is shared between threads
+        self._driver_lock = threading.RLock()
+        self._driver = None if pool or self.replay else self._setup_driver(headless, lightweight)
+        self._wait = WebDriverWait(self._driver, 10) if self._driver else None
+        self.timeouts = AdaptiveTimeouts()
+        # Page load measurements: count, seconds until the page was ready and bytes transferred
+        self._page_lock = threading.Lock()
+        self.page_loads = {"count": 0, "ready_seconds": 0.0, "measured": 0, "bytes": 0}
 
-    def _setup_driver(self, headless: bool) -> webdriver.Chrome:
+    @property
+    def driver(self) -> webdriver.Chrome:
+        """WebDriver for the current call (the pooled browser checked out by this thread)."""
+        if self.pool is None:
+            return self._driver
+
+        lease = getattr(self._local, "lease", None)
+        if lease is None:
+            raise RuntimeError("No pooled browser checked out for this thread")
+        return lease.driver
+
+    @property
+    def wait(self) -> WebDriverWait:
+        """WebDriverWait bound to the current driver."""
+        if self.pool is None:
+            return self._wait
+        return WebDriverWait(self.driver, 10)
+
+    @staticmethod
+    def create_driver(headless: bool, lightweight: bool = True) -> webdriver.Chrome:
         """
-        Set up and configure the Chrome WebDriver.
+        Set up and configure a Chrome WebDriver.
+
+        The lightweight profile returns from page loads at DOMContentLoaded
+        (page_load_strategy "eager"), uses a small window, never autoplays
+        and blocks media, images, fonts, ads and analytics through the
+        DevTools protocol.
 
         Args:
             headless: Whether to run Chrome in headless mode
+            lightweight: Whether to use the lightweight scraping profile
 
         Returns:
             Configured Chrome WebDriver instance
@@ -54,12 +355,234 @@ class YouTubeChannelScraper:
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-gpu")
 
-        return webdriver.Chrome(options=chrome_options)
+        if lightweight:
+            chrome_options.page_load_strategy = "eager"
+            chrome_options.add_argument("--window-size=1024,768")
+            chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+            chrome_options.add_argument("--mute-audio")
+            chrome_options.add_argument("--disable-extensions")
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2
+            })
+
+        driver = webdriver.Chrome(options=chrome_options)
+
+        if lightweight:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+        return driver
+
+    def _setup_driver(self, headless: bool, lightweight: bool = True) -> webdriver.Chrome:
+        """
+        Set up and configure the Chrome WebDriver.
+
+        Args:
+            headless: Whether to run Chrome in headless mode
+            lightweight: Whether to use the lightweight scraping profile
+
+        Returns:
+            Configured Chrome WebDriver instance
+        """
+        return self.create_driver(headless, lightweight)
+
+    @contextmanager
+    def _browser(self):
+        """Check a browser out of the pool for the current thread, unless it already holds one."""
+        if self.pool is None:
+            with self._driver_lock:
+                yield
+            return
+
+        if getattr(self._local, "lease", None) is not None:
+            yield
+            return
+
+        lease = self.pool.checkout()
+        self._local.lease = lease
+        try:
+            yield
+        except WebDriverException:
+            lease.broken = True
+            raise
+        finally:
+            self._local.lease = None
+            self.pool.checkin(lease)
+
+    def _navigate(self, url: str) -> None:
+        """Load a page, counting it against the pooled browser's recycling budget."""
+        if self.replay:
+            # Replays never touch the network; rendered extraction treats this as a failed load
+            raise TimeoutException(f"Cannot render {url} in replay mode")
+
+        self._measure_page()
+
+        started = time.monotonic()
+        self.driver.get(url)
+        ready_seconds = time.monotonic() - started
+
+        with self._page_lock:
+            self.page_loads["count"] += 1
+            self.page_loads["ready_seconds"] += ready_seconds
+
+        lease = getattr(self._local, "lease", None)
+        if lease is not None:
+            lease.pages += 1
+
+    def _measure_page(self) -> None:
+        """Record the bytes transferred by the page currently loaded, before leaving it."""
+        try:
+            transferred = self.driver.execute_script(PAGE_TRANSFER_JS) or 0
+        except WebDriverException:
+            return
+
+        if transferred:
+            with self._page_lock:
+                self.page_loads["measured"] += 1
+                self.page_loads["bytes"] += int(transferred)
+
+    def _wait_until(self, kind: str, condition, minimum: Optional[float] = None):
+        """
+        Wait for a condition with an adaptive timeout and record how long it took.
+
+        Args:
+            kind: Call kind used to pick and update the timeout
+            condition: Selenium expected condition (callable taking the driver)
+            minimum: Optional lower bound for the timeout
+
+        Returns:
+            The condition's result
+
+        Raises:
+            TimeoutException: If the condition did not hold in time
+        """
+        timeout = self.timeouts.timeout(kind, minimum)
+        started = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(condition)
+        except TimeoutException:
+            self.timeouts.record(kind, timeout, timed_out=True)
+            raise
+        self.timeouts.record(kind, time.monotonic() - started)
+        return result
+
+    def _wait_for_dom_settled(self, quiet: float = 0.3, timeout: float = 5.0) -> bool:
+        """
+        Wait until the DOM node count and the number of network requests stop changing.
+
+        Args:
+            quiet: Seconds both counters must stay unchanged
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the page settled, False if the timeout expired first
+        """
+        deadline = time.monotonic() + timeout
+        last_counts = None
+        stable_since = time.monotonic()
+
+        while time.monotonic() < deadline:
+            counts = self.driver.execute_script(
+                "return [document.getElementsByTagName('*').length,"
+                " performance.getEntriesByType('resource').length];"
+            )
+            now = time.monotonic()
+            if counts != last_counts:
+                last_counts = counts
+                stable_since = now
+            elif now - stable_since >= quiet:
+                return True
+            time.sleep(0.1)
+
+        return False
+
+    def _count_elements(self, selector: str) -> int:
+        """Count elements matching a CSS selector in a single round-trip."""
+        return self.driver.execute_script(
+            "return document.querySelectorAll(arguments[0]).length;", selector
+        )
+
+    def _wait_for_more(self, selector: str, previous_count: int, kind: str = "scroll") -> bool:
+        """
+        Wait until more elements match a selector than before (e.g. after scrolling).
+
+        Args:
+            selector: CSS selector of the list items
+            previous_count: Number of items before the scroll
+            kind: Call kind used for the adaptive timeout
+
+        Returns:
+            True if new items appeared, False if the timeout expired
+        """
+        try:
+            self._wait_until(
+                kind,
+                lambda driver: self._count_elements(selector) > previous_count,
+                minimum=self.scroll_pause_time
+            )
+            return True
+        except TimeoutException:
+            return False
+
+    def load_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get observed page readiness times per call kind and page load costs.
+
+        Returns:
+            Dictionary mapping call kind to count, average, last and timeout
+            count, plus a "page_loads" entry with the number of pages loaded,
+            the average seconds until driver.get returned and the average
+            kilobytes transferred per page
+        """
+        stats = self.timeouts.stats()
+
+        with self._page_lock:
+            loads = dict(self.page_loads)
+        stats["page_loads"] = {
+            "count": loads["count"],
+            "average_ready_seconds": loads["ready_seconds"] / loads["count"] if loads["count"] else 0.0,
+            "average_kb": loads["bytes"] / loads["measured"] / 1024 if loads["measured"] else 0.0
+        }
+        return stats
+
+    def _fetch_html(self, url: str) -> Optional[str]:
+        """
+        Fetch the raw HTML of a page without rendering it (through the page cache, if any).
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Page HTML, or None if HTTP mode is off or the request failed
+        """
+        if not self.use_http:
+            return None
+
+        try:
+            return self.transport.get_text(url)
+        except requests.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+
+    @staticmethod
+    def _channel_id_from_url(channel_url: str) -> str:
+        """Derive the channel ID (UC... ID or @handle) stored in the database from a channel URL."""
+        channel_id_match = re.search(r"channel/(UC[\w-]+)", channel_url)
+        username_match = re.search(r"@([\w-]+)", channel_url)
+
+        if channel_id_match:
+            return channel_id_match.group(1)
+        if username_match:
+            return f"@{username_match.group(1)}"
+        return "Unknown"
 
     def close(self):
-        """Close the WebDriver."""
-        if self.driver:
-            self.driver.quit()
+        """Close the WebDriver (pooled browsers are owned and closed by the pool)."""
+        if self._driver:
+            self._driver.quit()
+            self._driver = None
+        self.session.close()
 
     def search_channel(self, channel_input: str) -> Optional[str]:
         """
@@ -85,13 +608,17 @@ class YouTubeChannelScraper:
             return full_url
             
         # Otherwise search for the channel on YouTube
+        return self._search_channel_rendered(channel_input)
+
+    @uses_browser
+    def _search_channel_rendered(self, channel_input: str) -> Optional[str]:
+        """Find a channel by name on the rendered search results page."""
         try:
             search_url = f"https://www.youtube.com/results?search_query={channel_input.replace(' ', '+')}&sp=EgIQAg%253D%253D"  # Filter for channels
-            self.driver.get(search_url)
-            time.sleep(2)  # Wait for results to load
+            self._navigate(search_url)
 
             # Find channel in search results
-            channel_items = self.wait.until(EC.presence_of_all_elements_located(
+            channel_items = self._wait_until("search", EC.presence_of_all_elements_located(
                 (By.CSS_SELECTOR, "ytd-channel-renderer")
             ))
 
@@ -112,22 +639,44 @@ class YouTubeChannelScraper:
         """
         Extract information from a YouTube channel.
 
+        Reads the channel page's embedded ytInitialData when possible and
+        falls back to rendering the page in Chrome.
+
         Args:
             channel_url: URL of the YouTube channel
 
         Returns:
             Dictionary containing channel information
         """
+        html = self._fetch_html(channel_url)
+        info = parse_channel_info(html) if html else None
+        if info:
+            return {
+                "channel_name": info["channel_name"],
+                "channel_id": self._channel_id_from_url(channel_url),
+                "subscribers": info["subscribers"],
+                "description": info["description"],
+                "url": channel_url,
+                "thumbnail": info["thumbnail"]
+            }
+
+        return self._get_channel_info_rendered(channel_url)
+
+    @uses_browser
+    def _get_channel_info_rendered(self, channel_url: str) -> Dict[str, Any]:
+        """Extract channel information from the rendered channel page."""
         try:
             # Navigate to the channel page
-            self.driver.get(channel_url)
-            time.sleep(3)  # Wait for page to load
+            self._navigate(channel_url)
 
             # Extract channel name
-            channel_name = self.wait.until(EC.presence_of_element_located(
+            channel_name = self._wait_until("channel", EC.presence_of_element_located(
                 (By.CSS_SELECTOR, "ytd-channel-name yt-formatted-string#text")
             )).text
 
+            # The header renders subscribers and avatar after the name
+            self._wait_for_dom_settled()
+
             # Extract subscriber count
             try:
                 subscribers_text = self.driver.find_element(
@@ -156,29 +705,15 @@ class YouTubeChannelScraper:
             # Extract channel description
             try:
                 about_tab_url = f"{channel_url}/about"
-                self.driver.get(about_tab_url)
-                time.sleep(2)
-                description = self.driver.find_element(
-                    By.CSS_SELECTOR, "ytd-channel-about-metadata-renderer #description-container"
-                ).text
-            except NoSuchElementException:
+                self._navigate(about_tab_url)
+                description = self._wait_until("about", EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, "ytd-channel-about-metadata-renderer #description-container")
+                )).text
+            except (NoSuchElementException, TimeoutException):
                 description = "No description available"
 
             # Extract channel ID or handle from URL
-            channel_id_match = re.search(r"channel/(UC[\w-]+)", channel_url)
-            username_match = re.search(r"@([\w-]+)", channel_url)
-            
-            if channel_id_match:
-                channel_id = channel_id_match.group(1)
-            elif username_match:
-                channel_id = f"@{username_match.group(1)}"
-            else:
-                channel_id = "Unknown"
-
-            # Navigate back to videos tab
-            videos_url = f"{channel_url}/videos"
-            self.driver.get(videos_url)
-            time.sleep(2)
+            channel_id = self._channel_id_from_url(channel_url)
 
             return {
                 "channel_name": channel_name,
@@ -203,6 +738,9 @@ class YouTubeChannelScraper:
         """
         Extract video information from a YouTube channel.
 
+        The list is paged over plain HTTP with continuation tokens; Chrome
+        is only used when the videos tab cannot be read that way.
+
         Args:
             channel_url: URL of the YouTube channel
             max_videos: Maximum number of videos to extract (default: 20)
@@ -210,67 +748,64 @@ class YouTubeChannelScraper:
         Returns:
             List of dictionaries containing video information
         """
+        if self.use_http:
+            videos = self.crawler.channel_videos(channel_url, max_videos)
+            if videos:
+                return videos
+
+        return self._get_channel_videos_rendered(channel_url, max_videos)
+
+    @uses_browser
+    def _get_channel_videos_rendered(self, channel_url: str, max_videos: int = 20) -> List[Dict[str, Any]]:
+        """Extract video information by scrolling the rendered videos tab."""
         videos = []
         try:
             # Navigate to the videos tab
             videos_url = f"{channel_url}/videos"
-            self.driver.get(videos_url)
-            time.sleep(3)  # Wait for page to load
+            self._navigate(videos_url)
+            self._wait_until("channel_videos", EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "ytd-rich-item-renderer")
+            ))
 
-            # Scroll down to load more videos
-            last_height = self.driver.execute_script("return document.documentElement.scrollHeight")
+            # Videos already extracted; items are also marked in the DOM so
+            # each step only scans the ones that are new since the last scroll
+            seen_ids = set()
             
             while len(videos) < max_videos:
-                # Scroll down
-                self.driver.execute_script("window.scrollTo(0, document.documentElement.scrollHeight);")
-                time.sleep(self.scroll_pause_time)
-                
-                # Get all video elements
-                video_elements = self.driver.find_elements(By.CSS_SELECTOR, "ytd-rich-item-renderer")
+                # Extract the videos we haven't processed yet in one round-trip
+                batch = self.driver.execute_script(
+                    EXTRACT_VIDEOS_JS, max_videos - len(videos), self.prune_scanned
+                )
                 
-                # Process videos we haven't processed yet
-                for element in video_elements[len(videos):]:
-                    if len(videos) >= max_videos:
-                        break
+                for item in batch:
+                    video_url = item["url"]
+                    video_id_match = re.search(r"v=([\w-]+)", video_url) if video_url else None
+                    if item["title"] is None or not video_id_match:
+                        print(f"Error extracting video info: missing title or URL ({video_url})")
+                        continue
                     
-                    try:
-                        # Extract video title
-                        title = element.find_element(By.CSS_SELECTOR, "#video-title").text
-                        
-                        # Extract video URL
-                        video_url = element.find_element(By.CSS_SELECTOR, "#video-title-link").get_attribute("href")
-                        
-                        # Extract video ID from URL
-                        video_id = re.search(r"v=([\w-]+)", video_url).group(1) if video_url else "Unknown"
-                        
-                        # Extract view count
-                        metadata_line = element.find_element(By.CSS_SELECTOR, "#metadata-line").text.split('\n')
-                        views = metadata_line[0] if len(metadata_line) > 0 else "Unknown"
-                        
-                        
-                        # Extract upload date
-                        upload_date = metadata_line[1] if len(metadata_line) > 1 else "Unknown"
-                        
-                        # Extract thumbnail URL
-                        thumbnail = f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
-                        
-                        videos.append({
-                            "title": title,
-                            "video_id": video_id,
-                            "url": video_url,
-                            "views": views,
-                            "upload_date": upload_date,
-                            "thumbnail": thumbnail
-                        })
-                    except (NoSuchElementException, AttributeError) as e:
-                        print(f"Error extracting video info: {e}")
+                    video_id = video_id_match.group(1)
+                    if video_id in seen_ids:
                         continue
+                    seen_ids.add(video_id)
+                    metadata_line = item["metadata"].split('\n')
+                    
+                    videos.append({
+                        "title": item["title"],
+                        "video_id": video_id,
+                        "url": video_url,
+                        "views": metadata_line[0] if metadata_line[0] else "Unknown",
+                        "upload_date": metadata_line[1] if len(metadata_line) > 1 else "Unknown",
+                        "thumbnail": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+                    })
+                
+                if len(videos) >= max_videos:
+                    break
                 
-                # Check if we've reached the end of the page
-                new_height = self.driver.execute_script("return document.documentElement.scrollHeight")
-                if new_height == last_height or len(videos) >= max_videos:
+                # Scroll down and wait for unseen items; none means we reached the end
+                self.driver.execute_script("window.scrollTo(0, document.documentElement.scrollHeight);")
+                if not self._wait_for_more(UNSEEN_VIDEOS_SELECTOR, 0):
                     break
-                last_height = new_height
 
             return videos[:max_videos]
         
@@ -282,20 +817,35 @@ class YouTubeChannelScraper:
         """
         Extract detailed information from a YouTube video.
 
+        Reads the watch page's embedded ytInitialPlayerResponse and
+        ytInitialData when possible and falls back to rendering the page in Chrome.
+
         Args:
             video_url: URL of the YouTube video
 
         Returns:
             Dictionary containing video details
         """
+        html = self._fetch_html(video_url)
+        details = parse_video_details(html, video_url) if html else None
+        if details:
+            return details
+
+        return self._get_video_details_rendered(video_url)
+
+    @uses_browser
+    def _get_video_details_rendered(self, video_url: str) -> Dict[str, Any]:
+        """Extract video details from the rendered watch page."""
         try:
-            self.driver.get(video_url)
-            time.sleep(3)  # Wait for video page to load
+            self._navigate(video_url)
             
             # Wait for title to be visible
-            title = self.wait.until(EC.presence_of_element_located(
+            title = self._wait_until("video", EC.presence_of_element_located(
                 (By.CSS_SELECTOR, "h1.ytd-watch-metadata yt-formatted-string")
             )).text
+
+            # View count, likes and date render shortly after the title
+            self._wait_for_dom_settled()
             
             # Extract view count
             try:
@@ -328,8 +878,11 @@ class YouTubeChannelScraper:
                 try:
                     show_more = self.driver.find_element(By.CSS_SELECTOR, "#description-inline-expander tp-yt-paper-button#expand")
                     show_more.click()
-                    time.sleep(1)
-                except NoSuchElementException:
+                    self._wait_until("expand", lambda driver: driver.execute_script(
+                        "var e = document.querySelector('#description-inline-expander');"
+                        "return e !== null && e.hasAttribute('is-expanded');"
+                    ), minimum=1.0)
+                except (NoSuchElementException, TimeoutException):
                     pass
                 
                 description = self.driver.find_element(
@@ -366,6 +919,7 @@ class YouTubeChannelScraper:
                 "thumbnail": "Unknown"
             }
 
+    @uses_browser
     def analyze_channel(self, channel_name: str, max_videos: int = 20) -> Dict[str, Any]:
         """
         Analyze a YouTube channel based on name.
@@ -490,132 +1044,206 @@ class YouTubeChannelScraper:
         
         return analysis
     
-    def get_video_comments(self, video_url: str, max_comments: int = 20) -> List[Dict[str, Any]]:
+    def get_video_comments(self, video_url: str, max_comments: int = 20,
+                           time_budget: Optional[float] = None,
+                           expand_replies: bool = False) -> List[Dict[str, Any]]:
         """
         Extract comments from a YouTube video.
 
+        Comments are paged over plain HTTP with continuation tokens; Chrome
+        is only used when the comment section cannot be read that way, or
+        when replies are requested.
+
         Args:
             video_url: URL of the YouTube video
             max_comments: Maximum number of comments to extract (default: 20)
+            time_budget: Maximum seconds spent scrolling the rendered comment
+                         section (default: no limit)
+            expand_replies: Also extract the replies of each thread, counted
+                            towards max_comments (default: False)
 
         Returns:
             List of dictionaries containing comment information
         """
+        if self.use_http and not expand_replies:
+            comments = self.crawler.video_comments(video_url, max_comments)
+            if comments is not None:
+                return comments
+
+        return self._get_video_comments_rendered(video_url, max_comments, time_budget, expand_replies)
+
+    def _load_more_comments(self, previous_count: int, retries: int = 2, quiet: float = 0.5) -> bool:
+        """
+        Scroll the comment section and wait until more threads are loaded.
+
+        The wait adapts to the observed comment load latency (kind
+        "comments_scroll"). While the continuation spinner is present more
+        comments are expected, so a timed-out wait is retried with a fresh
+        scroll instead of being treated as the end of the list. The list has
+        ended once the spinner is gone and no requests were made for `quiet` seconds.
+
+        Args:
+            previous_count: Number of comment threads loaded before scrolling
+            retries: Number of extra scrolls when the spinner stays without new comments
+            quiet: Seconds without network requests that mark an idle page
+
+        Returns:
+            True if more threads were loaded, False at the end of the list
+        """
+        for attempt in range(retries + 1):
+            if attempt:
+                # Nudge the page so the continuation observer fires again
+                self.driver.execute_script("window.scrollBy(0, -400);")
+            self.driver.execute_script(SCROLL_COMMENTS_JS)
+
+            timeout = self.timeouts.timeout("comments_scroll", minimum=self.scroll_pause_time)
+            started = time.monotonic()
+            last_requests = None
+            idle_since = started
+
+            while time.monotonic() - started < timeout:
+                state = self.driver.execute_script(COMMENT_STATE_JS)
+                now = time.monotonic()
+
+                if state["count"] > previous_count:
+                    self.timeouts.record("comments_scroll", now - started)
+                    return True
+
+                if state["requests"] != last_requests:
+                    last_requests = state["requests"]
+                    idle_since = now
+                elif not state["continuation"] and now - idle_since >= quiet:
+                    return False
+
+                time.sleep(0.1)
+
+            self.timeouts.record("comments_scroll", timeout, timed_out=True)
+
+        return False
+
+    def _collect_last_replies(self, comments: List[Dict[str, Any]], max_comments: int,
+                              deadline: Optional[float], quiet: float = 0.5) -> None:
+        """
+        Wait for the replies of the last expanded threads and extract them.
+
+        Args:
+            comments: Comments extracted so far; replies are appended
+            max_comments: Maximum number of comments in total
+            deadline: Monotonic time the time budget runs out (None for no limit)
+            quiet: Seconds without new replies or network requests after which
+                   all replies are taken to be loaded
+        """
+        timeout = self.timeouts.timeout("comments_scroll", minimum=self.scroll_pause_time)
+        started = time.monotonic()
+        last_requests = None
+        idle_since = started
+
+        while len(comments) < max_comments and time.monotonic() - started < timeout:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+
+            items = self.driver.execute_script(EXTRACT_REPLIES_JS, max_comments - len(comments))
+            self._add_comments(comments, items)
+
+            requests_made = self.driver.execute_script(COMMENT_STATE_JS)["requests"]
+            now = time.monotonic()
+            if items or requests_made != last_requests:
+                last_requests = requests_made
+                idle_since = now
+            elif now - idle_since >= quiet:
+                return
+
+            time.sleep(0.1)
+
+    @staticmethod
+    def _add_comments(comments: List[Dict[str, Any]], items: List[Dict[str, Any]]) -> None:
+        """Append extracted comment items, skipping those without author or text."""
+        for item in items:
+            if item["author"] is None or item["text"] is None:
+                print("Error extracting comment: missing author or text")
+                continue
+
+            comments.append({
+                "author": item["author"],
+                "text": item["text"],
+                "likes": item["likes"] or "0",
+                "date": item["date"] or "Unknown",
+                "is_verified": item["is_verified"],
+                "is_pinned": item["is_pinned"]
+            })
+
+    @uses_browser
+    def _get_video_comments_rendered(self, video_url: str, max_comments: int = 20,
+                                     time_budget: Optional[float] = None,
+                                     expand_replies: bool = False) -> List[Dict[str, Any]]:
+        """Extract comments by scrolling the rendered watch page."""
         comments = []
+        deadline = time.monotonic() + time_budget if time_budget else None
         try:
             # Navigate to the video page
-            self.driver.get(video_url)
-            time.sleep(3)  # Wait for video page to load
+            self._navigate(video_url)
+            self._wait_until("video", EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "h1.ytd-watch-metadata")
+            ))
             
             # Scroll down to load comments section
             self.driver.execute_script("window.scrollTo(0, window.scrollY + 500);")
-            time.sleep(2)
             
             # Wait for comments to be visible
             try:
-                self.wait.until(EC.presence_of_element_located(
+                self._wait_until("comments", EC.presence_of_element_located(
                     (By.CSS_SELECTOR, "ytd-comments#comments")
                 ))
             except TimeoutException:
                 print("Comments section not found or disabled for this video")
                 return comments
             
+            # Comment threads are loaded lazily once the section is in view
+            if not self._wait_for_more("ytd-comment-thread-renderer", 0, kind="comments"):
+                print("No comments loaded for this video")
+                return comments
+            
             # Scroll down to load more comments
             last_comment_count = 0
             
-            # Keep scrolling until we have enough comments or no new comments are loading
+            # Keep scrolling until we have enough comments, the list ends or the time budget runs out
             while len(comments) < max_comments:
-                # Find all comment elements
-                comment_elements = self.driver.find_elements(
-                    By.CSS_SELECTOR, "ytd-comment-thread-renderer"
+                # Extract all comments we haven't processed yet in one round-trip
+                batch = self.driver.execute_script(
+                    EXTRACT_COMMENTS_JS, last_comment_count, max_comments - len(comments)
                 )
+                last_comment_count = batch["next"]
+                items = batch["items"]
                 
-                # If no new comments have loaded, break the loop
-                if len(comment_elements) == last_comment_count:
-                    break
+                if expand_replies:
+                    # Replies of threads expanded in earlier steps have loaded by now
+                    items += self.driver.execute_script(EXTRACT_REPLIES_JS, max_comments - len(comments))
+                    self.driver.execute_script(EXPAND_REPLIES_JS)
                 
-                last_comment_count = len(comment_elements)
+                self._add_comments(comments, items)
                 
-                # Process comments we haven't processed yet
-                for element in comment_elements[len(comments):]:
-                    if len(comments) >= max_comments:
-                        break
-                    
-                    try:
-                        # Extract author name
-                        author_element = element.find_element(
-                            By.CSS_SELECTOR, "#author-text"
-                        )
-                        author_name = author_element.text.strip()
-                        
-                        # Extract comment text
-                        comment_text_element = element.find_element(
-                            By.CSS_SELECTOR, "#content-text"
-                        )
-                        comment_text = comment_text_element.text.strip()
-                        
-                        # Extract likes count
-                        try:
-                            likes_element = element.find_element(
-                                By.CSS_SELECTOR, "#vote-count-middle"
-                            )
-                            likes_count = likes_element.text.strip()
-                            # Convert text like "5.2K" to numeric value if needed
-                            if not likes_count:
-                                likes_count = "0"
-                        except NoSuchElementException:
-                            likes_count = "0"
-                        
-                        # Extract comment date
-                        try:
-                            date_element = element.find_element(
-                                By.CSS_SELECTOR, "#published-time-text a"
-                            )
-                            comment_date = date_element.text.strip()
-                        except NoSuchElementException:
-                            comment_date = "Unknown"
-                        
-                        # Check if there's a verified badge
-                        is_verified = False
-                        try:
-                            element.find_element(By.CSS_SELECTOR, "#author-comment-badge")
-                            is_verified = True
-                        except NoSuchElementException:
-                            pass
-                        
-                        # Check if this is a pinned comment
-                        is_pinned = False
-                        try:
-                            element.find_element(By.CSS_SELECTOR, "#pinned-comment-badge")
-                            is_pinned = True
-                        except NoSuchElementException:
-                            pass
-                        
-                        comments.append({
-                            "author": author_name,
-                            "text": comment_text,
-                            "likes": likes_count,
-                            "date": comment_date,
-                            "is_verified": is_verified,
-                            "is_pinned": is_pinned
-                        })
-                        
-                    except (NoSuchElementException, StaleElementReferenceException) as e:
-                        print(f"Error extracting comment: {e}")
-                        continue
-                
-                # Scroll down to load more comments
-                self.driver.execute_script(
-                    "window.scrollTo(0, document.documentElement.scrollHeight);"
-                )
-                time.sleep(self.scroll_pause_time)
-                
-                # If we've collected enough comments, break the loop
+                # If we've collected enough comments or used up the time budget, stop
                 if len(comments) >= max_comments:
                     break
+                if deadline is not None and time.monotonic() >= deadline:
+                    print(f"Comment time budget of {time_budget}s used up after {len(comments)} comments")
+                    break
+                
+                # Scroll down to load more comments; stop at the end of the list
+                if not self._load_more_comments(last_comment_count):
+                    if expand_replies:
+                        # Threads expanded in the last step have no later step to extract their replies
+                        self._collect_last_replies(comments, max_comments, deadline)
+                    break
             
             return comments[:max_comments]
             
+        except (TimeoutException, NoSuchElementException) as e:
+            print(f"Error getting comments: {e}")
+            return comments
+        except WebDriverException:
+            # The browser itself failed; _browser retires the lease before it goes back to the pool
+            raise
         except Exception as e:
             print(f"Error getting comments: {e}")
             return comments
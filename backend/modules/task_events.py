@@ -0,0 +1,173 @@
+import json
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, List, Tuple
+
+from db.db_setup import DatabaseManager
+
+
+class TaskEventBus:
+    """
+    In-process publish/subscribe channel for task state and progress events.
+
+    Events get monotonically increasing integer IDs and the most recent
+    max_events are kept in a ring buffer, so a client that reconnects with
+    the last event ID it saw receives everything it missed. A client whose
+    last ID has already fallen out of the buffer is told to reset, i.e. to
+    refetch the full task list once and continue from the stream.
+    """
+
+    def __init__(self, max_events: int = 1000):
+        """
+        Initialize the event bus.
+
+        Args:
+            max_events: Number of recent events kept for resuming clients
+        """
+        self.events = deque(maxlen=max_events)
+        self.last_id = 0
+        self.condition = threading.Condition()
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        """
+        Publish an event to all subscribers.
+
+        Args:
+            event_type: Event name ('task' or 'progress')
+            data: JSON-serializable event payload
+
+        Returns:
+            ID of the published event
+        """
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+
+        with self.condition:
+            self.last_id += 1
+            self.events.append((self.last_id, event_type, payload))
+            self.condition.notify_all()
+            return self.last_id
+
+    def latest_id(self) -> int:
+        """Return the ID of the most recent event."""
+        with self.condition:
+            return self.last_id
+
+    def wait_for_events(self, after_id: int, timeout: float = 15.0) -> Tuple[List[Tuple[int, str, str]], bool]:
+        """
+        Wait for events newer than after_id.
+
+        Args:
+            after_id: ID of the last event the client has seen
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            Tuple of (list of (id, event_type, json_payload), reset flag). The
+            reset flag is set when events after after_id were already dropped
+            (or the ID comes from before a server restart).
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.last_id != after_id, timeout)
+
+            if after_id > self.last_id:
+                return [], True
+
+            oldest_id = self.events[0][0] if self.events else self.last_id + 1
+            reset = after_id + 1 < oldest_id
+
+            return [event for event in self.events if event[0] > after_id], reset
+
+    @staticmethod
+    def format_sse(event_id: int, event_type: str, payload: str) -> str:
+        """
+        Format an event as a Server-Sent Events message.
+
+        Args:
+            event_id: Event ID
+            event_type: Event name
+            payload: JSON payload
+
+        Returns:
+            SSE message string
+        """
+        return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+
+
+class SharedTaskEventBus(TaskEventBus):
+    """
+    Task event bus in the database, shared by several server processes.
+
+    Pipeline workers publish by inserting into the task_events table and
+    every API worker's SSE streams poll it, so a client sees the events of
+    all processes whichever worker it is connected to. Event IDs are the
+    table's row IDs; only the most recent max_events rows are kept.
+    """
+
+    def __init__(self, db_path: str, max_events: int = 1000, poll_interval: float = 0.5):
+        """
+        Initialize the event bus.
+
+        Args:
+            db_path: Path to SQLite database file
+            max_events: Number of recent events kept for resuming clients
+            poll_interval: Seconds between checks for new events while waiting
+        """
+        super().__init__(max_events)
+        self.db_path = db_path
+        self.db = DatabaseManager(db_path)
+        self.max_events = max_events
+        self.poll_interval = poll_interval
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        """
+        Publish an event to all subscribers.
+
+        Args:
+            event_type: Event name ('task' or 'progress')
+            data: JSON-serializable event payload
+
+        Returns:
+            ID of the published event
+        """
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+
+        event_id = self.db.insert("task_events", {"event_type": event_type, "payload": payload})
+        # Trimming now and then is enough to keep the table near max_events rows
+        if event_id % 100 == 0:
+            self.db.execute("DELETE FROM task_events WHERE id <= ?", (event_id - self.max_events,))
+            self.db.get_connection().commit()
+        return event_id
+
+    def latest_id(self) -> int:
+        """Return the ID of the most recent event."""
+        return self.db.fetchone("SELECT IFNULL(MAX(id), 0) FROM task_events")[0]
+
+    def wait_for_events(self, after_id: int, timeout: float = 15.0) -> Tuple[List[Tuple[int, str, str]], bool]:
+        """
+        Wait for events newer than after_id.
+
+        Args:
+            after_id: ID of the last event the client has seen
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            Tuple of (list of (id, event_type, json_payload), reset flag), as
+            returned by TaskEventBus.wait_for_events
+        """
+        deadline = time.monotonic() + timeout
+        last_id = self.latest_id()
+        while last_id == after_id and time.monotonic() < deadline:
+            time.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+            last_id = self.latest_id()
+
+        if after_id > last_id:
+            return [], True
+
+        events = self.db.fetchall(
+            "SELECT id, event_type, payload FROM task_events WHERE id > ? AND id <= ? ORDER BY id",
+            (max(after_id, last_id - self.max_events), last_id)
+        )
+        oldest_id = self.db.fetchone("SELECT IFNULL(MIN(id), ?) FROM task_events", (last_id + 1,))[0]
+        reset = after_id + 1 < oldest_id or after_id < last_id - self.max_events
+
+        return [tuple(event) for event in events], reset
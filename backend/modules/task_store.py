@@ -0,0 +1,610 @@
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from db.db_setup import DatabaseManager
+
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class TaskStore:
+    """
+    Bounded in-memory store for API task state and results.
+
+    Live tasks (queued / in progress) are always kept. Finished tasks are
+    archived to the task_archive table as soon as they finish and are evicted
+    from memory once they are older than the TTL, or oldest-first once the
+    store holds more than max_tasks entries. Lookups of evicted tasks fall
+    back to the archive, so memory stays flat over long uptimes without
+    losing history.
+    """
+
+    def __init__(self, db_path: str, max_tasks: int = 500, finished_ttl: float = 6 * 3600,
+                 on_change: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        """
+        Initialize the task store.
+
+        Args:
+            db_path: Path to SQLite database file used for archival
+            max_tasks: Maximum number of tasks kept in memory
+            finished_ttl: Seconds a finished task stays in memory
+            on_change: Called with (task_id, record copy) after a task record changes
+        """
+        self.db_path = db_path
+        self.on_change = on_change
+        self.max_tasks = max_tasks
+        self.finished_ttl = finished_ttl
+        self.lock = threading.RLock()
+        self.tasks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.finished_at: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.tasks)
+
+    def __contains__(self, task_id: str) -> bool:
+        with self.lock:
+            return task_id in self.tasks
+
+    def create(self, task_id: str, record: Dict[str, Any]) -> None:
+        """
+        Add a new task record.
+
+        Args:
+            task_id: Unique task ID
+            record: Task record ({"status", "type", "start_time", "params", ...})
+        """
+        with self.lock:
+            self.tasks[task_id] = record
+            self._evict()
+
+        self._notify(task_id)
+
+    def update(self, task_id: str, **fields: Any) -> None:
+        """
+        Update fields of a task record held in memory.
+
+        Args:
+            task_id: Task ID
+            **fields: Fields to set on the record
+        """
+        with self.lock:
+            if task_id not in self.tasks:
+                return
+            self.tasks[task_id].update(fields)
+
+        self._notify(task_id)
+
+    def set_results(self, task_id: str, results: Dict[str, Any]) -> None:
+        """
+        Set the (possibly partial) results of a task.
+
+        Args:
+            task_id: Task ID
+            results: Results dictionary
+        """
+        with self.lock:
+            self.results[task_id] = results
+
+    def apply(self, task_id: str, fn: Callable[[Dict[str, Any], Dict[str, Any]], Any],
+              notify: bool = True) -> Any:
+        """
+        Atomically read and modify a task record and its results.
+
+        Args:
+            task_id: Task ID
+            fn: Function called with (record, results) while the store is locked
+            notify: Whether to report the change to on_change
+
+        Returns:
+            The return value of fn
+        """
+        with self.lock:
+            value = fn(self.tasks[task_id], self.results.setdefault(task_id, {}))
+
+        if notify:
+            self._notify(task_id)
+        return value
+
+    def finish(self, task_id: str, status: str, results: Dict[str, Any],
+               error: Optional[str] = None) -> None:
+        """
+        Record the final status and results of a task and archive it.
+
+        Args:
+            task_id: Task ID
+            status: Final status ('completed' or 'failed')
+            results: Final results dictionary
+            error: Error message if the task failed
+        """
+        with self.lock:
+            record = self.tasks.get(task_id)
+            if record is None:
+                return
+
+            record["status"] = status
+            record["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if error is not None:
+                record["error"] = error
+
+            self.results[task_id] = results
+            self.finished_at[task_id] = time.monotonic()
+            record_json = json.dumps(record, ensure_ascii=False, default=str)
+            results_json = json.dumps(results, ensure_ascii=False, default=str)
+
+        self._archive(task_id, record, record_json, results_json)
+
+        with self.lock:
+            self._evict()
+
+        if self.on_change:
+            self.on_change(task_id, json.loads(record_json))
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a copy of a task record, falling back to the archive.
+
+        Args:
+            task_id: Task ID
+
+        Returns:
+            Task record, or None if the task is unknown
+        """
+        with self.lock:
+            if task_id in self.tasks:
+                return copy.deepcopy(self.tasks[task_id])
+
+        archived = self._load_archived(task_id)
+        return archived[0] if archived else None
+
+    def get_results(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a copy of a task's results, falling back to the archive.
+
+        Args:
+            task_id: Task ID
+
+        Returns:
+            Results dictionary, or None if there are none
+        """
+        with self.lock:
+            if task_id in self.tasks:
+                results = self.results.get(task_id)
+                return copy.deepcopy(results) if results is not None else None
+
+        archived = self._load_archived(task_id)
+        return archived[1] if archived else None
+
+    def list_tasks(self, status: Optional[str] = None, task_type: Optional[str] = None,
+                   limit: int = 50, offset: int = 0,
+                   include_archived: bool = False) -> Tuple[List[Tuple[str, Dict[str, Any]]], int]:
+        """
+        List tasks newest first with filtering and pagination.
+
+        Args:
+            status: Only include tasks with this status
+            task_type: Only include tasks of this type
+            limit: Maximum number of tasks to return
+            offset: Number of tasks to skip
+            include_archived: Also include finished tasks already evicted from memory
+
+        Returns:
+            Tuple of (list of (task_id, record) pairs, total number of matching tasks)
+        """
+        def matches(record: Dict[str, Any]) -> bool:
+            return ((status is None or record["status"] == status) and
+                    (task_type is None or record["type"] == task_type))
+
+        if include_archived:
+            # Finished tasks are all in the archive, so memory only adds live ones
+            candidates = [(task_id, record) for task_id, record in self._records()
+                          if record["status"] not in FINISHED_STATUSES and matches(record)]
+        else:
+            candidates = [(task_id, record) for task_id, record in self._records() if matches(record)]
+
+        candidates.sort(key=lambda item: item[1].get("start_time", ""), reverse=True)
+
+        if not include_archived:
+            return candidates[offset:offset + limit], len(candidates)
+
+        if status is not None and status not in FINISHED_STATUSES:
+            return candidates[offset:offset + limit], len(candidates)
+
+        # Live tasks are newer than archived ones, so they lead the listing
+        page = candidates[offset:offset + limit]
+        archive_offset = max(0, offset - len(candidates))
+        archive_limit = limit - len(page)
+
+        where = "1 = 1"
+        params: tuple = ()
+        if status is not None:
+            where += " AND status = ?"
+            params += (status,)
+        if task_type is not None:
+            where += " AND task_type = ?"
+            params += (task_type,)
+
+        db = DatabaseManager(self.db_path)
+        try:
+            archived_total = db.fetchone(f"SELECT COUNT(*) FROM task_archive WHERE {where}", params)[0]
+            rows = []
+            if archive_limit > 0:
+                rows = db.fetchall(
+                    f"""
+                    SELECT task_id, record FROM task_archive
+                    WHERE {where}
+                    ORDER BY start_time DESC
+                    LIMIT ? OFFSET ?
+                    """,
+                    params + (archive_limit, archive_offset)
+                )
+        finally:
+            db.close()
+
+        page.extend((row[0], json.loads(row[1])) for row in rows)
+        return page, len(candidates) + archived_total
+
+    def status_counts(self) -> Dict[str, int]:
+        """
+        Count in-memory tasks by status.
+
+        Returns:
+            Dictionary mapping status to number of tasks
+        """
+        with self.lock:
+            counts: Dict[str, int] = {}
+            for record in self.tasks.values():
+                counts[record["status"]] = counts.get(record["status"], 0) + 1
+            return counts
+
+    def _records(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Copies of all task records held by the store, oldest first."""
+        with self.lock:
+            return [(task_id, copy.deepcopy(record)) for task_id, record in self.tasks.items()]
+
+    def _notify(self, task_id: str) -> None:
+        """Report the current state of a task to on_change."""
+        if not self.on_change:
+            return
+
+        with self.lock:
+            record = self.tasks.get(task_id)
+            if record is None:
+                return
+            record = copy.deepcopy(record)
+
+        self.on_change(task_id, record)
+
+    def _evict(self) -> None:
+        """Drop expired finished tasks, then the oldest finished ones while over capacity."""
+        now = time.monotonic()
+        expired = [task_id for task_id, finished in self.finished_at.items()
+                   if now - finished > self.finished_ttl]
+        for task_id in expired:
+            self._drop(task_id)
+
+        if len(self.tasks) <= self.max_tasks:
+            return
+
+        # Oldest first by creation order; live tasks are never evicted
+        for task_id in [t for t in self.tasks if t in self.finished_at]:
+            if len(self.tasks) <= self.max_tasks:
+                break
+            self._drop(task_id)
+
+    def _drop(self, task_id: str) -> None:
+        """Remove a task from memory."""
+        self.tasks.pop(task_id, None)
+        self.results.pop(task_id, None)
+        self.finished_at.pop(task_id, None)
+
+    def _archive(self, task_id: str, record: Dict[str, Any], record_json: str, results_json: str) -> None:
+        """Write a finished task to the task_archive table."""
+        db = DatabaseManager(self.db_path)
+        try:
+            db.execute(
+                """
+                INSERT OR REPLACE INTO task_archive
+                    (task_id, task_type, status, start_time, end_time, record, results)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (task_id, record["type"], record["status"], record.get("start_time"),
+                 record.get("end_time"), record_json, results_json)
+            )
+            db.get_connection().commit()
+        except Exception as e:
+            print(f"Error archiving task {task_id}: {e}")
+        finally:
+            db.close()
+
+    def _load_archived(self, task_id: str) -> Optional[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """Load a task record and its results from the archive."""
+        db = DatabaseManager(self.db_path)
+        try:
+            row = db.fetchone(
+                "SELECT record, results FROM task_archive WHERE task_id = ?",
+                (task_id,)
+            )
+        finally:
+            db.close()
+
+        if not row:
+            return None
+        return json.loads(row[0]), json.loads(row[1]) if row[1] else None
+
+
+class SharedTaskStore(TaskStore):
+    """
+    Task store kept in the database, shared by several server processes.
+
+    Same interface and eviction rules as TaskStore, but task records and
+    results live in the task_state table instead of process memory, so API
+    workers and pipeline workers in different processes see the same tasks.
+    Read-modify-write updates (apply) run in an immediate transaction, which
+    makes them atomic across processes.
+    """
+
+    def __init__(self, db_path: str, max_tasks: int = 500, finished_ttl: float = 6 * 3600,
+                 on_change: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        """
+        Initialize the task store.
+
+        Args:
+            db_path: Path to SQLite database file
+            max_tasks: Maximum number of tasks kept in task_state
+            finished_ttl: Seconds a finished task stays in task_state
+            on_change: Called with (task_id, record copy) after a task record changes
+        """
+        super().__init__(db_path, max_tasks, finished_ttl, on_change)
+        # Opened once; each thread gets its own connection from it
+        self.db = DatabaseManager(db_path)
+
+    def __len__(self) -> int:
+        db = self.db
+        try:
+            return db.fetchone("SELECT COUNT(*) FROM task_state")[0]
+        finally:
+            db.close()
+
+    def __contains__(self, task_id: str) -> bool:
+        db = self.db
+        try:
+            return db.fetchone("SELECT 1 FROM task_state WHERE task_id = ?", (task_id,)) is not None
+        finally:
+            db.close()
+
+    def create(self, task_id: str, record: Dict[str, Any]) -> None:
+        """
+        Add a new task record.
+
+        Args:
+            task_id: Unique task ID
+            record: Task record ({"status", "type", "start_time", "params", ...})
+        """
+        db = self.db
+        try:
+            db.execute(
+                """
+                INSERT OR REPLACE INTO task_state (task_id, status, record, created_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (task_id, record["status"], json.dumps(record, ensure_ascii=False, default=str), time.time())
+            )
+            db.get_connection().commit()
+            self._evict_shared(db)
+        finally:
+            db.close()
+
+        self._notify(task_id)
+
+    def update(self, task_id: str, **fields: Any) -> None:
+        """
+        Update fields of a live task record.
+
+        Args:
+            task_id: Task ID
+            **fields: Fields to set on the record
+        """
+        try:
+            self.apply(task_id, lambda record, results: record.update(fields))
+        except KeyError:
+            return
+
+    def set_results(self, task_id: str, results: Dict[str, Any]) -> None:
+        """
+        Set the (possibly partial) results of a task.
+
+        Args:
+            task_id: Task ID
+            results: Results dictionary
+        """
+        db = self.db
+        try:
+            db.execute("UPDATE task_state SET results = ? WHERE task_id = ?",
+                       (json.dumps(results, ensure_ascii=False, default=str), task_id))
+            db.get_connection().commit()
+        finally:
+            db.close()
+
+    def apply(self, task_id: str, fn: Callable[[Dict[str, Any], Dict[str, Any]], Any],
+              notify: bool = True) -> Any:
+        """
+        Atomically read and modify a task record and its results.
+
+        Args:
+            task_id: Task ID
+            fn: Function called with (record, results) inside the transaction
+            notify: Whether to report the change to on_change
+
+        Returns:
+            The return value of fn
+
+        Raises:
+            KeyError: If the task is not in the store
+        """
+        db = self.db
+        try:
+            conn = db.get_connection()
+            # Takes the write lock up front so no other process changes the task in between
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT record, results FROM task_state WHERE task_id = ?",
+                                   (task_id,)).fetchone()
+                if row is None:
+                    raise KeyError(task_id)
+
+                record = json.loads(row[0])
+                results = json.loads(row[1]) if row[1] else {}
+                value = fn(record, results)
+
+                conn.execute(
+                    "UPDATE task_state SET status = ?, record = ?, results = ? WHERE task_id = ?",
+                    (record["status"], json.dumps(record, ensure_ascii=False, default=str),
+                     json.dumps(results, ensure_ascii=False, default=str), task_id)
+                )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        finally:
+            db.close()
+
+        if notify and self.on_change:
+            self.on_change(task_id, record)
+        return value
+
+    def finish(self, task_id: str, status: str, results: Dict[str, Any],
+               error: Optional[str] = None) -> None:
+        """
+        Record the final status and results of a task and archive it.
+
+        Args:
+            task_id: Task ID
+            status: Final status ('completed' or 'failed')
+            results: Final results dictionary
+            error: Error message if the task failed
+        """
+        def close(record: Dict[str, Any], stored_results: Dict[str, Any]) -> Dict[str, Any]:
+            record["status"] = status
+            record["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if error is not None:
+                record["error"] = error
+            stored_results.clear()
+            stored_results.update(results)
+            return record
+
+        try:
+            record = self.apply(task_id, close, notify=False)
+        except KeyError:
+            return
+
+        record_json = json.dumps(record, ensure_ascii=False, default=str)
+        self._archive(task_id, record, record_json, json.dumps(results, ensure_ascii=False, default=str))
+
+        db = self.db
+        try:
+            db.execute("UPDATE task_state SET finished_at = ? WHERE task_id = ?", (time.time(), task_id))
+            db.get_connection().commit()
+            self._evict_shared(db)
+        finally:
+            db.close()
+
+        if self.on_change:
+            self.on_change(task_id, json.loads(record_json))
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a task record, falling back to the archive.
+
+        Args:
+            task_id: Task ID
+
+        Returns:
+            Task record, or None if the task is unknown
+        """
+        row = self._load_state(task_id)
+        if row:
+            return json.loads(row[0])
+
+        archived = self._load_archived(task_id)
+        return archived[0] if archived else None
+
+    def get_results(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a task's results, falling back to the archive.
+
+        Args:
+            task_id: Task ID
+
+        Returns:
+            Results dictionary, or None if there are none
+        """
+        row = self._load_state(task_id)
+        if row:
+            return json.loads(row[1]) if row[1] else None
+
+        archived = self._load_archived(task_id)
+        return archived[1] if archived else None
+
+    def status_counts(self) -> Dict[str, int]:
+        """
+        Count tasks in the store by status.
+
+        Returns:
+            Dictionary mapping status to number of tasks
+        """
+        db = self.db
+        try:
+            return dict(db.fetchall("SELECT status, COUNT(*) FROM task_state GROUP BY status"))
+        finally:
+            db.close()
+
+    def _records(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """All task records in the store, oldest first."""
+        db = self.db
+        try:
+            rows = db.fetchall("SELECT task_id, record FROM task_state ORDER BY created_at")
+        finally:
+            db.close()
+        return [(task_id, json.loads(record)) for task_id, record in rows]
+
+    def _notify(self, task_id: str) -> None:
+        """Report the current state of a task to on_change."""
+        if not self.on_change:
+            return
+
+        row = self._load_state(task_id)
+        if row:
+            self.on_change(task_id, json.loads(row[0]))
+
+    def _load_state(self, task_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Load the JSON record and results of a task in task_state."""
+        db = self.db
+        try:
+            return db.fetchone("SELECT record, results FROM task_state WHERE task_id = ?", (task_id,))
+        finally:
+            db.close()
+
+    def _evict_shared(self, db: DatabaseManager) -> None:
+        """Drop expired finished tasks, then the oldest finished ones while over capacity."""
+        db.execute("DELETE FROM task_state WHERE finished_at IS NOT NULL AND finished_at < ?",
+                   (time.time() - self.finished_ttl,))
+
+        excess = db.fetchone("SELECT COUNT(*) FROM task_state")[0] - self.max_tasks
+        if excess > 0:
+            # Oldest first by creation time; live tasks are never evicted
+            db.execute(
+                """
+                DELETE FROM task_state WHERE task_id IN (
+                    SELECT task_id FROM task_state WHERE finished_at IS NOT NULL
+                    ORDER BY created_at LIMIT ?
+                )
+                """,
+                (excess,)
+            )
+        db.get_connection().commit()
@@ -0,0 +1,221 @@
+"""Energy-based voice activity detection on 16 kHz PCM."""
+
+from typing import List, Optional, Tuple, Iterable, Iterator
+
+import numpy as np
+
+from modules.audio_decode import SAMPLE_RATE
+
+# (start in chunk, start in source, duration), all in seconds
+Piece = Tuple[float, float, float]
+
+
+class NoiseFloor:
+    """
+    Running noise floor of one PCM stream, in dB.
+
+    A single 30-second frame of continuous speech has no quiet tenth, so its
+    own percentile would put the floor at speech level. The floor therefore
+    follows quieter frames at once and louder ones only slowly.
+    """
+
+    def __init__(self, rise: float = 0.1):
+        """
+        Initialize the tracker.
+
+        Args:
+            rise: Share of the gap closed per frame when a frame's floor is higher
+        """
+        self.rise = rise
+        self.level = None
+
+    def update(self, frame_floor: float) -> float:
+        """
+        Fold in the floor estimated from one frame.
+
+        Args:
+            frame_floor: Noise floor estimate of the frame in dB
+
+        Returns:
+            Running noise floor in dB
+        """
+        if self.level is None or frame_floor < self.level:
+            self.level = frame_floor
+        else:
+            self.level += self.rise * (frame_floor - self.level)
+        return self.level
+
+
+class EnergyVAD:
+    """Marks speech where short-time energy exceeds an adaptive threshold."""
+
+    def __init__(self, frame_ms: float = 30.0, margin_db: float = 12.0, floor_db: float = -55.0,
+                 min_speech: float = 0.25, min_silence: float = 0.6, padding: float = 0.2,
+                 sample_rate: int = SAMPLE_RATE):
+        """
+        Initialize the detector.
+
+        Args:
+            frame_ms: Analysis frame length in milliseconds
+            margin_db: How far above the noise floor a frame must be to count as speech
+            floor_db: Frames quieter than this are never speech
+            min_speech: Speech regions shorter than this (seconds) are dropped
+            min_silence: Gaps shorter than this (seconds) don't split a region
+            padding: Seconds added before and after each region
+            sample_rate: Sample rate of the PCM passed in
+        """
+        self.frame_size = max(1, int(sample_rate * frame_ms / 1000))
+        self.margin_db = margin_db
+        self.floor_db = floor_db
+        self.min_speech = min_speech
+        self.min_silence = min_silence
+        self.padding = padding
+        self.sample_rate = sample_rate
+
+    def frame_energy(self, pcm: np.ndarray) -> np.ndarray:
+        """
+        Compute the energy of consecutive frames.
+
+        Args:
+            pcm: 1-D float32 samples
+
+        Returns:
+            Energy of each frame in dB (a partial last frame is included)
+        """
+        count = -(-len(pcm) // self.frame_size)
+        frames = np.zeros(count * self.frame_size, dtype=np.float32)
+        frames[:len(pcm)] = pcm
+        frames = frames.reshape(count, self.frame_size)
+        power = np.mean(frames * frames, axis=1)
+        return 10.0 * np.log10(power + 1e-10)
+
+    def speech_regions(self, pcm: np.ndarray,
+                       noise_floor: Optional[NoiseFloor] = None) -> List[Tuple[float, float]]:
+        """
+        Find the speech regions of a PCM buffer.
+
+        Args:
+            pcm: 1-D float32 samples
+            noise_floor: Running floor of the stream the buffer belongs to
+                         (default: estimate the floor from this buffer alone)
+
+        Returns:
+            (start, end) pairs in seconds from the start of the buffer
+        """
+        if len(pcm) == 0:
+            return []
+
+        energy = self.frame_energy(pcm)
+        # The quietest tenth of the frames approximates the noise floor of this recording
+        floor = float(np.percentile(energy, 10))
+        if noise_floor is not None:
+            floor = noise_floor.update(floor)
+        threshold = max(floor + self.margin_db, self.floor_db)
+        active = energy > threshold
+
+        # Rising and falling edges of the active mask give the raw regions
+        edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        if len(starts) == 0:
+            return []
+
+        frame_seconds = self.frame_size / self.sample_rate
+        starts = starts * frame_seconds
+        ends = ends * frame_seconds
+
+        # Close short gaps, then drop short blips
+        keep = np.concatenate(([True], starts[1:] - ends[:-1] >= self.min_silence))
+        group = np.cumsum(keep) - 1
+        merged_starts = starts[keep]
+        merged_ends = np.zeros(len(merged_starts))
+        np.maximum.at(merged_ends, group, ends)
+
+        long_enough = merged_ends - merged_starts >= self.min_speech
+        duration = len(pcm) / self.sample_rate
+
+        regions = []
+        for start, end in zip(merged_starts[long_enough], merged_ends[long_enough]):
+            start = max(0.0, start - self.padding)
+            end = min(duration, end + self.padding)
+            if regions and start <= regions[-1][1]:
+                regions[-1] = (regions[-1][0], end)
+            else:
+                regions.append((start, end))
+
+        return [(float(start), float(end)) for start, end in regions]
+
+
+def pack_speech(frames: Iterable[np.ndarray], vad: EnergyVAD, chunk_seconds: float = 30.0,
+                sample_rate: int = SAMPLE_RATE) -> Iterator[Tuple[List[Piece], np.ndarray]]:
+    """
+    Pack the speech of a PCM stream into chunks for the speech model.
+
+    The model then only sees speech; the pieces of each chunk keep transcript
+    timestamps pointing into the original audio.
+
+    Args:
+        frames: Consecutive PCM frames of one source (e.g. from stream_pcm)
+        vad: Detector used on each frame
+        chunk_seconds: Maximum chunk length in seconds
+        sample_rate: Sample rate of the frames
+
+    Yields:
+        (pieces, pcm) pairs: the chunk's samples and the pieces mapping chunk
+        time to source time
+    """
+    limit = int(chunk_seconds * sample_rate)
+    buffer: List[np.ndarray] = []
+    pieces: List[Piece] = []
+    filled = 0
+    frame_start = 0
+    noise_floor = NoiseFloor()
+
+    for frame in frames:
+        for start, end in vad.speech_regions(frame, noise_floor):
+            first = int(start * sample_rate)
+            last = int(end * sample_rate)
+
+            while first < last:
+                if filled == limit:
+                    yield pieces, np.concatenate(buffer)
+                    buffer, pieces, filled = [], [], 0
+
+                take = min(last - first, limit - filled)
+                source_start = (frame_start + first) / sample_rate
+
+                previous = pieces[-1] if pieces else None
+                if previous and abs(previous[1] + previous[2] - source_start) < 1.0 / sample_rate:
+                    # Continues the previous piece across a frame boundary
+                    pieces[-1] = (previous[0], previous[1], previous[2] + take / sample_rate)
+                else:
+                    pieces.append((filled / sample_rate, source_start, take / sample_rate))
+
+                buffer.append(frame[first:first + take])
+                filled += take
+                first += take
+
+        frame_start += len(frame)
+
+    if filled:
+        yield pieces, np.concatenate(buffer)
+
+
+def source_time(pieces: List[Piece], chunk_time: float) -> float:
+    """
+    Map a time within a packed chunk back to the source.
+
+    Args:
+        pieces: Pieces of the chunk
+        chunk_time: Seconds from the start of the chunk
+
+    Returns:
+        Seconds from the start of the source
+    """
+    piece = pieces[0]
+    for candidate in pieces:
+        if candidate[0] > chunk_time:
+            break
+        piece = candidate
+    chunk_start, source_start, duration = piece
+    return source_start + min(max(chunk_time - chunk_start, 0.0), duration)
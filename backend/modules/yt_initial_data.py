@@ -0,0 +1,273 @@
+"""
+Pure parsers for the ytInitialData, ytInitialPlayerResponse and ytcfg JSON
+YouTube embeds in its HTML pages.
+"""
+
+import json
+import re
+from typing import Dict, List, Any, Optional, Iterator
+
+_decoder = json.JSONDecoder()
+
+
+def extract_json_variable(html: str, name: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract a JSON object assigned to a JavaScript variable in an HTML page.
+
+    Handles the `var name = {...};`, `window["name"] = {...};` and
+    `name = {...};` forms.
+
+    Args:
+        html: Raw HTML of the page
+        name: Variable name (e.g. 'ytInitialData')
+
+    Returns:
+        Parsed object, or None if the variable is missing or malformed
+    """
+    pattern = re.compile(r'(?:var\s+|window\[["\'])?' + re.escape(name) + r'(?:["\']\])?\s*=\s*(?={)')
+
+    for match in pattern.finditer(html):
+        try:
+            value, _ = _decoder.raw_decode(html, match.end())
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value
+
+    return None
+
+
+def extract_initial_data(html: str) -> Optional[Dict[str, Any]]:
+    """Extract ytInitialData from a page."""
+    return extract_json_variable(html, "ytInitialData")
+
+
+def extract_player_response(html: str) -> Optional[Dict[str, Any]]:
+    """Extract ytInitialPlayerResponse from a watch page."""
+    return extract_json_variable(html, "ytInitialPlayerResponse")
+
+
+def extract_ytcfg(html: str) -> Dict[str, Any]:
+    """
+    Extract the client configuration passed to ytcfg.set({...}).
+
+    Args:
+        html: Raw HTML of the page
+
+    Returns:
+        Merged configuration (empty if none was found)
+    """
+    config: Dict[str, Any] = {}
+
+    for match in re.finditer(r"ytcfg\.set\s*\(\s*(?={)", html):
+        try:
+            value, _ = _decoder.raw_decode(html, match.end())
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            config.update(value)
+
+    return config
+
+
+def find_key(data: Any, key: str) -> Iterator[Any]:
+    """
+    Yield every value stored under a key anywhere in a nested JSON structure.
+
+    Args:
+        data: Parsed JSON
+        key: Key to look for
+
+    Yields:
+        Values of matching keys, depth first
+    """
+    stack = [data]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            children = []
+            for k, v in current.items():
+                if k == key:
+                    yield v
+                if isinstance(v, (dict, list)):
+                    children.append(v)
+            stack.extend(reversed(children))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+
+
+def first_key(data: Any, key: str, default: Any = None) -> Any:
+    """Return the first value stored under a key in a nested JSON structure."""
+    return next(find_key(data, key), default)
+
+
+def get_text(value: Any) -> Optional[str]:
+    """
+    Flatten a YouTube text object ({"simpleText": ...}, {"runs": [...]} or {"content": ...}).
+
+    Args:
+        value: Text object or plain string
+
+    Returns:
+        Plain text, or None if the value holds no text
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        if "simpleText" in value:
+            return value["simpleText"]
+        if "runs" in value:
+            return "".join(run.get("text", "") for run in value["runs"])
+        if "content" in value:
+            return value["content"]
+    return None
+
+
+def extract_continuation_token(data: Any) -> Optional[str]:
+    """
+    Find the token that loads the next page of a list (videos, comments, ...).
+
+    Args:
+        data: ytInitialData or a continuation response
+
+    Returns:
+        Continuation token, or None if the list is complete
+    """
+    for item in find_key(data, "continuationItemRenderer"):
+        token = first_key(item, "token")
+        if token:
+            return token
+    return None
+
+
+def _parse_like_count(initial_data: Dict[str, Any]) -> int:
+    """Read the like count from the like button's accessibility label."""
+    for button in find_key(initial_data, "likeButtonViewModel"):
+        for label in find_key(button, "accessibilityText"):
+            digits = re.sub(r"\D", "", label or "")
+            if digits:
+                return int(digits)
+
+    for renderer in find_key(initial_data, "toggleButtonRenderer"):
+        label = first_key(renderer.get("defaultText", {}), "label")
+        if label and "like" in label.lower():
+            digits = re.sub(r"\D", "", label)
+            if digits:
+                return int(digits)
+
+    return 0
+
+
+def parse_video_details(html: str, video_url: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse video metadata from a watch page.
+
+    Args:
+        html: Raw HTML of the watch page
+        video_url: URL the page was fetched from
+
+    Returns:
+        Dictionary with the same fields as YouTubeChannelScraper.get_video_details
+        (plus "channel_url"), or None if the page holds no player response
+    """
+    player_response = extract_player_response(html)
+    if not player_response or "videoDetails" not in player_response:
+        return None
+
+    initial_data = extract_initial_data(html) or {}
+    details = player_response["videoDetails"]
+    microformat = player_response.get("microformat", {}).get("playerMicroformatRenderer", {})
+    primary_info = first_key(initial_data, "videoPrimaryInfoRenderer", {})
+
+    video_id = details.get("videoId", "Unknown")
+
+    view_count = get_text(first_key(primary_info.get("viewCount", {}), "viewCount"))
+    if not view_count and details.get("viewCount"):
+        view_count = f"{int(details['viewCount']):,} views"
+
+    upload_date = get_text(primary_info.get("dateText")) or microformat.get("publishDate") or "Unknown"
+
+    channel_url = microformat.get("ownerProfileUrl")
+    if not channel_url and details.get("channelId"):
+        channel_url = f"https://www.youtube.com/channel/{details['channelId']}"
+
+    return {
+        "title": details.get("title", "Unknown"),
+        "video_id": video_id,
+        "url": video_url,
+        "views": view_count or "Unknown",
+        "likes": _parse_like_count(initial_data),
+        "upload_date": upload_date,
+        "description": details.get("shortDescription") or "No description available",
+        "thumbnail": f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg",
+        "channel_url": channel_url
+    }
+
+
+def parse_channel_info(html: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse channel metadata from a channel page.
+
+    Args:
+        html: Raw HTML of the channel page
+
+    Returns:
+        Dictionary with "channel_name", "external_id", "subscribers",
+        "description" and "thumbnail", or None if the page holds no channel metadata
+    """
+    initial_data = extract_initial_data(html)
+    if not initial_data:
+        return None
+
+    metadata = initial_data.get("metadata", {}).get("channelMetadataRenderer")
+    if not metadata:
+        return None
+
+    subscribers = get_text(first_key(initial_data.get("header", {}), "subscriberCountText"))
+    if not subscribers:
+        # Newer page headers list the count among plain metadata parts
+        for content in find_key(initial_data.get("header", {}), "content"):
+            if isinstance(content, str) and "subscriber" in content.lower():
+                subscribers = content
+                break
+
+    thumbnails = metadata.get("avatar", {}).get("thumbnails", [])
+
+    return {
+        "channel_name": metadata.get("title", "Unknown"),
+        "external_id": metadata.get("externalId"),
+        "subscribers": subscribers or "Hidden",
+        "description": metadata.get("description") or "No description available",
+        "thumbnail": thumbnails[-1]["url"] if thumbnails else None
+    }
+
+
+def parse_video_renderers(data: Any) -> List[Dict[str, Any]]:
+    """
+    Parse the videos listed in a channel's videos tab (or a continuation of it).
+
+    Args:
+        data: ytInitialData of the videos tab or a browse continuation response
+
+    Returns:
+        List of dictionaries with the same fields as YouTubeChannelScraper.get_channel_videos
+    """
+    videos = []
+
+    for renderer in find_key(data, "videoRenderer"):
+        video_id = renderer.get("videoId")
+        if not video_id:
+            continue
+
+        videos.append({
+            "title": get_text(renderer.get("title")) or "Unknown",
+            "video_id": video_id,
+            "url": f"https://www.youtube.com/watch?v={video_id}",
+            "views": get_text(renderer.get("viewCountText")) or "Unknown",
+            "upload_date": get_text(renderer.get("publishedTimeText")) or "Unknown",
+            "thumbnail": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+        })
+
+    return videos
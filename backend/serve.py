@@ -0,0 +1,206 @@
+"""
+Production server: API workers and pipeline workers in separate processes.
+
+    python serve.py --api-workers 4 --pipeline-workers 2 --workers 2 --transcribe
+"""
+
+import os
+import time
+import signal
+import threading
+import multiprocessing
+from typing import Dict, Any, List
+
+from modules.job_queue import SharedJobQueue
+
+
+def run_pipeline_process(options: Dict[str, Any], drain_timeout: float) -> None:
+    """
+    Run pipeline worker threads until SIGTERM, then drain them.
+
+    Args:
+        options: initialize_server keyword arguments
+        drain_timeout: Maximum seconds to wait for in-flight jobs on shutdown
+    """
+    import app as server
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    # Ctrl+C reaches the whole process group; the supervisor turns it into SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    server.initialize_server(**options, shared_state=True)
+    try:
+        stop.wait()
+    finally:
+        server.shutdown_server(drain_timeout)
+
+
+def run_api_process(bind: str, workers: int, threads: int, app_options: Dict[str, Any]) -> None:
+    """
+    Serve the API with gunicorn.
+
+    Args:
+        bind: Address to listen on ("host:port")
+        workers: Number of API worker processes
+        threads: Threads per API worker (long-lived SSE streams each hold one)
+        app_options: create_app keyword arguments
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class APIServer(BaseApplication):
+        """Gunicorn application that builds a stateless API app in every worker."""
+
+        def load_config(self):
+            self.cfg.set("bind", bind)
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", threads)
+            # Workers are forked before the app is created, so no database handles are shared
+            self.cfg.set("preload_app", False)
+
+        def load(self):
+            from app import create_app
+            return create_app(**app_options)
+
+    APIServer().run()
+
+
+class Supervisor:
+    """
+    Starts, restarts and stops the API and pipeline worker processes.
+
+    The API runs under gunicorn; pipeline processes take jobs from the job
+    queue in the database, which also holds the task state and events every
+    process shares. A pipeline process that dies is restarted and its jobs
+    are queued again; SIGTERM or Ctrl+C drains everything.
+    """
+
+    def __init__(self, db_path: str, pipeline_options: List[Dict[str, Any]], api_args: tuple,
+                 drain_timeout: float = 300.0):
+        """
+        Initialize the supervisor.
+
+        Args:
+            db_path: Path to SQLite database file
+            pipeline_options: initialize_server keyword arguments of each pipeline process
+            api_args: Arguments of run_api_process
+            drain_timeout: Maximum seconds to wait for in-flight jobs on shutdown
+        """
+        self.queue = SharedJobQueue(db_path)
+        self.pipeline_options = pipeline_options
+        self.api_args = api_args
+        self.drain_timeout = drain_timeout
+        # Spawned, not forked: children start without this process's threads and connections
+        self.context = multiprocessing.get_context("spawn")
+        self.pipelines: List[Any] = [None] * len(pipeline_options)
+        self.api = None
+        self.stopping = threading.Event()
+
+    def run(self) -> None:
+        """Start all processes and watch them until shutdown."""
+        # No worker is running yet, so every claim is left over from the last run
+        released = self.queue.release_claims()
+        if released:
+            print(f"Re-queued {released} jobs left running by the last server")
+
+        for index in range(len(self.pipelines)):
+            self._start_pipeline(index)
+
+        self.api = self.context.Process(target=run_api_process, args=self.api_args, name="api")
+        self.api.start()
+
+        try:
+            while not self.stopping.wait(2.0):
+                if not self.api.is_alive():
+                    print(f"API server exited with code {self.api.exitcode}; shutting down")
+                    break
+
+                for index, process in enumerate(self.pipelines):
+                    if not process.is_alive():
+                        # Jobs the process held go back to the queue for the other workers
+                        released = self.queue.release_claims(SharedJobQueue.worker_id(process.pid))
+                        print(f"Pipeline worker {process.pid} exited with code {process.exitcode}; "
+                              f"re-queued {released} jobs and restarting it")
+                        self._start_pipeline(index)
+        finally:
+            self.shutdown()
+
+    def stop(self, signum=None, frame=None) -> None:
+        """Ask run() to shut down (signal handler)."""
+        self.stopping.set()
+
+    def shutdown(self) -> None:
+        """Stop the API, then drain the pipeline workers."""
+        if self.api is not None and self.api.is_alive():
+            self.api.terminate()
+            self.api.join(30)
+
+        for process in self.pipelines:
+            if process is not None and process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.drain_timeout + 10
+        for process in self.pipelines:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"Pipeline worker {process.pid} did not drain in time; killing it")
+                process.kill()
+                process.join()
+
+        print("Server stopped")
+
+    def _start_pipeline(self, index: int) -> None:
+        """Start (or restart) one pipeline worker process."""
+        process = self.context.Process(
+            target=run_pipeline_process,
+            args=(self.pipeline_options[index], self.drain_timeout),
+            name=f"pipeline-{index}"
+        )
+        process.start()
+        self.pipelines[index] = process
+        print(f"Started pipeline worker {index} (pid {process.pid})")
+
+
+def main():
+    """Parse the command line and run the supervisor."""
+    from app import build_arg_parser, server_options
+
+    parser = build_arg_parser('YouTube Analysis Server (multi-process)')
+    parser.add_argument('--api-workers', type=int, default=os.cpu_count() or 2,
+                        help='Number of API worker processes (default: number of CPUs)')
+    parser.add_argument('--api-threads', type=int, default=8,
+                        help='Threads per API worker; each open task stream holds one')
+    parser.add_argument('--pipeline-workers', type=int, default=1,
+                        help='Number of pipeline worker processes; each runs --workers threads '
+                             'and loads its own browsers and models')
+
+    args = parser.parse_args()
+
+    options = server_options(args)
+    # Only the first pipeline process runs the refresh scheduler
+    pipeline_options = [dict(options, refresh_budget=options["refresh_budget"] if index == 0 else 0)
+                        for index in range(max(1, args.pipeline_workers))]
+    app_options = {
+        "db_file_path": args.db,
+        "output_dir": args.output,
+        "max_tasks": args.max_tasks,
+        "task_ttl_hours": args.task_ttl,
+        "response_ttl": args.cache_ttl
+    }
+
+    supervisor = Supervisor(
+        args.db, pipeline_options,
+        (f"{args.host}:{args.port}", max(1, args.api_workers), max(1, args.api_threads), app_options),
+        args.drain_timeout
+    )
+    signal.signal(signal.SIGTERM, supervisor.stop)
+    signal.signal(signal.SIGINT, supervisor.stop)
+
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
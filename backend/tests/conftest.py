@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Modules are imported as in the server, relative to the backend folder
+sys.path.insert(0, BACKEND_DIR)
+
+
+def read_fixture(name: str) -> str:
+    """Read a saved page or response from tests/fixtures."""
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def fixture_text():
+    return read_fixture
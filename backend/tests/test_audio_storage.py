@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import BACKEND_DIR
+from db.db_setup import DatabaseManager
+from modules import audio_storage
+from modules.audio_storage import AudioStore, SAMPLE_RATE
+
+
+def read_raw_pcm(file_path, frame_seconds):
+    """Decoder for the test downloads, which hold raw float32 samples instead of m4a."""
+    samples = np.fromfile(file_path, dtype="<f4")
+    frame_size = int(frame_seconds * SAMPLE_RATE)
+    for position in range(0, len(samples), frame_size):
+        yield samples[position:position + frame_size]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # DatabaseManager loads db/schema.sql relative to the backend folder
+    monkeypatch.chdir(BACKEND_DIR)
+    # Downloads are decoded without ffmpeg; reading stored PCM never needs it
+    monkeypatch.setattr(audio_storage, "stream_pcm", read_raw_pcm)
+
+    db = DatabaseManager(str(tmp_path / "test.db"))
+    channel_id = db.insert("channels", {"channel_id": "@kenhthunghiem", "channel_name": "Kênh Thử Nghiệm",
+                                        "url": "https://www.youtube.com/@kenhthunghiem"})
+    for i in range(1, 4):
+        video_id = db.insert("videos", {"video_id": f"vid0000000{i}", "channel_id": channel_id,
+                                        "title": f"Video {i}", "url": f"https://www.youtube.com/watch?v=vid0000000{i}"})
+        add_download(db, tmp_path, video_id, tone(i), checksum=f"sha-{i}")
+    yield db
+    db.close()
+
+
+def tone(seed, seconds=1.0):
+    return np.full(int(seconds * SAMPLE_RATE), seed / 10, dtype="<f4")
+
+
+def add_download(db, tmp_path, video_id, pcm, checksum):
+    path = str(tmp_path / f"download_{video_id}_{checksum}.raw")
+    pcm.tofile(path)
+    return db.insert("audio_files", {"video_id": video_id, "file_path": path, "format_type": "raw",
+                                     "file_size": os.path.getsize(path), "checksum": checksum})
+
+
+def stored_pcm(store, audio_id, **kwargs):
+    return np.concatenate(list(store.stream_pcm(audio_id, **kwargs)))
+
+
+def test_archived_audio_is_read_back_from_the_pcm_container(db, tmp_path):
+    store = AudioStore(db.db_path, str(tmp_path / "store"))
+    download, = db.fetchone("SELECT file_path FROM audio_files WHERE id = 1")
+
+    assert store.archive(1)
+
+    assert not os.path.exists(download)
+    assert db.fetchone("SELECT evicted FROM audio_files WHERE id = 1") == (1,)
+    np.testing.assert_allclose(stored_pcm(store, 1), tone(1), atol=1 / 32768)
+    assert len(stored_pcm(store, 1, start=0.5, duration=0.25)) == SAMPLE_RATE // 4
+
+
+def test_identical_audio_is_stored_once(db, tmp_path):
+    store = AudioStore(db.db_path, str(tmp_path / "store"))
+    copy_id = add_download(db, tmp_path, 2, tone(1), checksum="sha-1")
+
+    store.archive(1)
+    store.archive(copy_id)
+
+    assert store.stats()["recordings"] == 1
+    np.testing.assert_allclose(stored_pcm(store, copy_id), tone(1), atol=1 / 32768)
+
+
+def test_least_recently_used_audio_is_dropped_and_the_container_compacted(db, tmp_path):
+    recording_bytes = SAMPLE_RATE * 2
+    store = AudioStore(db.db_path, str(tmp_path / "store"), hot_bytes=None, max_bytes=2 * recording_bytes,
+                       compact_ratio=0.3)
+    for audio_id in (1, 2, 3):
+        store.archive(audio_id)
+    for audio_id, accessed in [(1, "2026-10-19 10:00:00"), (2, "2026-10-19 09:00:00"), (3, "2026-10-19 11:00:00")]:
+        db.update("audio_store", {"last_accessed": accessed}, "audio_id = ?", (audio_id,))
+
+    assert store.enforce_retention() == {"demoted": 0, "dropped": 1}
+
+    assert not store.has(2)
+    assert store.stats()["disk_bytes"] == 2 * recording_bytes
+    np.testing.assert_allclose(stored_pcm(store, 3), tone(3), atol=1 / 32768)
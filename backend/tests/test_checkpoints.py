@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import BACKEND_DIR
+from db.db_setup import DatabaseManager
+from modules.checkpoints import JobCheckpointer
+
+TASK_ID = "5f0c7d2e-channel"
+JOB = {"id": TASK_ID, "type": "channel", "params": {"channel_url": "https://www.youtube.com/@kenhthunghiem"}}
+RECORD = {"status": "queued", "type": "channel", "start_time": "2026-10-19 10:00:00"}
+
+
+@pytest.fixture
+def checkpointer(tmp_path, monkeypatch):
+    # DatabaseManager loads db/schema.sql relative to the backend folder
+    monkeypatch.chdir(BACKEND_DIR)
+    db_path = str(tmp_path / "test.db")
+    DatabaseManager(db_path).close()
+    checkpointer = JobCheckpointer(db_path)
+    checkpointer.save_job(TASK_ID, JOB, 1, "@kenhthunghiem", RECORD)
+    return checkpointer
+
+
+def test_discovery_is_unknown_until_saved(checkpointer):
+    assert checkpointer.load_discovery(TASK_ID) is None
+    assert checkpointer.pending_jobs() == [{"task_id": TASK_ID, "job": JOB, "priority": 1,
+                                            "fair_key": "@kenhthunghiem", "record": RECORD}]
+
+
+def test_resume_skips_completed_videos(checkpointer):
+    checkpointer.save_discovery(TASK_ID, {"channel_name": "Kênh Thử Nghiệm", "errors": []}, [11, 12, 13])
+    checkpointer.complete_video(TASK_ID, 12, {"is_dangerous": True, "errors": []})
+
+    results, remaining, completed = checkpointer.load_discovery(TASK_ID)
+
+    assert results == {"channel_name": "Kênh Thử Nghiệm", "errors": []}
+    assert remaining == [11, 13]
+    assert completed == [{"is_dangerous": True, "errors": []}]
+
+
+def test_repeated_discovery_keeps_checkpoints(checkpointer):
+    checkpointer.save_discovery(TASK_ID, {"errors": []}, [11, 12])
+    checkpointer.complete_video(TASK_ID, 11, {"is_dangerous": False, "errors": []})
+    # A resumed task that runs discovery again must not re-queue finished videos
+    checkpointer.save_discovery(TASK_ID, {"errors": []}, [11, 12])
+
+    assert checkpointer.load_discovery(TASK_ID)[1] == [12]
+
+
+def test_removed_job_leaves_nothing_to_resume(checkpointer):
+    checkpointer.save_discovery(TASK_ID, {"errors": []}, [11])
+    checkpointer.remove_job(TASK_ID)
+
+    assert checkpointer.load_discovery(TASK_ID) is None
+    assert checkpointer.pending_jobs() == []
@@ -0,0 +1,135 @@
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("selenium")
+pytest.importorskip("webdriver_manager")
+
+from modules import scrape
+from modules.browser_pool import BrowserLease
+from modules.scrape import AdaptiveTimeouts, YouTubeChannelScraper
+
+
+class FakeCommentPage:
+    """
+    Stand-in for a Chrome driver showing a watch page's comment section.
+
+    Threads load one page at a time when the section is scrolled. Replies of
+    a thread load a few polls after its "replies" button is clicked, each
+    load counting as a network request like in the browser.
+    """
+
+    def __init__(self, pages, replies=None, reply_delay=2):
+        self.pages = pages
+        self.replies = replies or {}
+        self.reply_delay = reply_delay
+        self.loaded_pages = 1
+        self.requests = 1
+        self.expanded = {}
+        self.seen_replies = set()
+        self.polls = 0
+
+    @property
+    def threads(self):
+        return [thread for page in self.pages[:self.loaded_pages] for thread in page]
+
+    def get(self, url):
+        pass
+
+    def find_element(self, by, selector):
+        return object()
+
+    def execute_script(self, script, *args):
+        if script == scrape.EXTRACT_COMMENTS_JS:
+            start, limit = args
+            threads = self.threads[start:start + limit]
+            return {"next": start + len(threads), "items": [self._item(text) for text in threads]}
+        if script == scrape.EXPAND_REPLIES_JS:
+            for thread in self.threads:
+                if thread in self.replies and thread not in self.expanded:
+                    self.expanded[thread] = self.polls
+            return len(self.expanded)
+        if script == scrape.EXTRACT_REPLIES_JS:
+            items = []
+            for thread, clicked_at in self.expanded.items():
+                if self.polls - clicked_at < self.reply_delay:
+                    continue
+                for reply in self.replies[thread]:
+                    if reply not in self.seen_replies and len(items) < args[0]:
+                        self.seen_replies.add(reply)
+                        items.append(self._item(reply))
+            return items
+        if script == scrape.COMMENT_STATE_JS:
+            self.polls += 1
+            loading = sum(1 for clicked_at in self.expanded.values() if self.polls - clicked_at <= self.reply_delay)
+            self.requests += loading
+            return {"count": len(self.threads), "continuation": self.loaded_pages < len(self.pages),
+                    "requests": self.requests}
+        if script == scrape.SCROLL_COMMENTS_JS:
+            if self.loaded_pages < len(self.pages):
+                self.loaded_pages += 1
+                self.requests += 1
+            return None
+        if "querySelectorAll(arguments[0]).length" in script:
+            return len(self.threads)
+        return None
+
+    @staticmethod
+    def _item(text):
+        return {"author": "@tacgia", "text": text, "likes": "", "date": "1 ngày trước",
+                "is_verified": False, "is_pinned": False}
+
+
+class FakePool:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def checkout(self):
+        return BrowserLease(1, self.driver)
+
+    def checkin(self, lease):
+        pass
+
+
+def scraper_for(page):
+    scraper = YouTubeChannelScraper(pool=FakePool(page), use_http=False, scroll_pause_time=0.2)
+    scraper.timeouts = AdaptiveTimeouts(default=1.0, minimum=0.2, maximum=1.0)
+    return scraper
+
+
+def test_single_page_returns_replies_of_expanded_threads():
+    page = FakeCommentPage([["bình luận 1", "bình luận 2"]], replies={"bình luận 1": ["trả lời 1", "trả lời 2"]})
+
+    comments = scraper_for(page).get_video_comments("https://www.youtube.com/watch?v=vid00000001", 10,
+                                                    expand_replies=True)
+
+    assert [c["text"] for c in comments] == ["bình luận 1", "bình luận 2", "trả lời 1", "trả lời 2"]
+
+
+def test_replies_of_the_last_page_are_kept():
+    page = FakeCommentPage([["bình luận 1"], ["bình luận 2"]], replies={"bình luận 2": ["trả lời 2"]})
+
+    comments = scraper_for(page).get_video_comments("https://www.youtube.com/watch?v=vid00000001", 10,
+                                                    expand_replies=True)
+
+    assert [c["text"] for c in comments] == ["bình luận 1", "bình luận 2", "trả lời 2"]
+
+
+def test_scrolling_stops_at_the_end_of_the_list_without_waiting_out_the_timeout():
+    page = FakeCommentPage([["bình luận 1", "bình luận 2"], ["bình luận 3"]])
+
+    started = time.monotonic()
+    comments = scraper_for(page).get_video_comments("https://www.youtube.com/watch?v=vid00000001", 10)
+
+    assert [c["text"] for c in comments] == ["bình luận 1", "bình luận 2", "bình luận 3"]
+    assert time.monotonic() - started < 1.0
+
+
+def test_scrolling_stops_at_max_comments():
+    page = FakeCommentPage([["bình luận 1", "bình luận 2"], ["bình luận 3", "bình luận 4"]])
+
+    comments = scraper_for(page).get_video_comments("https://www.youtube.com/watch?v=vid00000001", 3)
+
+    assert [c["text"] for c in comments] == ["bình luận 1", "bình luận 2", "bình luận 3"]
+    assert page.loaded_pages == 2
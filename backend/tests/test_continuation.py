@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+pytest.importorskip("requests")
+
+from modules.continuation import ContinuationCrawler
+
+
+class StubTransport:
+    """Serves saved pages and continuation responses and records the requests."""
+
+    def __init__(self, pages, continuations):
+        self.pages = pages
+        self.continuations = continuations
+        self.posts = []
+
+    def get_text(self, url, headers=None):
+        import requests
+        if url not in self.pages:
+            raise requests.HTTPError(f"404 for {url}")
+        return self.pages[url]
+
+    def post_json(self, url, payload, headers=None):
+        self.posts.append((url, payload, headers))
+        return json.loads(self.continuations[payload["continuation"]])
+
+
+@pytest.fixture
+def crawler(fixture_text):
+    transport = StubTransport(
+        {
+            "https://www.youtube.com/@kenhthunghiem/videos": fixture_text("channel_videos.html"),
+            "https://www.youtube.com/watch?v=vid00000001": fixture_text("watch.html")
+        },
+        {
+            "videos-page-2": fixture_text("browse_continuation.json"),
+            "comments-page-1": fixture_text("comments_page1.json"),
+            "comments-page-2": fixture_text("comments_page2.json")
+        }
+    )
+    return ContinuationCrawler(transport)
+
+
+def test_channel_videos_pages_through_continuations(crawler):
+    videos = crawler.channel_videos("https://www.youtube.com/@kenhthunghiem/", max_videos=10)
+
+    assert [v["video_id"] for v in videos] == ["vid00000001", "vid00000002", "vid00000003", "vid00000004"]
+
+    url, payload, headers = crawler.transport.posts[0]
+    assert url == "https://www.youtube.com/youtubei/v1/browse?key=test-api-key&prettyPrint=false"
+    assert payload["continuation"] == "videos-page-2"
+    assert payload["context"]["client"]["clientName"] == "WEB"
+    assert headers == {"X-YouTube-Client-Name": "1", "X-YouTube-Client-Version": "2.20240101.00.00"}
+
+
+def test_channel_videos_stops_at_max_videos(crawler):
+    videos = crawler.channel_videos("https://www.youtube.com/@kenhthunghiem", max_videos=2)
+
+    assert len(videos) == 2
+    assert crawler.transport.posts == []
+
+
+def test_channel_videos_unreadable_page_is_none(crawler):
+    assert crawler.channel_videos("https://www.youtube.com/@missing") is None
+
+
+def test_video_comments_pages_through_continuations(crawler):
+    comments = crawler.video_comments("https://www.youtube.com/watch?v=vid00000001", max_comments=10)
+
+    assert [post[1]["continuation"] for post in crawler.transport.posts] == ["comments-page-1", "comments-page-2"]
+    assert comments == [
+        {"author": "@nguoixem", "text": "Bình luận đầu tiên", "likes": "12", "date": "2 ngày trước",
+         "is_verified": False, "is_pinned": True},
+        {"author": "@kenhthunghiem", "text": "Bình luận thứ hai", "likes": "3", "date": "1 ngày trước",
+         "is_verified": True, "is_pinned": False},
+        {"author": "@khach", "text": "Bình luận thứ ba", "likes": "0", "date": "5 giờ trước",
+         "is_verified": True, "is_pinned": False}
+    ]
+
+
+def test_video_comments_stop_at_max_comments(crawler):
+    comments = crawler.video_comments("https://www.youtube.com/watch?v=vid00000001", max_comments=2)
+
+    assert len(comments) == 2
+    assert len(crawler.transport.posts) == 1
@@ -0,0 +1,131 @@
+import os
+
+import pytest
+
+pytest.importorskip("requests")
+
+from conftest import BACKEND_DIR
+from db.db_setup import DatabaseManager
+from modules.download import AudioDownloader, FileTransport, RangeIgnored
+
+
+class RangeIgnoringTransport(FileTransport):
+    """Local transport that answers resumed downloads like a server ignoring Range."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.offsets = []
+
+    def stream(self, source, offset, chunk_size):
+        self.offsets.append(offset)
+        if offset:
+            raise RangeIgnored("Server ignored the Range request")
+        return super().stream(source, offset, chunk_size)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # DatabaseManager loads db/schema.sql relative to the backend folder
+    monkeypatch.chdir(BACKEND_DIR)
+    db = DatabaseManager(str(tmp_path / "test.db"))
+    channel_id = db.insert("channels", {"channel_id": "@kenhthunghiem", "channel_name": "Kênh Thử Nghiệm",
+                                        "url": "https://www.youtube.com/@kenhthunghiem"})
+    for i in range(1, 4):
+        db.insert("videos", {"video_id": f"vid0000000{i}", "channel_id": channel_id, "title": f"Video {i}",
+                             "url": f"https://www.youtube.com/watch?v=vid0000000{i}"})
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    root = tmp_path / "source"
+    root.mkdir()
+    for i in range(1, 4):
+        (root / f"vid0000000{i}.m4a").write_bytes(bytes([i]) * 1000)
+    return root
+
+
+def downloader(db, tmp_path, transport, **kwargs):
+    return AudioDownloader(db.db_path, str(tmp_path / "downloads"), transport=transport, chunk_size=64, **kwargs)
+
+
+def test_download_records_audio_and_reuses_it(db, tmp_path, source_dir):
+    audio = downloader(db, tmp_path, FileTransport(str(source_dir)))
+
+    audio_id = audio.download(1)
+    file_path, file_size, checksum = db.fetchone(
+        "SELECT file_path, file_size, checksum FROM audio_files WHERE id = ?", (audio_id,)
+    )
+
+    assert open(file_path, "rb").read() == bytes([1]) * 1000
+    assert file_size == 1000 and checksum
+    assert audio.download(1) == audio_id
+    audio.close()
+
+
+def test_identical_audio_is_stored_once(db, tmp_path, source_dir):
+    (source_dir / "vid00000002.m4a").write_bytes(bytes([1]) * 1000)
+    audio = downloader(db, tmp_path, FileTransport(str(source_dir)))
+
+    audio.download(1)
+    audio.download(2)
+
+    paths = {path for path, in db.fetchall("SELECT file_path FROM audio_files")}
+    assert len(paths) == 1
+    assert [name for name in os.listdir(tmp_path / "downloads") if name != ".locks"] == ["vid00000001.m4a"]
+    audio.close()
+
+
+def test_partial_download_resumes(db, tmp_path, source_dir):
+    (tmp_path / "downloads").mkdir()
+    (tmp_path / "downloads" / "vid00000001.m4a.part").write_bytes(bytes([1]) * 300)
+    audio = downloader(db, tmp_path, FileTransport(str(source_dir)))
+
+    audio_id = audio.download(1)
+
+    file_path, = db.fetchone("SELECT file_path FROM audio_files WHERE id = ?", (audio_id,))
+    assert open(file_path, "rb").read() == bytes([1]) * 1000
+    audio.close()
+
+
+def test_ignored_range_restarts_download(db, tmp_path, source_dir):
+    (tmp_path / "downloads").mkdir()
+    (tmp_path / "downloads" / "vid00000001.m4a.part").write_bytes(b"stale bytes")
+    transport = RangeIgnoringTransport(str(source_dir))
+    audio = downloader(db, tmp_path, transport)
+
+    audio_id = audio.download(1)
+
+    file_path, = db.fetchone("SELECT file_path FROM audio_files WHERE id = ?", (audio_id,))
+    assert transport.offsets == [len(b"stale bytes"), 0]
+    assert open(file_path, "rb").read() == bytes([1]) * 1000
+    audio.close()
+
+
+def test_quota_evicts_least_recently_used_unpinned_audio(db, tmp_path, source_dir):
+    audio = downloader(db, tmp_path, FileTransport(str(source_dir)), max_bytes=2000)
+
+    audio.download(1)
+    audio.download(2)
+    db.execute("UPDATE audio_files SET last_accessed = '2000-01-01 00:00:00' WHERE video_id = 1")
+    db.execute("UPDATE audio_files SET last_accessed = '2000-01-02 00:00:00' WHERE video_id = 2")
+    db.get_connection().commit()
+
+    with audio.pinned(1):
+        audio.download(3)
+
+    evicted = dict(db.fetchall("SELECT video_id, evicted FROM audio_files"))
+    assert evicted == {1: 0, 2: 1, 3: 0}
+    assert db.fetchone("SELECT COUNT(*) FROM audio_pins") == (0,)
+    audio.close()
+
+
+def test_finished_downloads_leave_no_locks_behind(db, tmp_path, source_dir):
+    audio = downloader(db, tmp_path, FileTransport(str(source_dir)))
+
+    audio.download_many([1, 2, 3, 1])
+
+    assert audio.in_flight == {}
+    assert len(os.listdir(tmp_path / "downloads" / ".locks")) <= len(audio.video_file_locks) + 1
+    audio.close()
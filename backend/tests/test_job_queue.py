@@ -0,0 +1,83 @@
+import queue
+
+import pytest
+
+from conftest import BACKEND_DIR
+from modules.job_queue import (JobQueue, SharedJobQueue, PRIORITY_BACKGROUND, PRIORITY_BULK,
+                               PRIORITY_INTERACTIVE)
+
+
+@pytest.fixture(params=["memory", "shared"])
+def jobs(request, tmp_path, monkeypatch):
+    if request.param == "memory":
+        return JobQueue()
+    # DatabaseManager loads db/schema.sql relative to the backend folder
+    monkeypatch.chdir(BACKEND_DIR)
+    return SharedJobQueue(str(tmp_path / "test.db"), poll_interval=0.01)
+
+
+def drain(jobs):
+    order = []
+    while jobs.qsize():
+        order.append(jobs.get(block=False)["id"])
+        jobs.task_done()
+    return order
+
+
+def test_higher_priority_classes_go_first(jobs):
+    jobs.put({"id": "refresh"}, PRIORITY_BACKGROUND, "@kenh_a")
+    jobs.put({"id": "crawl"}, PRIORITY_BULK, "@kenh_a")
+    jobs.put({"id": "video"}, PRIORITY_INTERACTIVE, "moderator")
+
+    assert drain(jobs) == ["video", "crawl", "refresh"]
+
+
+def test_flows_of_one_class_are_interleaved(jobs):
+    for i in range(4):
+        jobs.put({"id": f"a{i}"}, PRIORITY_BULK, "@kenh_a")
+    jobs.put({"id": "b0"}, PRIORITY_BULK, "@kenh_b")
+    jobs.put({"id": "b1"}, PRIORITY_BULK, "@kenh_b")
+
+    assert drain(jobs) == ["a0", "b0", "a1", "b1", "a2", "a3"]
+
+
+def test_weight_sets_a_flows_share(jobs):
+    for i in range(4):
+        jobs.put({"id": f"a{i}"}, PRIORITY_BULK, "@kenh_a", weight=2.0)
+    for i in range(2):
+        jobs.put({"id": f"b{i}"}, PRIORITY_BULK, "@kenh_b")
+
+    assert drain(jobs) == ["a0", "b0", "a1", "a2", "b1", "a3"]
+
+
+def test_new_flow_starts_at_the_current_virtual_time(jobs):
+    for i in range(3):
+        jobs.put({"id": f"a{i}"}, PRIORITY_BULK, "@kenh_a")
+    assert [jobs.get(block=False)["id"] for _ in range(2)] == ["a0", "a1"]
+
+    # Starting from zero, the new flow would take the next two jobs in a row
+    jobs.put({"id": "b0"}, PRIORITY_BULK, "@kenh_b")
+    jobs.put({"id": "b1"}, PRIORITY_BULK, "@kenh_b")
+
+    assert [jobs.get(block=False)["id"] for _ in range(3)] == ["b0", "a2", "b1"]
+
+
+def test_empty_queue_raises(jobs):
+    with pytest.raises(queue.Empty):
+        jobs.get(block=False)
+    with pytest.raises(queue.Empty):
+        jobs.get(timeout=0.01)
+
+
+def test_released_claims_are_handed_out_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(BACKEND_DIR)
+    jobs = SharedJobQueue(str(tmp_path / "test.db"), poll_interval=0.01)
+    jobs.put({"id": "a0"}, PRIORITY_BULK, "@kenh_a")
+    jobs.put({"id": "a1"}, PRIORITY_BULK, "@kenh_a")
+
+    assert jobs.get(block=False)["id"] == "a0"
+    assert jobs.qsize() == 1
+    assert jobs.release_claims(SharedJobQueue.worker_id()) == 1
+
+    assert drain(jobs) == ["a0", "a1"]
+    assert jobs.stats() == {}
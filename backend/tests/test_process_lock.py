@@ -0,0 +1,31 @@
+import multiprocessing
+import time
+
+from modules.process_lock import ProcessLock
+
+
+def append_marks(lock_path, out_path, tag):
+    lock = ProcessLock(lock_path)
+    for _ in range(3):
+        # Reentrant acquisition must not deadlock on the lock file
+        with lock, lock:
+            with open(out_path, "a") as f:
+                f.write(f"{tag}<")
+                f.flush()
+                time.sleep(0.01)
+                f.write(">")
+
+
+def test_lock_excludes_other_processes(tmp_path):
+    lock_path = str(tmp_path / "locks" / "store.lock")
+    out_path = tmp_path / "marks.txt"
+
+    processes = [multiprocessing.Process(target=append_marks, args=(lock_path, str(out_path), tag))
+                 for tag in "ab"]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    marks = out_path.read_text()
+    assert sorted(marks.split(">")[:-1]) == ["a<"] * 3 + ["b<"] * 3
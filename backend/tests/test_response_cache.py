@@ -0,0 +1,80 @@
+import pytest
+
+from conftest import BACKEND_DIR
+from db.db_setup import DatabaseManager
+from modules.response_cache import ResponseCache
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # DatabaseManager loads db/schema.sql relative to the backend folder
+    monkeypatch.chdir(BACKEND_DIR)
+    db = DatabaseManager(str(tmp_path / "test.db"))
+    channel_id = db.insert("channels", {"channel_id": "@kenhthunghiem", "channel_name": "Kênh Thử Nghiệm",
+                                        "url": "https://www.youtube.com/@kenhthunghiem"})
+    for i in range(1, 3):
+        db.insert("videos", {"video_id": f"vid0000000{i}", "channel_id": channel_id, "title": f"Video {i}",
+                             "url": f"https://www.youtube.com/watch?v=vid0000000{i}"})
+    yield db
+    db.close()
+
+
+class Builder:
+    """Response builder that counts how often the body had to be built."""
+
+    def __init__(self):
+        self.builds = 0
+
+    def __call__(self):
+        self.builds += 1
+        return f"body {self.builds}".encode()
+
+
+def test_entries_are_served_until_their_data_changes(db):
+    # ttl=0 checks the data versions on every request
+    cache = ResponseCache(db.db_path, ttl=0)
+    build = Builder()
+
+    first = cache.get(("video", 1), ["video:1"], build)
+    assert cache.get(("video", 1), ["video:1"], build).etag == first.etag
+    assert build.builds == 1
+
+    db.insert("comments", {"video_id": 1, "author": "@tacgia", "comment_text": "Bình luận mới"})
+
+    changed = cache.get(("video", 1), ["video:1"], build)
+    assert build.builds == 2
+    assert changed.etag != first.etag
+
+
+def test_writes_only_invalidate_the_entities_they_touch(db):
+    cache = ResponseCache(db.db_path, ttl=0)
+    video_1, video_2, channels = Builder(), Builder(), Builder()
+    requests = [("video-1", ["video:1"], video_1), ("video-2", ["video:2"], video_2),
+                ("channels", ["channels"], channels)]
+    for key, entities, build in requests:
+        cache.get(key, entities, build)
+
+    db.update("videos", {"title": "Video 2 (đã sửa)"}, "id = ?", (2,))
+    for key, entities, build in requests:
+        cache.get(key, entities, build)
+
+    assert (video_1.builds, video_2.builds, channels.builds) == (1, 2, 1)
+
+
+def test_entries_within_the_ttl_skip_the_version_check(db):
+    cache = ResponseCache(db.db_path, ttl=60)
+    build = Builder()
+
+    cache.get("channels", ["channels"], build)
+    db.update("channels", {"channel_name": "Kênh Mới"}, "id = ?", (1,))
+    cache.get("channels", ["channels"], build)
+
+    assert build.builds == 1
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+
+def test_declined_responses_are_not_cached(db):
+    cache = ResponseCache(db.db_path, ttl=0)
+
+    assert cache.get("missing", ["video:404"], lambda: None) is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import BACKEND_DIR
+from db.db_setup import DatabaseManager
+from modules.scheduler import ChannelRefreshScheduler
+
+NOW = datetime(2026, 10, 19, 12, 0, 0)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # DatabaseManager loads db/schema.sql relative to the backend folder
+    monkeypatch.chdir(BACKEND_DIR)
+    db = DatabaseManager(str(tmp_path / "test.db"))
+    for handle, scrape_time in [("@kenh_cu", "2026-10-16 12:00:00"), ("@kenh_moi_quet", "2026-10-19 11:00:00"),
+                                ("@kenh_hom_qua", "2026-10-18 06:00:00")]:
+        db.insert("channels", {"channel_id": handle, "channel_name": handle, "scrape_time": scrape_time,
+                               "url": f"https://www.youtube.com/{handle}"})
+    # Placeholder channels (url '#') are never refreshed
+    db.insert("channels", {"channel_id": "unknown", "channel_name": "Unknown", "url": "#",
+                           "scrape_time": "2026-01-01 00:00:00"})
+    yield db
+    db.close()
+
+
+def scheduler(db, budget_per_hour=120.0):
+    enqueued = []
+    # An hourly tick lets the whole hourly budget go out at once
+    refresher = ChannelRefreshScheduler(db.db_path, enqueued.append, budget_per_hour=budget_per_hour,
+                                        jitter=0.0, tick_seconds=3600)
+    return refresher, enqueued
+
+
+def test_due_channels_are_enqueued_most_overdue_first(db):
+    refresher, enqueued = scheduler(db)
+
+    assert refresher.tick(NOW) == 2
+    assert [channel["channel_name"] for channel in enqueued] == ["@kenh_cu", "@kenh_hom_qua"]
+
+
+def test_enqueued_channels_wait_for_their_crawl(db):
+    refresher, enqueued = scheduler(db)
+    refresher.tick(NOW)
+
+    assert refresher.tick(NOW) == 0
+
+    # Once crawled, a channel is scheduled from its new scrape time; the other one stays queued
+    db.update("channels", {"scrape_time": "2026-10-19 12:30:00"}, "channel_id = ?", ("@kenh_cu",))
+    due = refresher.due_channels(datetime(2026, 10, 20, 13, 0, 0))
+    assert [channel["channel_name"] for channel in due] == ["@kenh_moi_quet", "@kenh_cu"]
+
+
+def test_budget_caps_refreshes_per_tick(db):
+    refresher, enqueued = scheduler(db, budget_per_hour=1.0)
+
+    assert refresher.tick(NOW) == 1
+    assert [channel["channel_name"] for channel in enqueued] == ["@kenh_cu"]
+
+
+def test_dangerous_and_active_channels_refresh_sooner(db):
+    refresher, _ = scheduler(db)
+
+    clean = refresher.refresh_interval(1, uploads_per_day=0.0, danger_rate=0.0)
+    active = refresher.refresh_interval(1, uploads_per_day=3.0, danger_rate=0.0)
+    dangerous = refresher.refresh_interval(1, uploads_per_day=0.0, danger_rate=1.0)
+
+    assert clean.total_seconds() == 24 * 3600
+    assert active < clean and dangerous < clean
+    assert refresher.refresh_interval(1, uploads_per_day=100.0, danger_rate=1.0) >= refresher.min_interval
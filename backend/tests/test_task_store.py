@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from conftest import BACKEND_DIR
+from db.db_setup import DatabaseManager
+from modules.task_store import TaskStore
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # DatabaseManager loads db/schema.sql relative to the backend folder
+    monkeypatch.chdir(BACKEND_DIR)
+    path = str(tmp_path / "test.db")
+    DatabaseManager(path).close()
+    return path
+
+
+def create(store, task_id, minute):
+    store.create(task_id, {"status": "queued", "type": "video", "start_time": f"2026-10-19 10:{minute:02d}:00",
+                           "params": {"video_url": f"https://www.youtube.com/watch?v={task_id}"}})
+
+
+def archived(db_path):
+    db = DatabaseManager(db_path)
+    try:
+        return {task_id: status for task_id, status in db.fetchall("SELECT task_id, status FROM task_archive")}
+    finally:
+        db.close()
+
+
+def test_finished_tasks_expire_into_the_archive(db_path):
+    store = TaskStore(db_path, finished_ttl=0.05)
+    create(store, "task-1", 1)
+    store.finish("task-1", "completed", {"videos_processed": 1})
+
+    assert "task-1" in store
+    assert archived(db_path) == {"task-1": "completed"}
+
+    time.sleep(0.1)
+    create(store, "task-2", 2)
+
+    assert "task-1" not in store
+    assert store.get("task-1")["status"] == "completed"
+    assert store.get_results("task-1") == {"videos_processed": 1}
+
+
+def test_oldest_finished_tasks_are_evicted_over_capacity(db_path):
+    store = TaskStore(db_path, max_tasks=2)
+    for minute, task_id in enumerate(["task-1", "task-2", "task-3"]):
+        create(store, task_id, minute)
+
+    # Live tasks are kept even over capacity
+    assert len(store) == 3
+
+    store.finish("task-2", "failed", {}, error="Không tải được trang")
+    store.finish("task-1", "completed", {})
+
+    assert "task-2" not in store and len(store) == 2
+    assert store.get("task-2")["error"] == "Không tải được trang"
+    assert archived(db_path) == {"task-1": "completed", "task-2": "failed"}
+
+
+def test_listing_includes_archived_tasks(db_path):
+    store = TaskStore(db_path, max_tasks=1)
+    for minute, task_id in enumerate(["task-1", "task-2", "task-3"]):
+        create(store, task_id, minute)
+    store.finish("task-1", "completed", {})
+    store.finish("task-2", "completed", {})
+
+    page, total = store.list_tasks(include_archived=True)
+
+    assert [task_id for task_id, _ in page] == ["task-3", "task-2", "task-1"]
+    assert total == 3
+    assert store.list_tasks(status="completed", include_archived=True)[1] == 2
@@ -0,0 +1,101 @@
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("selenium")
+pytest.importorskip("webdriver_manager")
+
+from modules import scrape
+from modules.browser_pool import BrowserLease
+from modules.scrape import AdaptiveTimeouts, YouTubeChannelScraper
+
+
+class FakeVideosPage:
+    """
+    Stand-in for a Chrome driver showing a channel's videos tab.
+
+    Scrolling to the bottom appends the next page of grid items. Items are
+    marked as seen when extracted and removed when pruning is asked for.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.loaded_pages = 1
+        self.grid = [dict(item, seen=False) for item in pages[0]]
+        self.scanned = 0
+
+    def get(self, url):
+        pass
+
+    def find_element(self, by, selector):
+        return object()
+
+    def execute_script(self, script, *args):
+        if script == scrape.EXTRACT_VIDEOS_JS:
+            limit, prune = args
+            items = [item for item in self.grid if not item["seen"]][:limit]
+            for item in items:
+                item["seen"] = True
+            self.scanned += len(items)
+            if prune:
+                self.grid = [item for item in self.grid if item not in items]
+            return [{"title": item["title"], "url": f"https://www.youtube.com/watch?v={item['id']}",
+                     "metadata": "1,2 N lượt xem\n2 ngày trước"} for item in items]
+        if script.startswith("window.scrollTo(0, document.documentElement.scrollHeight)"):
+            if self.loaded_pages < len(self.pages):
+                self.grid += [dict(item, seen=False) for item in self.pages[self.loaded_pages]]
+                self.loaded_pages += 1
+            return None
+        if "querySelectorAll(arguments[0]).length" in script:
+            assert args[0] == scrape.UNSEEN_VIDEOS_SELECTOR
+            return sum(1 for item in self.grid if not item["seen"])
+        return None
+
+
+class FakePool:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def checkout(self):
+        return BrowserLease(1, self.driver)
+
+    def checkin(self, lease):
+        pass
+
+
+def videos_page(*ids_per_page):
+    return FakeVideosPage([[{"id": video_id, "title": f"Video {video_id}"} for video_id in ids]
+                           for ids in ids_per_page])
+
+
+def scrape_videos(page, max_videos, prune_scanned=False):
+    scraper = YouTubeChannelScraper(pool=FakePool(page), use_http=False, scroll_pause_time=0.2,
+                                    prune_scanned=prune_scanned)
+    scraper.timeouts = AdaptiveTimeouts(default=0.3, minimum=0.2, maximum=0.3)
+    return scraper.get_channel_videos("https://www.youtube.com/@kenhthunghiem", max_videos)
+
+
+def test_each_item_is_scanned_once():
+    page = videos_page(["vid00000001", "vid00000002"], ["vid00000003"], ["vid00000004"])
+
+    videos = scrape_videos(page, 10)
+
+    assert [video["video_id"] for video in videos] == ["vid00000001", "vid00000002", "vid00000003", "vid00000004"]
+    assert page.scanned == 4
+    assert videos[0]["views"] == "1,2 N lượt xem" and videos[0]["upload_date"] == "2 ngày trước"
+
+
+def test_repeated_items_are_skipped():
+    page = videos_page(["vid00000001", "vid00000002"], ["vid00000002", "vid00000003"])
+
+    videos = scrape_videos(page, 10)
+
+    assert [video["video_id"] for video in videos] == ["vid00000001", "vid00000002", "vid00000003"]
+
+
+def test_pruning_keeps_the_grid_small():
+    page = videos_page(["vid00000001", "vid00000002"], ["vid00000003", "vid00000004"])
+
+    videos = scrape_videos(page, 3, prune_scanned=True)
+
+    assert [video["video_id"] for video in videos] == ["vid00000001", "vid00000002", "vid00000003"]
+    assert [item["id"] for item in page.grid] == ["vid00000004"]
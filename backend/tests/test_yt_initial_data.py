@@ -0,0 +1,73 @@
+from modules.yt_initial_data import (
+    extract_initial_data, extract_player_response, extract_ytcfg, extract_continuation_token,
+    get_text, parse_channel_info, parse_video_details, parse_video_renderers
+)
+
+
+def test_extracts_embedded_json_variables(fixture_text):
+    html = fixture_text("watch.html")
+
+    # "var x = ...;" and "window["x"] = ...;" forms, with other statements after the object
+    assert extract_player_response(html)["videoDetails"]["videoId"] == "vid00000001"
+    assert "contents" in extract_initial_data(html)
+    assert extract_ytcfg(html)["INNERTUBE_API_KEY"] == "test-api-key"
+
+
+def test_missing_or_malformed_data_is_none():
+    assert extract_initial_data("<html></html>") is None
+    assert extract_initial_data("<script>var ytInitialData = {broken;</script>") is None
+    assert parse_video_details("<html></html>", "https://www.youtube.com/watch?v=x") is None
+    assert parse_channel_info("<html></html>") is None
+
+
+def test_get_text_flattens_text_objects():
+    assert get_text({"simpleText": "a"}) == "a"
+    assert get_text({"runs": [{"text": "a"}, {"text": "b"}]}) == "ab"
+    assert get_text({"content": "c"}) == "c"
+    assert get_text("plain") == "plain"
+    assert get_text(None) is None
+
+
+def test_parse_video_details(fixture_text):
+    url = "https://www.youtube.com/watch?v=vid00000001"
+    details = parse_video_details(fixture_text("watch.html"), url)
+
+    assert details == {
+        "title": "Video mới nhất",
+        "video_id": "vid00000001",
+        "url": url,
+        "views": "1.234 lượt xem",
+        "likes": 56,
+        "upload_date": "2 thg 1, 2024",
+        "description": "Mô tả video.",
+        "thumbnail": "https://i.ytimg.com/vi/vid00000001/maxresdefault.jpg",
+        "channel_url": "http://www.youtube.com/@kenhthunghiem"
+    }
+
+
+def test_parse_channel_info(fixture_text):
+    info = parse_channel_info(fixture_text("channel_videos.html"))
+
+    assert info == {
+        "channel_name": "Kênh Thử Nghiệm",
+        "external_id": "UCtest0000000000000000000",
+        "subscribers": "12,3 N người đăng ký",
+        "description": "Kênh dùng cho kiểm thử.",
+        "thumbnail": "https://yt3.example/avatar=s900"
+    }
+
+
+def test_parse_video_renderers_and_continuation_token(fixture_text):
+    data = extract_initial_data(fixture_text("channel_videos.html"))
+
+    videos = parse_video_renderers(data)
+    assert [v["video_id"] for v in videos] == ["vid00000001", "vid00000002"]
+    assert videos[0] == {
+        "title": "Video mới nhất",
+        "video_id": "vid00000001",
+        "url": "https://www.youtube.com/watch?v=vid00000001",
+        "views": "1.234 lượt xem",
+        "upload_date": "1 ngày trước",
+        "thumbnail": "https://i.ytimg.com/vi/vid00000001/hqdefault.jpg"
+    }
+    assert extract_continuation_token(data) == "videos-page-2"
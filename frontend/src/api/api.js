@@ -55,8 +55,9 @@ export const addVideo = async (videoUrl, scrapeComments = true) => {
 };
 
 // Task functions
-export const getTasks = async () => {
-  const response = await api.get('/tasks');
+export const getTasks = async (params = {}) => {
+  // Supported params: status, type, limit, offset, archived
+  const response = await api.get('/tasks', { params });
   return response.data;
 };
 
@@ -65,6 +66,39 @@ export const getTask = async (taskId) => {
   return response.data;
 };
 
+// Subscribe to task state and progress events (Server-Sent Events).
+// EventSource reconnects on its own and resumes from the last event ID.
+// Returns a function that closes the stream.
+export const subscribeToTasks = ({ onTask, onProgress, onReset }) => {
+  const source = new EventSource(`${API_URL}/tasks/stream`);
+
+  source.addEventListener('task', (event) => onTask && onTask(JSON.parse(event.data)));
+  source.addEventListener('progress', (event) => onProgress && onProgress(JSON.parse(event.data)));
+  source.addEventListener('reset', () => onReset && onReset());
+
+  return () => source.close();
+};
+
+// Apply a streamed task event to a newest-first page of tasks ({ tasks, total }).
+// A task that is not listed yet is new if the page is not full or it started
+// after the oldest listed task (older tasks were left off the page). New tasks
+// go first, count towards the total and the page is trimmed to its size.
+export const applyTaskEvent = ({ tasks, total }, { task_id, task }, pageSize) => {
+  if (tasks.some(t => t.task_id === task_id)) {
+    return { tasks: tasks.map(t => (t.task_id === task_id ? { ...task, task_id } : t)), total };
+  }
+  const oldest = tasks[tasks.length - 1];
+  if (tasks.length >= pageSize && (task.start_time || '') < (oldest.start_time || '')) {
+    return { tasks, total };
+  }
+  return { tasks: [{ ...task, task_id }, ...tasks].slice(0, pageSize), total: total + 1 };
+};
+
+// Apply a streamed progress event; tasks that are not listed are ignored.
+export const applyProgressEvent = (tasks, { task_id, progress }) => (
+  tasks.map(t => (t.task_id === task_id ? { ...t, progress } : t))
+);
+
 // Stats functions
 export const getStats = async () => {
   const response = await api.get('/stats');
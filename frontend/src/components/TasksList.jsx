@@ -1,32 +1,59 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
-import { getTasks } from '../api/api';
+import { getTasks, subscribeToTasks, applyTaskEvent, applyProgressEvent } from '../api/api';
 import { FaTasks, FaSpinner, FaCheck, FaExclamationTriangle, FaClock, FaVideo, FaUser } from 'react-icons/fa';
 import './TasksList.css';
 
 const TasksList = ({ limit = null, showViewAll = false }) => {
-  const [tasks, setTasks] = useState({});
+  // Newest first, in the order returned by the API
+  const [{ tasks, total }, setPage] = useState({ tasks: [], total: 0 });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
   useEffect(() => {
+    // The API returns 50 tasks when no limit is given
+    const pageSize = limit || 50;
+    // Events that arrive while the task list is being fetched, applied on top of it
+    let buffered = null;
+
+    const applyEvent = (page, [type, event]) => (
+      type === 'task'
+        ? applyTaskEvent(page, event, pageSize)
+        : { ...page, tasks: applyProgressEvent(page.tasks, event) }
+    );
+
+    const onEvent = (type) => (event) => {
+      if (buffered) {
+        buffered.push([type, event]);
+      } else {
+        setPage(prev => applyEvent(prev, [type, event]));
+      }
+    };
+
     const fetchTasks = async () => {
+      buffered = [];
       try {
-        const response = await getTasks();
-        setTasks(response.tasks);
+        const response = await getTasks({ limit: pageSize });
+        setPage(buffered.reduce(applyEvent, { tasks: response.tasks, total: response.total }));
       } catch (err) {
         setError(err.message);
       } finally {
+        buffered = null;
         setLoading(false);
       }
     };
 
+    // Subscribe first, so no update is lost between the fetch and the stream;
+    // refetch if the stream was reset
+    const unsubscribe = subscribeToTasks({
+      onTask: onEvent('task'),
+      onProgress: onEvent('progress'),
+      onReset: fetchTasks
+    });
     fetchTasks();
-    
-    // Poll for updates every 5 seconds
-    const interval = setInterval(fetchTasks, 5000);
-    return () => clearInterval(interval);
-  }, []);
+
+    return unsubscribe;
+  }, [limit]);
 
   if (loading) {
     return (
@@ -56,8 +83,7 @@ const TasksList = ({ limit = null, showViewAll = false }) => {
     );
   }
 
-  const taskIds = Object.keys(tasks);
-  if (taskIds.length === 0) {
+  if (tasks.length === 0) {
     return (
       <div className="tasks-list">
         <h2>
@@ -71,15 +97,8 @@ const TasksList = ({ limit = null, showViewAll = false }) => {
     );
   }
 
-  // Sort tasks by time (newest first)
-  const sortedTaskIds = taskIds.sort((a, b) => {
-    const timeA = new Date(tasks[a].start_time).getTime();
-    const timeB = new Date(tasks[b].start_time).getTime();
-    return timeB - timeA;
-  });
-
   // Apply limit if specified
-  const displayTaskIds = limit ? sortedTaskIds.slice(0, limit) : sortedTaskIds;
+  const displayTasks = limit ? tasks.slice(0, limit) : tasks;
 
   const getStatusIcon = (status) => {
     switch (status) {
@@ -116,8 +135,8 @@ const TasksList = ({ limit = null, showViewAll = false }) => {
           </tr>
         </thead>
         <tbody>
-          {displayTaskIds.map(taskId => {
-            const task = tasks[taskId];
+          {displayTasks.map(task => {
+            const taskId = task.task_id;
             return (
               <tr key={taskId} className={`task-row status-${task.status}`}>
                 <td className="task-id">{taskId.substring(0, 8)}...</td>
@@ -154,10 +173,10 @@ const TasksList = ({ limit = null, showViewAll = false }) => {
         </tbody>
       </table>
 
-      {showViewAll && limit && taskIds.length > limit && (
+      {showViewAll && limit && total > limit && (
         <div className="view-all-tasks">
           <Link to="/tasks" className="view-all-link">
-            View all {taskIds.length} tasks
+            View all {total} tasks
           </Link>
         </div>
       )}
@@ -1,10 +1,11 @@
 import React, { useEffect, useState } from 'react';
-import { getTasks, getTask } from '../api/api';
+import { getTasks, getTask, subscribeToTasks, applyTaskEvent, applyProgressEvent } from '../api/api';
 import Loading from '../components/common/Loading';
 import './TasksPage.css'
 
 const TasksPage = () => {
-  const [tasks, setTasks] = useState({});
+  // Newest first, in the order returned by the API
+  const [{ tasks, total }, setPage] = useState({ tasks: [], total: 0 });
   const [selectedTask, setSelectedTask] = useState(null);
   const [taskDetails, setTaskDetails] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -12,22 +13,47 @@ const TasksPage = () => {
   const [error, setError] = useState(null);
 
   useEffect(() => {
+    const pageSize = 200;
+    // Events that arrive while the task list is being fetched, applied on top of it
+    let buffered = null;
+
+    const applyEvent = (page, [type, event]) => (
+      type === 'task'
+        ? applyTaskEvent(page, event, pageSize)
+        : { ...page, tasks: applyProgressEvent(page.tasks, event) }
+    );
+
+    const onEvent = (type) => (event) => {
+      if (buffered) {
+        buffered.push([type, event]);
+      } else {
+        setPage(prev => applyEvent(prev, [type, event]));
+      }
+    };
+
     const fetchTasks = async () => {
+      buffered = [];
       try {
-        const response = await getTasks();
-        setTasks(response.tasks);
+        const response = await getTasks({ limit: pageSize });
+        setPage(buffered.reduce(applyEvent, { tasks: response.tasks, total: response.total }));
       } catch (err) {
         setError(err.message);
       } finally {
+        buffered = null;
         setLoading(false);
       }
     };
 
+    // Subscribe first, so no update is lost between the fetch and the stream;
+    // refetch if the stream was reset
+    const unsubscribe = subscribeToTasks({
+      onTask: onEvent('task'),
+      onProgress: onEvent('progress'),
+      onReset: fetchTasks
+    });
     fetchTasks();
-    
-    // Poll for updates every 5 seconds
-    const interval = setInterval(fetchTasks, 5000);
-    return () => clearInterval(interval);
+
+    return unsubscribe;
   }, []);
 
   useEffect(() => {
@@ -54,8 +80,7 @@ const TasksPage = () => {
   if (loading) return <Loading />;
   if (error) return <p className="error">Error: {error}</p>;
 
-  const taskIds = Object.keys(tasks);
-  if (taskIds.length === 0) return <p>No tasks found.</p>;
+  if (tasks.length === 0) return <p>No tasks found.</p>;
 
   // Get completion status counts
   const statusCounts = {
@@ -65,19 +90,15 @@ const TasksPage = () => {
     failed: 0
   };
 
-  taskIds.forEach(id => {
-    const status = tasks[id].status;
+  tasks.forEach(task => {
+    const status = task.status;
     if (statusCounts.hasOwnProperty(status)) {
       statusCounts[status]++;
     }
   });
 
-  // Sort tasks by newest first
-  const sortedTaskIds = taskIds.sort((a, b) => {
-    const timeA = new Date(tasks[a].start_time).getTime();
-    const timeB = new Date(tasks[b].start_time).getTime();
-    return timeB - timeA;
-  });
+  const selectedEntry = tasks.find(task => task.task_id === selectedTask);
+  const selectedProgress = selectedEntry && selectedEntry.progress;
 
   return (
     <div className="tasks-page">
@@ -98,7 +119,7 @@ const TasksPage = () => {
         </div>
         <div className="stat-card">
           <h3>Total</h3>
-          <p className="stat-value">{taskIds.length}</p>
+          <p className="stat-value">{total}</p>
         </div>
       </div>
       
@@ -116,8 +137,8 @@ const TasksPage = () => {
               </tr>
             </thead>
             <tbody>
-              {sortedTaskIds.map(taskId => {
-                const task = tasks[taskId];
+              {tasks.map(task => {
+                const taskId = task.task_id;
                 return (
                   <tr 
                     key={taskId} 
@@ -169,6 +190,15 @@ const TasksPage = () => {
                   </div>
                 )}
                 
+                {selectedProgress && (
+                  <div className="detail-item">
+                    <strong>Progress:</strong>
+                    <pre className="params-json">
+                      {JSON.stringify(selectedProgress, null, 2)}
+                    </pre>
+                  </div>
+                )}
+                
                 <div className="detail-item">
                   <strong>Parameters:</strong>
                   <pre className="params-json">